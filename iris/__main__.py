@@ -18,9 +18,17 @@ from mozinstall import install, get_binary
 from api.core.key import Key
 from api.core.profile import Profile
 from api.core.settings import Settings
+from api.core.util.capture_service import start_capture_service, stop_capture_service
 from api.core.util.core_helper import *
+from api.core.util.damage_monitor import start_damage_monitor, stop_damage_monitor
+from api.core.util.expectation_pool import shutdown_expectation_pool
+from api.core.util.interrupt_watcher import stop_interrupt_watchers
+from api.core.util.ocr_tiles import shutdown_ocr_pool, start_ocr_pool
 from api.core.util.parse_args import get_global_args, parse_args
+from api.core.util.pattern_optimizer import optimize_patterns
+from api.core.util.search_pool import shutdown_search_pool, start_search_pool
 from api.core.util.test_loader import load_tests, scan_all_tests
+from api.core.util.timing_history import save_timing_history
 from api.core.util.version_parser import get_latest_scraper_details, get_version_from_path, get_scraper_details
 from api.helpers.general import launch_firefox, quit_firefox, get_firefox_channel, get_firefox_version, \
     get_firefox_build_id
@@ -53,9 +61,20 @@ class Iris(object):
         cleanup.init()
         Iris.fix_terminal_encoding()
         self.initialize_platform()
+        if self.args.optimize_patterns:
+            optimize_patterns(references_dir=self.args.references, rewrite=self.args.rewrite_patterns)
+            self.delete_run_directory()
+            self.finish(0)
         self.verify_config()
         if self.control_center():
             self.initialize_run()
+            # OCR and process search workers are forked, before the threads of the search pool and of the capture
+            # service start.
+            start_ocr_pool()
+            start_search_pool()
+            start_capture_service()
+            if self.args.damage_events:
+                start_damage_monitor()
             run(self)
         else:
             self.delete_run_directory()
@@ -638,6 +657,62 @@ class ResetTerminalEncoding(cleanup.CleanUp):
             Iris.set_terminal_encoding(restore_terminal_encoding)
 
 
+class ShutdownSearchPool(cleanup.CleanUp):
+    """Class for stopping the image search workers at exit."""
+
+    @staticmethod
+    def at_exit():
+        shutdown_search_pool()
+
+
+class ShutdownOcrPool(cleanup.CleanUp):
+    """Class for stopping the tiled OCR workers at exit."""
+
+    @staticmethod
+    def at_exit():
+        shutdown_ocr_pool()
+
+
+class StopCaptureService(cleanup.CleanUp):
+    """Class for stopping the background screen capture at exit."""
+
+    @staticmethod
+    def at_exit():
+        stop_capture_service()
+
+
+class StopDamageMonitor(cleanup.CleanUp):
+    """Class for closing the X11 Damage notifications connection at exit."""
+
+    @staticmethod
+    def at_exit():
+        stop_damage_monitor()
+
+
+class ShutdownExpectationPool(cleanup.CleanUp):
+    """Class for stopping the workers of deferred expect() assertions at exit."""
+
+    @staticmethod
+    def at_exit():
+        shutdown_expectation_pool()
+
+
+class StopInterruptWatchers(cleanup.CleanUp):
+    """Class for stopping the background checks of interrupt watchers at exit."""
+
+    @staticmethod
+    def at_exit():
+        stop_interrupt_watchers()
+
+
+class SaveTimingHistory(cleanup.CleanUp):
+    """Class for saving the time patterns took to appear, used by adaptive timeouts."""
+
+    @staticmethod
+    def at_exit():
+        save_timing_history()
+
+
 class TerminateSubprocesses(cleanup.CleanUp):
     """Class for terminiting subprocesses, such as local web server instances."""
 
@@ -14,6 +14,8 @@ from errors import FindError
 from platform import Platform
 from settings import Settings, DEFAULT_TYPE_DELAY
 from util.core_helper import INVALID_GENERIC_INPUT, IrisCore
+from util.input_events import notify_input
+from util.poll_scheduler import PollScheduler
 
 DEFAULT_KEY_SHORTCUT_DELAY = 0.1
 
@@ -263,6 +265,7 @@ def key_down(key):
             raise ValueError("Unsupported string input.")
     else:
         raise ValueError(INVALID_GENERIC_INPUT)
+    notify_input()
 
 
 def key_up(key):
@@ -280,6 +283,7 @@ def key_up(key):
             raise ValueError("Unsupported string input.")
     else:
         raise ValueError(INVALID_GENERIC_INPUT)
+    notify_input()
 
 
 def type(text=None, modifier=None, interval=None):
@@ -333,6 +337,7 @@ def type(text=None, modifier=None, interval=None):
             pyautogui.keyUp(modifier_keys[0])
         else:
             logger.error('Returned key modifiers out of range.')
+    notify_input()
 
     if Settings.type_delay != DEFAULT_TYPE_DELAY:
         Settings.type_delay = DEFAULT_TYPE_DELAY
@@ -347,17 +352,10 @@ def paste(text):
     pyperclip.copy(text)
 
     text_copied = False
-    wait_scan_rate = float(Settings.wait_scan_rate)
-    interval = 1 / wait_scan_rate
-    max_attempts = int(Settings.auto_wait_timeout * wait_scan_rate)
-    attempt = 0
-
-    while not text_copied and attempt < max_attempts:
-        if pyperclip.paste() == text:
-            text_copied = True
-        else:
-            time.sleep(interval)
-            attempt += 1
+    scheduler = PollScheduler(Settings.auto_wait_timeout)
+
+    while not text_copied and scheduler.next_attempt():
+        text_copied = pyperclip.paste() == text
 
     if not text_copied:
         logger.error('Paste method failed.')
@@ -14,6 +14,7 @@ from settings import Settings, DEFAULT_CLICK_DELAY
 from util.core_helper import INVALID_GENERIC_INPUT
 from util.highlight_circle import HighlightCircle
 from util.image_search import positive_image_search, image_search, get_image_size
+from util.input_events import notify_input
 from util.ocr_search import text_search_by
 from util.parse_args import parse_args
 from util.screen_highlight import ScreenHighlight
@@ -154,6 +155,7 @@ def drag_drop(drag_from, drop_to, duration=None):
 
     time.sleep(Settings.delay_before_drop)
     pyautogui.mouseUp(button='left', _pause=False)
+    notify_input()
 
 
 def _mouse_press_release(where=None, action=None, button=None, in_region=None):
@@ -196,6 +198,7 @@ def _mouse_press_release(where=None, action=None, button=None, in_region=None):
                 mouse.press(button)
             elif mouse == 'release':
                 mouse.release(button)
+    notify_input()
 
 
 def _click_at(location=None, clicks=None, duration=None, button=None):
@@ -225,6 +228,7 @@ def _click_at(location=None, clicks=None, duration=None, button=None):
         mouse.click(Button.left, 2)
     else:
         pyautogui.click(clicks=clicks, interval=Settings.click_delay, button=button)
+    notify_input()
 
     if Settings.click_delay != DEFAULT_CLICK_DELAY:
         Settings.click_delay = DEFAULT_CLICK_DELAY
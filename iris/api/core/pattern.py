@@ -162,6 +162,77 @@ class Pattern(object):
         return self
 
 
+class PatternSet(object):
+    """Group of Pattern variants (locales, themes, hovered/unhovered states) searched together.
+
+    All variants are matched against the same capture, so checking which state the UI is in costs a single search.
+    """
+
+    def __init__(self, variants):
+        """
+        :param list || dict variants: List of Pattern objects or image names, or dict of variant name to Pattern
+                                      or image name. List variants are named after their image file.
+        """
+        caller = inspect.stack()[1][1]
+        if isinstance(variants, dict):
+            items = sorted(variants.items())
+        else:
+            items = [(None, variant) for variant in variants]
+
+        self._variants = []
+        for name, variant in items:
+            if isinstance(variant, str):
+                variant = Pattern(variant, from_path=_get_image_path(caller, variant))
+            elif not isinstance(variant, Pattern):
+                raise ValueError('PatternSet variants must be Pattern objects or image names.')
+            self._variants.append((variant.get_filename() if name is None else name, variant))
+
+        if len(self._variants) == 0:
+            raise ValueError('PatternSet requires at least one variant.')
+
+    @staticmethod
+    def from_locales(image_name, locales=None):
+        """Create a PatternSet with one variant per locale folder that contains the image.
+
+        :param str image_name: Image file name.
+        :param list locales: Locales to look up. By default all locales supported by Iris.
+        :return: PatternSet with variants named after their locale.
+        """
+        caller = inspect.stack()[1][1]
+        if locales is None:
+            locales = Settings.LOCALES
+
+        variants = {}
+        for locale in locales:
+            path = _get_locale_image_path(caller, image_name, locale)
+            if path is not None:
+                variants[locale] = Pattern(image_name, from_path=path)
+
+        if len(variants) == 0:
+            raise FindError('No locale variant found for %s.' % image_name)
+        return PatternSet(variants)
+
+    def get_variants(self):
+        """Returns the list of (variant name, Pattern) pairs."""
+        return list(self._variants)
+
+    def get_pattern(self, name):
+        """Returns the Pattern of a variant or None."""
+        for variant_name, pattern in self._variants:
+            if variant_name == name:
+                return pattern
+        return None
+
+    def get_filename(self):
+        return ', '.join([pattern.get_filename() for name, pattern in self._variants])
+
+    def similar(self, value):
+        """Set the minimum similarity of every variant to the specified value."""
+        for name, pattern in self._variants:
+            pattern.similar(value)
+        return self
+
+
 def _apply_scale(scale, rgb_array):
     """Resize the image for HD images.
 
@@ -177,6 +248,35 @@ def _apply_scale(scale, rgb_array):
         return rgb_array
 
 
+def _get_os_folder():
+    """Returns the name of the image folder used by the current platform."""
+    if Settings.get_os_version() == 'win7':
+        return 'win7'
+    else:
+        return Settings.get_os()
+
+
+def _get_locale_image_path(caller, image, locale):
+    """Look up an image in the locale folders relative to the calling file only.
+
+    :param caller: Path of calling Python module.
+    :param image: String filename of image.
+    :param locale: Locale folder name.
+    :return: Full path to image on disk or None.
+    """
+    module_directory = os.path.split(caller)[0]
+    file_name = image.split('.')[0]
+    names = [image, '%s@2x.png' % file_name, '%s@3x.png' % file_name, '%s@4x.png' % file_name]
+
+    for directory in [os.path.join(module_directory, 'images', _get_os_folder(), locale),
+                      os.path.join(module_directory, 'images', 'common', locale)]:
+        for name in names:
+            path = os.path.join(directory, name)
+            if os.path.exists(path):
+                return path
+    return None
+
+
 def _get_image_path(caller, image):
     """Enforce proper location for all Pattern creation.
 
@@ -202,10 +302,7 @@ def _get_image_path(caller, image):
     # If the above fails, we will look up the file name in the list of project-wide images,
     # and return whatever we find, with a warning message.
     # If we find nothing, we will raise an exception.
-    if Settings.get_os_version() == 'win7':
-        os_version = 'win7'
-    else:
-        os_version = Settings.get_os()
+    os_version = _get_os_folder()
     paths = []
     current_locale = parse_args().locale
 
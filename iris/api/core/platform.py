@@ -7,6 +7,14 @@ import mozinfo
 import pyautogui
 
 
+class _HighDef(object):
+    """Probes the display on first access instead of on import."""
+
+    def __get__(self, instance, owner):
+        # Imported here since core_helper depends on this module.
+        from util.display_geometry import get_display_geometry
+        return get_display_geometry().is_high_def
+
 
 class Platform(object):
     """Class that holds all supported operating systems (HIGH_DEF = High definition displays)."""
@@ -20,6 +28,6 @@ class Platform(object):
 
 
     ALL = [LINUX, MAC, WINDOWS]
-    HIGH_DEF = not (pyautogui.screenshot().size == pyautogui.size())
+    HIGH_DEF = _HighDef()
     SCREEN_WIDTH, SCREEN_HEIGHT = pyautogui.size()
     LOW_RES = (SCREEN_WIDTH < 1280 or SCREEN_HEIGHT < 800)
@@ -2,16 +2,26 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this file,
 # You can obtain one at http://mozilla.org/MPL/2.0/.
 
+import copy
+
 from errors import FindError
 from key import key_up, key_down, paste
 from key import type
 from mouse import click, double_click, right_click, drag_drop, mouse_move, mouse_press, mouse_release
+from settings import DEFAULT_STABLE_QUIET_MS, DEFAULT_STABLE_SCAN_INTERVAL, DEFAULT_STABLE_SETTLE_MS
 from util.color import Color
+from util.damage_monitor import get_change_waiter
+from util.frame_diff import count_changed_pixels
 from util.highlight_rectangle import HighlightRectangle
 from util.image_search import *
+from util.image_search import _match_pattern_set, _score_pattern
 from util.ocr_search import *
+from util.poll_scheduler import PollScheduler
+from util.prefetch import get_prefetched, prefetch
 from util.save_debug_image import save_debug_image
 from util.screen_highlight import ScreenHighlight
+from util.screen_observer import ObserveEvent, RegionObserver
+from util.timing_history import get_adaptive_timeout, record_wait_time
 
 try:
     import Image
@@ -28,6 +38,7 @@ class Region(object):
         self._y = y
         self._width = width
         self._height = height
+        self._observer = None
 
     def debug(self):
         """Saves input image for debug."""
@@ -161,6 +172,15 @@ class Region(object):
         """
         wait(what, timeout, self)
 
+    def prefetch(self, targets, timeout=None):
+        """Start searching for Patterns or texts in the background, before they are waited for.
+
+        :param targets: List of String or Pattern.
+        :param timeout: Number as maximum searching time in seconds.
+        :return: Call the prefetch() method.
+        """
+        return prefetch(targets, timeout, self)
+
     def wait_vanish(self, what=None, timeout=None):
         """Wait until a Pattern disappears.
 
@@ -170,14 +190,102 @@ class Region(object):
         """
         return wait_vanish(what, timeout, self)
 
-    def exists(self, what=None, timeout=None):
+    def exists(self, what=None, timeout=None, expect_absent=False):
         """Check if Pattern or image exists.
 
         :param what: String or Pattern.
         :param timeout: Number as maximum waiting time in seconds.
+        :param expect_absent: The pattern is usually absent.
         :return: Call the exists() method.
         """
-        return exists(what, timeout, self)
+        return exists(what, timeout, self, expect_absent)
+
+    def _get_observer(self):
+        if self._observer is None:
+            self._observer = RegionObserver(self)
+        return self._observer
+
+    def on_change(self, handler, min_changed_pixels=None):
+        """Register a handler called when enough pixels of the region change.
+
+        :param handler: Function receiving an ObserveEvent.
+        :param min_changed_pixels: Minimum changed pixels. By default Settings.observe_min_changed_pixels.
+        :return: None.
+        """
+        self._get_observer().add_handler(ObserveEvent.CHANGE, handler, min_changed_pixels=min_changed_pixels)
+
+    def on_appear(self, pattern, handler):
+        """Register a handler called when a Pattern appears in the region.
+
+        :param pattern: Pattern.
+        :param handler: Function receiving an ObserveEvent.
+        :return: None.
+        """
+        self._get_observer().add_handler(ObserveEvent.APPEAR, handler, pattern=pattern)
+
+    def on_vanish(self, pattern, handler):
+        """Register a handler called when a Pattern vanishes from the region.
+
+        :param pattern: Pattern.
+        :param handler: Function receiving an ObserveEvent.
+        :return: None.
+        """
+        self._get_observer().add_handler(ObserveEvent.VANISH, handler, pattern=pattern)
+
+    def observe(self, timeout=None, background=False):
+        """Watch the region and call the registered handlers.
+
+        :param timeout: Number of seconds to observe. None observes until stop_observer() is called.
+        :param background: Observe in a background thread and return immediately.
+        :return: None.
+        """
+        if background:
+            self._get_observer().observe_in_background(timeout)
+        else:
+            self._get_observer().observe(timeout)
+
+    def stop_observer(self):
+        """Stop observing the region and remove all handlers."""
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.remove_handlers()
+
+    def which(self, pattern_set=None, timeout=None):
+        """Find which variant of a PatternSet is visible.
+
+        :param pattern_set: PatternSet.
+        :param timeout: Number as maximum waiting time in seconds.
+        :return: Call the which() method.
+        """
+        return which(pattern_set, timeout, self)
+
+    def wait_any(self, targets=None, timeout=None):
+        """Wait for the first of several Patterns, PatternSets or texts to appear.
+
+        :param targets: List of String, Pattern or PatternSet.
+        :param timeout: Number as maximum waiting time in seconds.
+        :return: Call the wait_any() method.
+        """
+        return wait_any(targets, timeout, self)
+
+    def wait_all(self, targets=None, timeout=None):
+        """Wait for several Patterns, PatternSets or texts to be visible at the same time.
+
+        :param targets: List of String, Pattern or PatternSet.
+        :param timeout: Number as maximum waiting time in seconds.
+        :return: Call the wait_all() method.
+        """
+        return wait_all(targets, timeout, self)
+
+    def wait_for_stable(self, quiet_ms=None, timeout=None, settle_ms=None):
+        """Wait until the region stops changing.
+
+        :param quiet_ms: Milliseconds without changes after a change needed to consider the region stable.
+        :param timeout: Number as maximum waiting time in seconds.
+        :param settle_ms: Milliseconds without any change needed to consider the region stable.
+        :return: Call the wait_for_stable() method.
+        """
+        return wait_for_stable(self, quiet_ms, timeout, settle_ms)
 
     def click(self, where=None, duration=None):
         """Mouse left click.
@@ -477,13 +585,15 @@ def hover(where=None, duration=0, in_region=None):
 def find(image_name, region=None):
     """Look for a single match of a Pattern or image.
 
-    :param image_name: String or Pattern.
+    :param image_name: String, Pattern or PatternSet.
     :param region: Region object in order to minimize the area.
     :return: Location.
     """
     if isinstance(image_name, Pattern):
 
-        image_found = image_search(image_name, region)
+        image_found = get_prefetched(image_name, region)
+        if image_found is None:
+            image_found = image_search(image_name, region)
         if (image_found.x != -1) & (image_found.y != -1):
             if parse_args().highlight:
                 highlight(region=region, pattern=image_name, location=image_found)
@@ -491,6 +601,15 @@ def find(image_name, region=None):
         else:
             raise FindError('Unable to find image %s' % image_name.get_filename())
 
+    elif isinstance(image_name, PatternSet):
+        variant, image_found = image_search_set(image_name, region)
+        if variant is not None:
+            if parse_args().highlight:
+                highlight(region=region, pattern=image_name.get_pattern(variant), location=image_found)
+            return image_found
+        else:
+            raise FindError('Unable to find any of the images %s' % image_name.get_filename())
+
     elif isinstance(image_name, str):
         a_match = text_search_by(image_name, True, region)
         if a_match is not None:
@@ -526,10 +645,37 @@ def find_all(what, in_region=None):
         raise ValueError(INVALID_GENERIC_INPUT)
 
 
+def _wait_for_pattern(pattern, timeout, region):
+    """Wait for a Pattern or PatternSet to appear and record how long it took, highlighting it if asked to.
+
+    :param pattern: Pattern or PatternSet.
+    :param timeout: Number as maximum waiting time in seconds.
+    :param region: Region object in order to minimize the area.
+    :return: True if found.
+    """
+    start_time = time.time()
+    if isinstance(pattern, PatternSet):
+        set_found = positive_image_set_search(pattern, timeout, region)
+        if set_found is None:
+            return False
+        variant, image_found = set_found
+        highlight_pattern = pattern.get_pattern(variant)
+    else:
+        image_found = positive_image_search(pattern, timeout, region)
+        if image_found is None:
+            return False
+        highlight_pattern = pattern
+
+    record_wait_time(pattern.get_filename(), time.time() - start_time)
+    if parse_args().highlight:
+        highlight(region=region, pattern=highlight_pattern, location=image_found)
+    return True
+
+
 def wait(image_name, timeout=None, region=None):
     """Wait for a Pattern or image to appear.
 
-    :param image_name: String or Pattern.
+    :param image_name: String, Pattern or PatternSet.
     :param timeout: Number as maximum waiting time in seconds.
     :param region: Region object in order to minimize the area.
     :return: True if found.
@@ -538,15 +684,20 @@ def wait(image_name, timeout=None, region=None):
         if timeout is None:
             timeout = Settings.auto_wait_timeout
 
-        image_found = positive_image_search(image_name, timeout, region)
-
-        if image_found is not None:
-            if parse_args().highlight:
-                highlight(region=region, pattern=image_name, location=image_found)
+        if _wait_for_pattern(image_name, timeout, region):
             return True
         else:
             raise FindError('Unable to find image %s' % image_name.get_filename())
 
+    elif isinstance(image_name, PatternSet):
+        if timeout is None:
+            timeout = Settings.auto_wait_timeout
+
+        if _wait_for_pattern(image_name, timeout, region):
+            return True
+        else:
+            raise FindError('Unable to find any of the images %s' % image_name.get_filename())
+
     elif isinstance(image_name, str):
         a_match = text_search_by(image_name, True, region)
         if a_match is not None:
@@ -558,18 +709,26 @@ def wait(image_name, timeout=None, region=None):
         raise ValueError(INVALID_GENERIC_INPUT)
 
 
-def exists(pattern, timeout=None, in_region=None):
+def exists(pattern, timeout=None, in_region=None, expect_absent=False):
     """Check if Pattern or image exists.
 
-    :param pattern: String or Pattern.
+    :param pattern: String, Pattern or PatternSet.
     :param timeout: Number as maximum waiting time in seconds.
     :param in_region: Region object in order to minimize the area.
+    :param expect_absent: The pattern is usually absent, like an optional popup or a pattern a test checks is gone.
+    With Settings.adaptive_timeouts, the timeout is shortened based on how long the pattern took to appear in
+    previous runs.
     :return: True if found.
     """
 
     if timeout is None:
         timeout = Settings.auto_wait_timeout
 
+    if isinstance(pattern, (Pattern, PatternSet)):
+        if expect_absent:
+            timeout = get_adaptive_timeout(pattern.get_filename(), timeout)
+        return _wait_for_pattern(pattern, timeout, in_region)
+
     try:
         wait(pattern, timeout, in_region)
         return True
@@ -580,7 +739,7 @@ def exists(pattern, timeout=None, in_region=None):
 def wait_vanish(pattern, timeout=None, in_region=None):
     """Wait until a Pattern disappears.
 
-    :param pattern: Pattern.
+    :param pattern: Pattern or PatternSet.
     :param timeout:  Number as maximum waiting time in seconds.
     :param in_region: Region object in order to minimize the area.
     :return: True if vanished.
@@ -589,9 +748,194 @@ def wait_vanish(pattern, timeout=None, in_region=None):
     if timeout is None:
         timeout = Settings.auto_wait_timeout
 
-    image_found = negative_image_search(pattern, timeout, in_region)
+    if isinstance(pattern, PatternSet):
+        image_found = negative_image_set_search(pattern, timeout, in_region)
+    else:
+        image_found = negative_image_search(pattern, timeout, in_region)
 
     if image_found is not None:
         return True
     else:
         raise FindError('%s did not vanish' % pattern.get_filename())
+
+
+def wait_for_stable(region=None, quiet_ms=None, timeout=None, settle_ms=None):
+    """Wait until consecutive captures of a Region or the screen Firefox is on stop changing.
+
+    Quiet time only counts once a change was seen, so the helper doesn't return before the UI started to react to
+    the input that was just sent. If nothing changes, the region is considered stable after settle_ms.
+    Changes smaller than Settings.observe_min_changed_pixels, like a blinking cursor, are ignored.
+
+    :param region: Region object in order to minimize the area.
+    :param quiet_ms: Milliseconds without changes after a change needed to consider the region stable.
+    :param timeout: Number as maximum waiting time in seconds.
+    :param settle_ms: Milliseconds without any change needed to consider the region stable.
+    :return: True if the region became stable, False if it was still changing when the timeout expired.
+    """
+    if quiet_ms is None:
+        quiet_ms = DEFAULT_STABLE_QUIET_MS
+
+    if settle_ms is None:
+        settle_ms = DEFAULT_STABLE_SETTLE_MS
+
+    if timeout is None:
+        timeout = Settings.auto_wait_timeout
+
+    if region is None:
+        region = IrisCore.get_screen_area()
+
+    scheduler = PollScheduler(timeout, min_interval=DEFAULT_STABLE_SCAN_INTERVAL,
+                              max_interval=DEFAULT_STABLE_SCAN_INTERVAL, backoff=1)
+    start_time = time.time()
+    previous = None
+    last_change = None
+
+    while scheduler.next_attempt():
+        # Frame times are used, so a frame shared by the capture service doesn't count as quiet time twice.
+        frame = IrisCore.get_frame(region)
+        if previous is not None and \
+                count_changed_pixels(previous.gray, frame.gray) >= Settings.observe_min_changed_pixels:
+            last_change = frame.time
+        previous = frame
+
+        if last_change is None:
+            if frame.time - start_time >= settle_ms / 1000.0:
+                return True
+        elif frame.time - last_change >= quiet_ms / 1000.0:
+            return True
+
+    logger.debug('Screen still changing after %s seconds.' % timeout)
+    return False
+
+
+def which(pattern_set, timeout=None, in_region=None):
+    """Find which variant of a PatternSet is visible. All variants are searched in the same capture.
+
+    :param pattern_set: PatternSet.
+    :param timeout: Number as maximum waiting time in seconds.
+    :param in_region: Region object in order to minimize the area.
+    :return: Name of the variant found or None.
+    """
+    if not isinstance(pattern_set, PatternSet):
+        raise ValueError(INVALID_GENERIC_INPUT)
+
+    if timeout is None:
+        timeout = Settings.auto_wait_timeout
+
+    set_found = positive_image_set_search(pattern_set, timeout, in_region)
+    if set_found is None:
+        return None
+    return set_found[0]
+
+
+def _match_targets(targets, region=None, stop_at_first=False, image=None):
+    """Search several targets in a single capture of a Region or full screen.
+
+    OCR only runs if a text target is reached, and at most once per capture. Text targets the first OCR pass
+    missed are searched again with the zoom search of text_search_by. Phrases have to match consecutive words.
+
+    :param targets: List of String, Pattern or PatternSet.
+    :param region: Region object in order to minimize the area.
+    :param stop_at_first: Stop at the first target found.
+    :param image: Capture of the region to search, as returned by IrisCore.get_region. By default a new capture.
+    :return: List of Match or None, in the order of the targets.
+    """
+    from match import Match
+
+    if region is None:
+        region = IrisCore.get_screen_area()
+
+    has_text = len([target for target in targets if isinstance(target, str)]) > 0
+    if image is None:
+        image = IrisCore.get_region(region, for_ocr=has_text)
+    haystack = image
+    is_uhd, uhd_factor = IrisCore.get_uhd_details()
+    if has_text and is_uhd:
+        haystack = image.resize([int(image.size[0] / uhd_factor), int(image.size[1] / uhd_factor)])
+
+    gray_haystack = np.array(haystack.convert('L'))
+    color_haystack = np.array(haystack)
+    offset_x, offset_y = (region.x, region.y) if region is not None else (0, 0)
+    text_dict = None
+    results = []
+
+    for target in targets:
+        match = None
+        if isinstance(target, Pattern):
+            scored = _score_pattern(target, gray_haystack, color_haystack)
+            if scored is not None and scored[0] >= target.similarity:
+                width, height = target.get_gray_image().size
+                match = Match(scored[1].x + offset_x, scored[1].y + offset_y, width, height, scored[0])
+        elif isinstance(target, PatternSet):
+            best = _match_pattern_set(target, haystack)
+            if best is not None:
+                score, name, location = best
+                width, height = target.get_pattern(name).get_gray_image().size
+                match = Match(location.x + offset_x, location.y + offset_y, width, height, score)
+        elif isinstance(target, str):
+            if text_dict is None:
+                # Copied, since the zoom search updates the words of the cached OCR result.
+                text_dict = copy.deepcopy(text_search_all(True, region, image)[0])
+            found = find_text_in_matches(target, text_dict)
+            if found is None:
+                found = zoom_search_text(target, text_dict, image, region)
+            if found is not None:
+                match = Match(found['x'], found['y'], found['width'], found['height'], found['precision'])
+        else:
+            raise ValueError(INVALID_GENERIC_INPUT)
+
+        results.append(match)
+        if match is not None and stop_at_first:
+            break
+    return results
+
+
+def _get_target_name(target):
+    return target if isinstance(target, str) else target.get_filename()
+
+
+def wait_any(targets, timeout=None, in_region=None):
+    """Wait for the first of several Patterns, PatternSets or texts to appear.
+
+    All targets are evaluated against the same capture on each attempt. If several are visible, the one listed
+    first wins.
+
+    :param targets: List of String, Pattern or PatternSet.
+    :param timeout: Number as maximum waiting time in seconds.
+    :param in_region: Region object in order to minimize the area.
+    :return: Pair of the target found and its Match.
+    """
+    if not isinstance(targets, (list, tuple)) or len(targets) == 0:
+        raise ValueError(INVALID_GENERIC_INPUT)
+
+    scheduler = PollScheduler(timeout, wait_for_change=get_change_waiter(in_region))
+    while scheduler.next_attempt():
+        for target, match in zip(targets, _match_targets(targets, in_region, stop_at_first=True)):
+            if match is not None:
+                if parse_args().highlight:
+                    highlight(region=match)
+                return target, match
+
+    raise FindError('Unable to find any of %s' % ', '.join([_get_target_name(target) for target in targets]))
+
+
+def wait_all(targets, timeout=None, in_region=None):
+    """Wait for several Patterns, PatternSets or texts to be visible at the same time.
+
+    :param targets: List of String, Pattern or PatternSet.
+    :param timeout: Number as maximum waiting time in seconds.
+    :param in_region: Region object in order to minimize the area.
+    :return: List of (target, Match) pairs, in the order of the targets.
+    """
+    if not isinstance(targets, (list, tuple)) or len(targets) == 0:
+        raise ValueError(INVALID_GENERIC_INPUT)
+
+    missing = targets
+    scheduler = PollScheduler(timeout, wait_for_change=get_change_waiter(in_region))
+    while scheduler.next_attempt():
+        matches = _match_targets(targets, in_region)
+        missing = [target for target, match in zip(targets, matches) if match is None]
+        if len(missing) == 0:
+            return zip(targets, matches)
+
+    raise FindError('Unable to find %s' % ', '.join([_get_target_name(target) for target in missing]))
@@ -4,13 +4,20 @@
 
 from region import Region
 from util.core_helper import IrisCore
+from util.display_geometry import get_display_geometry
 from util.image_search import SCREEN_WIDTH, SCREEN_HEIGHT
 
 
-# todo Refactor this
-class Screen(object):
+class Screen(Region):
+    """Region covering one monitor of the display."""
+
     def __init__(self, screen_id=0):
+        monitors = get_display_geometry().monitors
+        if screen_id < 0 or screen_id >= len(monitors):
+            raise ValueError('Invalid screen %s, %s screen(s) available.' % (screen_id, len(monitors)))
         self.id = screen_id
+        monitor = monitors[screen_id]
+        Region.__init__(self, monitor.x, monitor.y, monitor.width, monitor.height)
 
     @staticmethod
     def capture(*args):
@@ -27,14 +34,16 @@ class Screen(object):
 
     @staticmethod
     def get_number_screens():
-        return 1
+        return len(get_display_geometry().monitors)
 
-    @staticmethod
-    def get_bounds():
-        dimensions = (SCREEN_WIDTH, SCREEN_HEIGHT)
+    def get_bounds(self):
+        dimensions = (self.width, self.height)
         return dimensions
 
 
 def get_screen():
-    """Returns full screen Image."""
+    """Returns the Region of the screen Firefox runs on, or of the full display."""
+    screen_area = IrisCore.get_screen_area()
+    if screen_area is not None:
+        return Region(screen_area.x, screen_area.y, screen_area.width, screen_area.height)
     return Region(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT)
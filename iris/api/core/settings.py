@@ -2,6 +2,8 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this file,
 # You can obtain one at http://mozilla.org/MPL/2.0/.
 
+import multiprocessing
+
 from platform import Platform
 from util.color import Color
 from util.core_helper import get_os, get_os_version
@@ -26,6 +28,28 @@ DEFAULT_FX_DELAY = 0.5
 DEFAULT_UI_DELAY = 1
 DEFAULT_UI_DELAY_LONG = 2.5
 DEFAULT_SYSTEM_DELAY = 5
+DEFAULT_STABLE_QUIET_MS = 300
+DEFAULT_STABLE_SCAN_INTERVAL = 0.05
+DEFAULT_STABLE_SETTLE_MS = 500
+DEFAULT_POLL_MIN_INTERVAL = 0.05
+DEFAULT_POLL_BACKOFF = 1.5
+DEFAULT_CAPTURE_RATE = parse_args().capture_rate
+DEFAULT_ADAPTIVE_TIMEOUTS = parse_args().adaptive_timeouts
+DEFAULT_CAPTURE_BUFFER_SIZE = 4
+DEFAULT_CAPTURE_WAIT_TIMEOUT = 2
+DEFAULT_SEARCH_STRATEGY = parse_args().search_strategy
+DEFAULT_SEARCH_WORKERS = parse_args().search_workers or max(1, min(4, multiprocessing.cpu_count() - 1))
+DEFAULT_OCR_WORKERS = parse_args().ocr_workers
+
+AUTO_CAPTURE = 'auto'
+MSS_CAPTURE = 'mss'
+PYAUTOGUI_CAPTURE = 'pyautogui'
+DEFAULT_CAPTURE_BACKEND = parse_args().capture_backend
+DEFAULT_SCREEN = parse_args().screen
+
+INLINE_SEARCH = 'inline'
+THREAD_SEARCH = 'thread'
+PROCESS_SEARCH = 'process'
 
 BETA = 'beta'
 RELEASE = 'release'
@@ -55,6 +79,13 @@ class _IrisSettings(object):
         self._ui_delay = DEFAULT_UI_DELAY
         self._ui_delay_long = DEFAULT_UI_DELAY_LONG
         self._system_delay = DEFAULT_SYSTEM_DELAY
+        self._search_strategy = DEFAULT_SEARCH_STRATEGY
+        self._search_workers = DEFAULT_SEARCH_WORKERS
+        self._ocr_workers = DEFAULT_OCR_WORKERS
+        self._capture_rate = DEFAULT_CAPTURE_RATE
+        self._capture_backend = DEFAULT_CAPTURE_BACKEND
+        self._screen = DEFAULT_SCREEN
+        self._adaptive_timeouts = DEFAULT_ADAPTIVE_TIMEOUTS
         self._channels = [BETA, RELEASE, NIGHTLY, ESR]
         self._locales = ['en-US', 'zh-CN', 'es-ES', 'de', 'fr', 'ru', 'ar', 'ko', 'pt-PT', 'vi', 'pl', 'tr', 'ro', 'ja']
 
@@ -247,6 +278,83 @@ class _IrisSettings(object):
         """Setter for the highlight_thickness property."""
         self._highlight_thickness = value
 
+    @property
+    def search_strategy(self):
+        """Getter for the search_strategy property."""
+        return self._search_strategy
+
+    @search_strategy.setter
+    def search_strategy(self, value):
+        """Setter for the search_strategy property. Takes effect the next time the search pool starts."""
+        if value in [INLINE_SEARCH, THREAD_SEARCH, PROCESS_SEARCH]:
+            self._search_strategy = value
+
+    @property
+    def search_workers(self):
+        """Getter for the search_workers property."""
+        return self._search_workers
+
+    @search_workers.setter
+    def search_workers(self, value):
+        """Setter for the search_workers property. Takes effect the next time the search pool starts."""
+        if value < 1:
+            self._search_workers = 1
+        else:
+            self._search_workers = value
+
+    @property
+    def ocr_workers(self):
+        """Getter for the ocr_workers property."""
+        return self._ocr_workers
+
+    @ocr_workers.setter
+    def ocr_workers(self, value):
+        """Setter for the ocr_workers property. Less than 2 workers disables tiled OCR. Takes effect the next time
+        the OCR pool starts."""
+        self._ocr_workers = max(0, value)
+
+    @property
+    def capture_rate(self):
+        """Getter for the capture_rate property."""
+        return self._capture_rate
+
+    @capture_rate.setter
+    def capture_rate(self, value):
+        """Setter for the capture_rate property. Takes effect the next time the capture service starts."""
+        self._capture_rate = max(0, value)
+
+    @property
+    def capture_backend(self):
+        """Getter for the capture_backend property."""
+        return self._capture_backend
+
+    @capture_backend.setter
+    def capture_backend(self, value):
+        """Setter for the capture_backend property."""
+        if value in [AUTO_CAPTURE, MSS_CAPTURE, PYAUTOGUI_CAPTURE]:
+            self._capture_backend = value
+
+    @property
+    def screen(self):
+        """Getter for the screen property."""
+        return self._screen
+
+    @screen.setter
+    def screen(self, value):
+        """Setter for the screen property. None searches the whole display."""
+        if value is None or value >= 0:
+            self._screen = value
+
+    @property
+    def adaptive_timeouts(self):
+        """Getter for the adaptive_timeouts property."""
+        return self._adaptive_timeouts
+
+    @adaptive_timeouts.setter
+    def adaptive_timeouts(self, value):
+        """Setter for the adaptive_timeouts property."""
+        self._adaptive_timeouts = value
+
     @staticmethod
     def get_os():
         """Get the type of the operating system your script is running on."""
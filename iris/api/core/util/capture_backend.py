@@ -0,0 +1,165 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import logging
+import os
+import threading
+import time
+
+import cv2
+import mss
+import numpy as np
+import pyautogui
+
+from iris.api.core.platform import Platform
+from iris.api.core.settings import Settings, AUTO_CAPTURE, MSS_CAPTURE, PYAUTOGUI_CAPTURE
+
+logger = logging.getLogger(__name__)
+
+
+class CaptureStats(object):
+    """Latency of the grabs made by a capture backend."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total_time = 0
+        self.max_time = 0
+        self.last_time = 0
+
+    def add(self, seconds):
+        with self._lock:
+            self.count += 1
+            self.total_time += seconds
+            self.max_time = max(self.max_time, seconds)
+            self.last_time = seconds
+
+    def get_average_time(self):
+        return self.total_time / self.count if self.count > 0 else 0
+
+    def __repr__(self):
+        return '%s grabs, average %.1f ms, max %.1f ms' % (self.count, 1000 * self.get_average_time(),
+                                                           1000 * self.max_time)
+
+
+class CaptureBackend(object):
+    """Grabs rectangles of the screen, in physical pixels, as RGB numpy arrays."""
+
+    name = None
+
+    def __init__(self):
+        self.stats = CaptureStats()
+
+    def grab(self, x, y, width, height):
+        """Grabs a rectangle of the screen.
+
+        :param x: Left coordinate in physical pixels.
+        :param y: Top coordinate in physical pixels.
+        :param width: Width in physical pixels.
+        :param height: Height in physical pixels.
+        :return: RGB numpy array of shape (height, width, 3).
+        """
+        start = time.time()
+        array = self._grab(int(x), int(y), int(width), int(height))
+        self.stats.add(time.time() - start)
+        return array
+
+    def _grab(self, x, y, width, height):
+        raise NotImplementedError
+
+    def get_screen_size(self):
+        """Returns the size of the screen in physical pixels."""
+        return pyautogui.screenshot().size
+
+    def get_monitors(self):
+        """Returns the list of (x, y, width, height) of each monitor in physical pixels, None if unknown."""
+        return None
+
+
+class PyAutoGuiBackend(CaptureBackend):
+    """Screenshots through pyautogui, which writes and reads back an image file on Linux."""
+
+    name = PYAUTOGUI_CAPTURE
+
+    def _grab(self, x, y, width, height):
+        return np.array(pyautogui.screenshot(region=(x, y, width, height)).convert('RGB'))
+
+
+class MssBackend(CaptureBackend):
+    """In-memory screenshots through mss (XGetImage on Linux).
+
+    On Linux, the X connection is opened once per process, since it can't be inherited by child processes, and
+    shared by its threads. On Windows, the device contexts of mss are bound to a thread, so every grab opens its own.
+    The BGRA pixels of mss are converted straight into the returned array.
+    """
+
+    name = MSS_CAPTURE
+
+    def __init__(self):
+        super(MssBackend, self).__init__()
+        self._lock = threading.Lock()
+        self._sct = None
+        self._pid = None
+
+    def _grab(self, x, y, width, height):
+        monitor = {'left': x, 'top': y, 'width': width, 'height': height}
+        if Platform.OS_NAME == 'win':
+            with mss.mss() as sct:
+                shot = sct.grab(monitor)
+        else:
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._sct = mss.mss()
+                    self._pid = os.getpid()
+                shot = self._sct.grab(monitor)
+        bgra = np.frombuffer(shot.raw, np.uint8).reshape(shot.size[1], shot.size[0], 4)
+        return cv2.cvtColor(bgra, cv2.COLOR_BGRA2RGB)
+
+    def get_screen_size(self):
+        if Platform.OS_NAME == 'mac':
+            # Monitors are reported in points, not pixels, on Retina displays.
+            return super(MssBackend, self).get_screen_size()
+        with mss.mss() as sct:
+            monitor = sct.monitors[0]
+            return monitor['width'], monitor['height']
+
+    def get_monitors(self):
+        if Platform.OS_NAME == 'mac':
+            return None
+        with mss.mss() as sct:
+            # The first monitor of mss is the bounding box of all the others. Coordinates are made relative to it,
+            # like screen grabs.
+            origin = sct.monitors[0]
+            return [(monitor['left'] - origin['left'], monitor['top'] - origin['top'], monitor['width'],
+                     monitor['height']) for monitor in sct.monitors[1:]]
+
+
+_BACKENDS = {MSS_CAPTURE: MssBackend, PYAUTOGUI_CAPTURE: PyAutoGuiBackend}
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def _get_default_backend_name():
+    # pyautogui shells out to scrot on Linux, and already relied on mss on Windows 7.
+    if Platform.OS_NAME == 'linux' or (Platform.OS_NAME == 'win' and Platform.OS_VERSION == '6.1'):
+        return MSS_CAPTURE
+    return PYAUTOGUI_CAPTURE
+
+
+def get_capture_backend():
+    """Returns the capture backend selected by Settings.capture_backend, creating it on first use."""
+    global _backend
+    name = Settings.capture_backend
+    if name == AUTO_CAPTURE:
+        name = _get_default_backend_name()
+    with _backend_lock:
+        if _backend is None or _backend.name != name:
+            _backend = _BACKENDS[name]()
+            logger.debug('Using the %s capture backend.' % name)
+        return _backend
+
+
+def get_capture_stats():
+    """Returns the CaptureStats of the current capture backend."""
+    return get_capture_backend().stats
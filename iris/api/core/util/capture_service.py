@@ -0,0 +1,148 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import collections
+import logging
+import threading
+import time
+
+import numpy as np
+
+from core_helper import IrisCore
+from frame import Frame
+from frame_diff import to_gray_array
+from input_events import get_last_input_time
+from iris.api.core.settings import Settings, DEFAULT_CAPTURE_BUFFER_SIZE, DEFAULT_CAPTURE_WAIT_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+
+class CaptureService(object):
+    """Grabs the full screen in a background thread into a ring buffer of frames.
+
+    Frames are grabbed at Settings.capture_rate frames per second, or right away when a consumer asks for a
+    frame newer than the last one. Consumers share the newest frame while it is fresh enough, so searches close
+    together don't each grab the screen. The grayscale version of each frame is computed once, in the capture
+    thread.
+    """
+
+    def __init__(self, rate, buffer_size=DEFAULT_CAPTURE_BUFFER_SIZE):
+        self._rate = float(rate)
+        self._frames = collections.deque(maxlen=buffer_size)
+        self._condition = threading.Condition()
+        self._wake = threading.Event()
+        self._grab_start = None
+        self._stopped = False
+        self._thread = None
+
+    def start(self):
+        if self.is_running():
+            return
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+        logger.debug('Capture service started at %s frames per second.' % self._rate)
+
+    def stop(self):
+        self._stopped = True
+        self._wake.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+        with self._condition:
+            self._frames.clear()
+            self._condition.notify_all()
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def get_frames(self):
+        """Returns the buffered frames, oldest first."""
+        with self._condition:
+            return list(self._frames)
+
+    def get_frame(self, min_time=None, timeout=DEFAULT_CAPTURE_WAIT_TIMEOUT):
+        """Returns the newest frame whose capture started at or after min_time.
+
+        :param min_time: Oldest acceptable capture time. Defaults to one capture interval ago, but never before the
+        last input, so the frame shows its effect.
+        :param timeout: Maximum time to wait for such a frame, in seconds.
+        :return: Frame or None if the service did not deliver one in time.
+        """
+        if min_time is None:
+            min_time = max(time.time() - 1 / self._rate, get_last_input_time())
+        end_time = time.time() + timeout
+        with self._condition:
+            while len(self._frames) == 0 or self._frames[-1].time < min_time:
+                remaining = end_time - time.time()
+                if remaining <= 0 or self._stopped:
+                    return None
+                if self._grab_start is None or self._grab_start < min_time:
+                    # The grab in progress, if any, started too early.
+                    self._wake.set()
+                self._condition.wait(remaining)
+            return self._frames[-1]
+
+    def _run(self):
+        interval = 1 / self._rate
+        while not self._stopped:
+            # Cleared before grabbing, so a consumer waking the thread during the grab gets another one.
+            self._wake.clear()
+            start = time.time()
+            self._grab_start = start
+            try:
+                array = np.array(IrisCore.grab_screen())
+                frame = Frame(array, start, to_gray_array(array))
+            except Exception as e:
+                logger.error('Screen capture failed: %s' % e)
+                frame = None
+
+            with self._condition:
+                if frame is not None:
+                    self._frames.append(frame)
+                self._grab_start = None
+                self._condition.notify_all()
+
+            self._wake.wait(max(0, interval - (time.time() - start)))
+
+
+_service = None
+
+
+def start_capture_service(rate=None):
+    """Starts the capture service and routes every IrisCore.get_region call through it.
+
+    :param rate: Frames per second. Defaults to Settings.capture_rate.
+    :return: None.
+    """
+    global _service
+    if rate is None:
+        rate = Settings.capture_rate
+    if rate <= 0:
+        return
+    stop_capture_service()
+    _service = CaptureService(rate)
+    _service.start()
+    IrisCore.set_capture_service(_service)
+
+
+def get_newest_frame():
+    """Returns the newest full screen frame of the capture service, without waiting for a new one.
+
+    :return: Frame at native resolution, None if the service is not running or has no frame yet.
+    """
+    service = _service
+    if service is None or not service.is_running():
+        return None
+    frames = service.get_frames()
+    return frames[-1] if len(frames) else None
+
+
+def stop_capture_service():
+    global _service
+    if _service is not None:
+        IrisCore.set_capture_service(None)
+        _service.stop()
+        _service = None
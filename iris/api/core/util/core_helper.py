@@ -5,30 +5,34 @@
 import datetime
 import inspect
 import logging
-import multiprocessing
 import os
 import subprocess
 import tempfile
+import threading
+import time
 
+import cv2
 import git
-import mss
-import numpy
 import pyautogui
 from PIL import Image
 
+from display_geometry import get_display_geometry
+from frame import Frame
 from iris.api.core.errors import APIHelperError
+from input_events import notify_input
 from iris.api.core.platform import Platform
 from parse_args import parse_args
 from version_parser import check_version
 
 SCREEN_WIDTH, SCREEN_HEIGHT = pyautogui.size()
-SCREENSHOT_WIDTH, SCREENSHOT_HEIGHT = pyautogui.screenshot().size
 
 SUCCESS_LEVEL_NUM = 35
 logging.addLevelName(SUCCESS_LEVEL_NUM, 'SUCCESS')
 
 _run_id = datetime.datetime.utcnow().strftime('%Y%m%d%H%M%S')
 _current_module = os.path.join(os.path.expanduser('~'), 'temp', 'test')
+_thread_context = threading.local()
+_capture_service = None
 
 
 def success(self, message, *args, **kws):
@@ -47,8 +51,6 @@ logger = logging.getLogger(__name__)
 INVALID_GENERIC_INPUT = 'Invalid input'
 INVALID_NUMERIC_INPUT = 'Expected numeric value'
 
-MIN_CPU_FOR_MULTIPROCESSING = 4
-
 
 def get_os():
     """Get the type of the operating system your script is running on."""
@@ -81,10 +83,6 @@ def get_platform():
     return Platform.PROCESSOR
 
 
-def is_multiprocessing_enabled():
-    return multiprocessing.cpu_count() >= MIN_CPU_FOR_MULTIPROCESSING and get_os() != 'win'
-
-
 def scroll(clicks):
     """Performs a scroll of the mouse scroll wheel.
 
@@ -92,6 +90,7 @@ def scroll(clicks):
     :return: None.
     """
     pyautogui.scroll(clicks)
+    notify_input()
 
 
 def filter_list(original_list, exclude_list):
@@ -195,9 +194,8 @@ class IrisCore(object):
 
     @staticmethod
     def get_uhd_details():
-        uhd_factor = SCREENSHOT_WIDTH / SCREEN_WIDTH
-        is_uhd = True if uhd_factor > 1 else False
-        return is_uhd, uhd_factor
+        geometry = get_display_geometry()
+        return geometry.is_uhd, geometry.uhd_factor
 
     @staticmethod
     def is_ocr_text(input_text):
@@ -207,6 +205,88 @@ class IrisCore(object):
             is_ocr_string = False
         return is_ocr_string
 
+    @staticmethod
+    def get_screen_area():
+        """Returns the area of the monitor searches default to, set by Settings.screen.
+
+        :return: ScreenArea, or None to search the whole display.
+        """
+        # Imported here since settings depend on this module.
+        from iris.api.core.settings import Settings
+
+        if Settings.screen is None:
+            return None
+        monitors = get_display_geometry().monitors
+        if len(monitors) < 2:
+            return None
+        return monitors[min(Settings.screen, len(monitors) - 1)]
+
+    @staticmethod
+    def set_capture_service(service):
+        """Sets the CaptureService that screen captures are taken from, or None to grab the screen directly."""
+        global _capture_service
+        _capture_service = service
+
+    @staticmethod
+    def grab_screen():
+        """Grabs the full screen at its native resolution.
+
+        :return: RGB numpy array.
+        """
+        # Imported here since the capture backend depends on settings, which depend on this module.
+        from capture_backend import get_capture_backend
+        geometry = get_display_geometry()
+        return get_capture_backend().grab(0, 0, geometry.screenshot_width, geometry.screenshot_height)
+
+    @staticmethod
+    def _get_service_frame(region=None, for_ocr=False):
+        """Crops a region out of the newest frame of the capture service.
+
+        :return: Frame or None if the capture service is not running.
+        """
+        if _capture_service is None or not _capture_service.is_running():
+            return None
+        frame = _capture_service.get_frame()
+        if frame is None:
+            return None
+        return IrisCore.crop_screen_frame(frame, region, for_ocr)
+
+    @staticmethod
+    def crop_screen_frame(frame, region=None, for_ocr=False):
+        """Crops a region out of a full screen frame at native resolution, as get_frame would capture it.
+
+        :param Frame frame: Full screen Frame.
+        :param Region || None region: Region param
+        :param for_ocr: boolean param for ocr processing
+        :return: Frame
+        """
+        is_uhd, uhd_factor = IrisCore.get_uhd_details()
+        factor = uhd_factor if is_uhd else 1
+        if region is not None:
+            frame = frame.crop(int(factor * region.x), int(factor * region.y), int(factor * region.width),
+                               int(factor * region.height))
+            size = (region.width, region.height)
+        else:
+            size = (SCREEN_WIDTH, SCREEN_HEIGHT)
+
+        if is_uhd and not for_ocr:
+            frame = frame.resize(size[0], size[1])
+        return frame
+
+    @staticmethod
+    def get_frame(region=None, for_ocr=False):
+        """Captures a region or the full screen as a Frame.
+
+        :param Region || None region: Region param
+        :param for_ocr: boolean param for ocr processing
+        :return: Frame
+        """
+        frame = IrisCore._get_service_frame(region, for_ocr)
+        if frame is not None:
+            return frame
+        start = time.time()
+        return Frame(IrisCore._grab_region(region, for_ocr), start)
+
     @staticmethod
     def get_region(region=None, for_ocr=False):
         """Grabs image from region or full screen.
@@ -215,41 +295,39 @@ class IrisCore(object):
         :param for_ocr: boolean param for ocr processing
         :return: Image
         """
+        frame = IrisCore._get_service_frame(region, for_ocr)
+        if frame is not None:
+            return frame.get_image()
+        return Image.fromarray(IrisCore._grab_region(region, for_ocr))
+
+    @staticmethod
+    def _grab_region(region=None, for_ocr=False):
+        """Grabs a region or the full screen through the capture backend.
+
+        :return: RGB numpy array.
+        """
+        from capture_backend import get_capture_backend
+
         is_uhd, uhd_factor = IrisCore.get_uhd_details()
+        factor = uhd_factor if is_uhd else 1
 
         if region is not None:
-            r_x = uhd_factor * region.x if is_uhd else region.x
-            r_y = uhd_factor * region.y if is_uhd else region.y
-            r_w = uhd_factor * region.width if is_uhd else region.width
-            r_h = uhd_factor * region.height if is_uhd else region.height
-
-            if get_os_version() == 'win7':
-                with mss.mss() as sct:
-                    screen_region = {'top': region.y, 'left': region.x, 'width': region.width, 'height': region.height}
-                    image = numpy.array(sct.grab(screen_region))
-                    grabbed_area = Image.fromarray(image, mode='RGBA')
-            else:
-                grabbed_area = pyautogui.screenshot(region=(r_x, r_y, r_w, r_h))
-
-            if is_uhd and not for_ocr:
-                grabbed_area = grabbed_area.resize([region.width, region.height])
-            return grabbed_area
+            grabbed_area = get_capture_backend().grab(factor * region.x, factor * region.y,
+                                                      factor * region.width, factor * region.height)
+            size = (region.width, region.height)
         else:
-            if get_os_version() == 'win7':
-                with mss.mss() as sct:
-                    screen_region = {'top': 0, 'left': 0, 'width': SCREENSHOT_WIDTH, 'height': SCREENSHOT_HEIGHT}
-                    image = numpy.array(sct.grab(screen_region))
-                    grabbed_area = Image.fromarray(image, mode='RGBA')
-            else:
-                grabbed_area = pyautogui.screenshot(region=(0, 0, SCREENSHOT_WIDTH, SCREENSHOT_HEIGHT))
+            grabbed_area = IrisCore.grab_screen()
+            size = (SCREEN_WIDTH, SCREEN_HEIGHT)
 
         if is_uhd and not for_ocr:
-            return grabbed_area.resize([SCREEN_WIDTH, SCREEN_HEIGHT])
-        else:
-            return grabbed_area
+            return cv2.resize(grabbed_area, size)
+        return grabbed_area
 
     @staticmethod
     def get_test_name():
+        override = getattr(_thread_context, 'test_name', None)
+        if override is not None:
+            return override
         white_list = ['general.py']
         all_stack = inspect.stack()
         for stack in all_stack:
@@ -261,6 +339,11 @@ class IrisCore(object):
                 return method_name
         return
 
+    @staticmethod
+    def set_test_name(test_name):
+        """Sets the test name reported to the current thread, for code that runs outside of the test's stack."""
+        _thread_context.test_name = test_name
+
     @staticmethod
     def verify_test_compat(test, app):
         not_excluded = True
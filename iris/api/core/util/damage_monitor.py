@@ -0,0 +1,220 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import collections
+import logging
+import select
+import threading
+import time
+
+try:
+    from Xlib import display as xdisplay
+    from Xlib.ext import damage
+except ImportError:
+    xdisplay = None
+    damage = None
+
+from core_helper import IrisCore, get_os
+from iris.api.core.platform import Platform
+
+logger = logging.getLogger(__name__)
+
+DAMAGE_HISTORY_SIZE = 1024
+EVENT_POLL_INTERVAL = 0.1
+
+DamageArea = collections.namedtuple('DamageArea', ['x', 'y', 'width', 'height', 'time'])
+
+
+def _intersects(area, region):
+    if region is None:
+        return True
+    return (area.x < region.x + region.width and region.x < area.x + area.width and
+            area.y < region.y + region.height and region.y < area.y + area.height)
+
+
+class DamageMonitor(object):
+    """Listens to X11 Damage notifications for the root window.
+
+    Every changed rectangle is kept, with the time it was reported, so waits can sleep until pixels of their
+    region change and searches can be limited to the areas that changed.
+    """
+
+    def __init__(self):
+        self._areas = collections.deque(maxlen=DAMAGE_HISTORY_SIZE)
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = None
+        self._display = None
+        self._damage = None
+
+    @staticmethod
+    def is_supported():
+        """Checks if Damage notifications can be used on this system."""
+        if get_os() != Platform.LINUX or xdisplay is None:
+            return False
+        try:
+            test_display = xdisplay.Display()
+            supported = test_display.has_extension('DAMAGE')
+            test_display.close()
+            return supported
+        except Exception:
+            return False
+
+    def start(self):
+        if self.is_running():
+            return
+        self._display = xdisplay.Display()
+        self._display.damage_query_version()
+        root = self._display.screen().root
+        self._damage = root.damage_create(damage.DamageReportRawRectangles)
+        self._display.flush()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+        logger.debug('Listening to X11 Damage notifications.')
+
+    def stop(self):
+        self._stopped = True
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+        if self._display is not None:
+            try:
+                self._display.damage_destroy(self._damage)
+                self._display.close()
+            except Exception:
+                pass
+            self._display = None
+        with self._condition:
+            self._condition.notify_all()
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def get_damage(self, region=None, since=0):
+        """Returns the damaged areas intersecting a region, reported after a given time.
+
+        :param region: Region object, None for the full screen.
+        :param since: Time as returned by time.time().
+        :return: List of DamageArea in screen coordinates, None if the monitor stopped or older areas were already
+        dropped from the history.
+        """
+        with self._condition:
+            if self._stopped:
+                return None
+            if len(self._areas) == self._areas.maxlen and self._areas[0].time > since:
+                return None
+            return [area for area in self._areas if area.time >= since and _intersects(area, region)]
+
+    def wait_for_damage(self, region=None, since=0, timeout=0):
+        """Waits until pixels of a region changed after a given time.
+
+        :param region: Region object, None for the full screen.
+        :param since: Time as returned by time.time().
+        :param timeout: Maximum waiting time in seconds.
+        :return: List of DamageArea, empty if nothing changed before the timeout. None if the monitor stopped.
+        """
+        end_time = time.time() + timeout
+        with self._condition:
+            while True:
+                if self._stopped:
+                    return None
+                areas = [area for area in self._areas if area.time >= since and _intersects(area, region)]
+                remaining = end_time - time.time()
+                if len(areas) > 0 or remaining <= 0:
+                    return areas
+                self._condition.wait(remaining)
+
+    def _run(self):
+        is_uhd, uhd_factor = IrisCore.get_uhd_details()
+        scale = uhd_factor if is_uhd else 1
+        damage_event = self._display.extension_event.DamageNotify
+
+        while not self._stopped:
+            try:
+                readable = select.select([self._display], [], [], EVENT_POLL_INTERVAL)[0]
+                if len(readable) == 0 and self._display.pending_events() == 0:
+                    continue
+                areas = []
+                while self._display.pending_events() > 0:
+                    event = self._display.next_event()
+                    if event.type == damage_event:
+                        now = time.time()
+                        areas.append(DamageArea(event.area.x / scale, event.area.y / scale,
+                                                max(1, event.area.width / scale),
+                                                max(1, event.area.height / scale), now))
+            except Exception as e:
+                logger.error('Stopped listening to X11 Damage notifications: %s' % e)
+                break
+
+            if len(areas) > 0:
+                with self._condition:
+                    self._areas.extend(areas)
+                    self._condition.notify_all()
+
+        self._stopped = True
+        with self._condition:
+            self._condition.notify_all()
+
+
+_monitor = None
+
+
+def start_damage_monitor():
+    """Starts listening to Damage notifications, if supported by the system."""
+    global _monitor
+    if _monitor is not None and _monitor.is_running():
+        return
+    if not DamageMonitor.is_supported():
+        logger.warning('X11 Damage notifications are not available, falling back to polling.')
+        return
+    _monitor = DamageMonitor()
+    _monitor.start()
+
+
+def stop_damage_monitor():
+    global _monitor
+    if _monitor is not None:
+        _monitor.stop()
+        _monitor = None
+
+
+def get_change_waiter(region=None):
+    """Returns a function that waits for pixels of a region to change, for use with PollScheduler.
+
+    The function takes the time the last attempt started and a timeout, and returns the list of DamageArea
+    reported since then, empty if nothing changed, or None if changes can no longer be tracked.
+
+    :param region: Region object, None for the full screen.
+    :return: Function or None if Damage notifications are not available.
+    """
+    monitor = _monitor
+    if monitor is None or not monitor.is_running():
+        return None
+
+    def wait_for_change(since, timeout):
+        return monitor.wait_for_damage(region, since, timeout)
+
+    return wait_for_change
+
+
+def get_damage_getter(region=None):
+    """Returns a function that lists the areas of a region changed since a given time, for use with SearchState.
+
+    Areas are reported a little after the pixels change, so the function has to be called after the capture it is
+    used for. Changes reported later are listed by the next call.
+
+    :param region: Region object, None for the full screen.
+    :return: Function taking a time as returned by time.time() and returning the list of DamageArea reported since
+    then, or None if changes can't be listed. None if Damage notifications are not available.
+    """
+    monitor = _monitor
+    if monitor is None or not monitor.is_running():
+        return None
+
+    def get_changed_areas(since):
+        return monitor.get_damage(region, since)
+
+    return get_changed_areas
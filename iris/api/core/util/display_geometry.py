@@ -0,0 +1,75 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import collections
+import logging
+import os
+import threading
+
+import pyautogui
+
+logger = logging.getLogger(__name__)
+
+_geometries = {}
+_lock = threading.Lock()
+
+ScreenArea = collections.namedtuple('ScreenArea', ['x', 'y', 'width', 'height'])
+
+
+class DisplayGeometry(object):
+    """Size of the display in logical (mouse) coordinates and in physical (screenshot) pixels, and its monitors."""
+
+    def __init__(self, screen_width, screen_height, screenshot_width, screenshot_height, monitors=None):
+        """
+        :param monitors: List of (x, y, width, height) of each monitor, in physical pixels. By default a single
+        monitor covering the screen.
+        """
+        self.screen_width = screen_width
+        self.screen_height = screen_height
+        self.screenshot_width = screenshot_width
+        self.screenshot_height = screenshot_height
+        # Fractional scaling, e.g. 1.5, is common on Windows and Linux.
+        self.uhd_factor = float(screenshot_width) / screen_width
+        self.is_uhd = self.uhd_factor > 1
+        self.is_high_def = (screenshot_width, screenshot_height) != (screen_width, screen_height)
+        if not monitors:
+            monitors = [(0, 0, screenshot_width, screenshot_height)]
+        #: Monitors in logical coordinates.
+        self.monitors = [ScreenArea(*[int(round(value / self.uhd_factor)) for value in monitor])
+                         for monitor in monitors]
+
+    def __repr__(self):
+        return '%sx%s (%sx%s pixels), %s monitor(s)' % (self.screen_width, self.screen_height,
+                                                        self.screenshot_width, self.screenshot_height,
+                                                        len(self.monitors))
+
+
+def _get_display_name():
+    return os.environ.get('DISPLAY', '')
+
+
+def get_display_geometry():
+    """Returns the geometry of the current display, probed through the capture backend on first use.
+
+    The result is cached by display name, and inherited by worker processes started after the first use.
+
+    :return: DisplayGeometry object.
+    """
+    name = _get_display_name()
+    geometry = _geometries.get(name)
+    if geometry is not None:
+        return geometry
+
+    # Imported here since the capture backend depends on settings, which depend on modules importing this one.
+    from capture_backend import get_capture_backend
+
+    with _lock:
+        if name not in _geometries:
+            backend = get_capture_backend()
+            screen_width, screen_height = pyautogui.size()
+            screenshot_width, screenshot_height = backend.get_screen_size()
+            _geometries[name] = DisplayGeometry(screen_width, screen_height, screenshot_width, screenshot_height,
+                                                backend.get_monitors())
+            logger.debug('Display geometry: %s' % _geometries[name])
+        return _geometries[name]
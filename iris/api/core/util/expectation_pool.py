@@ -0,0 +1,105 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import logging
+import threading
+import time
+from multiprocessing.pool import ThreadPool
+
+from core_helper import IrisCore
+from damage_monitor import get_change_waiter
+from iris.api.core.settings import Settings
+from poll_scheduler import PollScheduler
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class Expectation(object):
+    """A Pattern, PatternSet or text expected to show up within a time window, checked in the background."""
+
+    def __init__(self, what, message, within=None, region=None, stack=None):
+        """
+        :param what: String, Pattern or PatternSet.
+        :param message: Text message of the assertion.
+        :param within: Number of seconds the target has to show up in. Defaults to Settings.auto_wait_timeout.
+        :param region: Region object in order to minimize the area.
+        :param stack: Formatted stack trace of the code that made the expectation, reported on failure.
+        """
+        if within is None:
+            within = Settings.auto_wait_timeout
+        self.what = what
+        self.message = message
+        self.region = region
+        self.stack = stack
+        self.deadline = time.time() + within
+        self.match = None
+        self.error = None
+        self._test_name = IrisCore.get_test_name()
+        self._done = threading.Event()
+        # The window starts now, so the first frame is captured right away, before input moves on.
+        self._first_image = self._capture()
+
+    def _capture(self):
+        return IrisCore.get_region(self.region, for_ocr=isinstance(self.what, str))
+
+    def check(self):
+        """Checks every frame captured until the target shows up or the window ends. Runs on the pool."""
+        # Imported here since region depends on this module through asserts.
+        from iris.api.core.region import _match_targets
+
+        IrisCore.set_test_name(self._test_name)
+        try:
+            image = self._first_image
+            self._first_image = None
+            scheduler = PollScheduler(max(0, self.deadline - time.time()),
+                                      wait_for_change=get_change_waiter(self.region))
+            while scheduler.next_attempt():
+                if image is None:
+                    image = self._capture()
+                self.match = _match_targets([self.what], self.region, image=image)[0]
+                image = None
+                if self.match is not None:
+                    break
+        except Exception as e:
+            self.error = e
+        finally:
+            IrisCore.set_test_name(None)
+            self._done.set()
+
+    def is_done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """Waits for the check to finish.
+
+        :param timeout: Number as maximum waiting time in seconds, None to wait until the window ends.
+        :return: True if the target was found.
+        """
+        self._done.wait(timeout)
+        return self.match is not None
+
+
+def submit_expectation(what, message, within=None, region=None, stack=None):
+    """Starts checking an expectation on the background pool.
+
+    :return: Expectation object.
+    """
+    global _pool
+    expectation = Expectation(what, message, within, region, stack)
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPool(Settings.search_workers)
+        _pool.apply_async(expectation.check)
+    return expectation
+
+
+def shutdown_expectation_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.terminate()
+            _pool = None
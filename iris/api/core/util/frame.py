@@ -0,0 +1,69 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import time
+
+import cv2
+import numpy as np
+
+try:
+    import Image
+except ImportError:
+    from PIL import Image
+
+from frame_diff import get_fingerprint, to_gray_array
+
+
+class Frame(object):
+    """Captured screen area as a numpy array, with the time the capture started.
+
+    The grayscale version is computed on first use and shared by every crop of the frame.
+    """
+
+    def __init__(self, array, timestamp=None, gray=None):
+        self.array = array
+        self.time = time.time() if timestamp is None else timestamp
+        self._gray = gray
+        self._fingerprint = None
+
+    @staticmethod
+    def from_image(image, timestamp=None):
+        """Create a Frame from a captured PIL image."""
+        return Frame(np.array(image), timestamp)
+
+    @property
+    def gray(self):
+        """Grayscale version of the frame as numpy array."""
+        if self._gray is None:
+            self._gray = to_gray_array(self.array)
+        return self._gray
+
+    @property
+    def fingerprint(self):
+        """Fingerprint of the frame, equal for frames with the same content."""
+        if self._fingerprint is None:
+            self._fingerprint = get_fingerprint(self.gray)
+        return self._fingerprint
+
+    @property
+    def width(self):
+        return self.array.shape[1]
+
+    @property
+    def height(self):
+        return self.array.shape[0]
+
+    def crop(self, x, y, width, height):
+        """Returns the part of the frame in the given rectangle, without copying pixels."""
+        x, y = max(0, x), max(0, y)
+        gray = None if self._gray is None else self._gray[y:y + height, x:x + width]
+        return Frame(self.array[y:y + height, x:x + width], self.time, gray)
+
+    def resize(self, width, height):
+        gray = None if self._gray is None else cv2.resize(self._gray, (width, height))
+        return Frame(cv2.resize(self.array, (width, height)), self.time, gray)
+
+    def get_image(self):
+        """Returns the frame as PIL image, as returned by IrisCore.get_region."""
+        return Image.fromarray(self.array)
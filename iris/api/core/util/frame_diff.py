@@ -0,0 +1,121 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import zlib
+
+import cv2
+import numpy as np
+
+# Minimum difference between two gray values for a pixel to count as changed. Keeps anti-aliasing and
+# compression noise from being reported as a change.
+PIXEL_DIFF_THRESHOLD = 16
+
+# Downsampling factor of the frames used for fingerprints.
+FINGERPRINT_SCALE = 4
+
+# Above this share of changed area, searching the changed boxes is not cheaper than searching the whole frame.
+MAX_CHANGED_RATIO = 0.5
+
+
+def to_gray_array(image):
+    """Convert a captured image to a grayscale numpy array.
+
+    :param Image.Image || numpy.ndarray image: Captured image.
+    :return: Grayscale image as numpy array.
+    """
+    if isinstance(image, np.ndarray):
+        if image.ndim == 2:
+            return image
+        if image.shape[2] == 4:
+            return cv2.cvtColor(image, cv2.COLOR_RGBA2GRAY)
+        return cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+    return np.array(image.convert('L'))
+
+
+def changed_mask(previous, current, threshold=PIXEL_DIFF_THRESHOLD):
+    """Mask of the pixels that differ between two grayscale frames of the same size.
+
+    :param previous: Grayscale numpy array.
+    :param current: Grayscale numpy array.
+    :param threshold: Minimum gray value difference.
+    :return: Boolean numpy array.
+    """
+    return cv2.absdiff(previous, current) > threshold
+
+
+def count_changed_pixels(previous, current, threshold=PIXEL_DIFF_THRESHOLD):
+    """Number of pixels that differ between two grayscale frames.
+
+    :param previous: Grayscale numpy array or None.
+    :param current: Grayscale numpy array.
+    :param threshold: Minimum gray value difference.
+    :return: Number of changed pixels. Frames of different sizes count as entirely changed.
+    """
+    if previous is None or previous.shape != current.shape:
+        return current.size
+    return int(np.count_nonzero(changed_mask(previous, current, threshold)))
+
+
+def get_fingerprint(gray):
+    """Cheap fingerprint of a grayscale frame: checksum of a downsampled copy.
+
+    :param gray: Grayscale numpy array.
+    :return: Tuple of frame size and checksum.
+    """
+    height, width = gray.shape[:2]
+    small = cv2.resize(gray, (max(1, width // FINGERPRINT_SCALE), max(1, height // FINGERPRINT_SCALE)),
+                       interpolation=cv2.INTER_AREA)
+    return width, height, zlib.crc32(np.ascontiguousarray(small).tobytes())
+
+
+def _merge_boxes(boxes):
+    """Merges overlapping (x, y, width, height) boxes until none overlap."""
+    merged = list(boxes)
+    changed = True
+    while changed:
+        changed = False
+        result = []
+        for box in merged:
+            for index, other in enumerate(result):
+                if (box[0] < other[0] + other[2] and other[0] < box[0] + box[2] and
+                        box[1] < other[1] + other[3] and other[1] < box[1] + box[3]):
+                    x, y = min(box[0], other[0]), min(box[1], other[1])
+                    right = max(box[0] + box[2], other[0] + other[2])
+                    bottom = max(box[1] + box[3], other[1] + other[3])
+                    result[index] = (x, y, right - x, bottom - y)
+                    changed = True
+                    break
+            else:
+                result.append(box)
+        merged = result
+    return merged
+
+
+def get_changed_boxes(previous, current, pad_x, pad_y, max_ratio=MAX_CHANGED_RATIO):
+    """Bounding boxes of the areas that changed between two grayscale frames, padded and merged.
+
+    Any pixel difference counts, so a needle that appeared between the two frames is always inside a box when
+    the boxes are padded by the needle size.
+
+    :param previous: Grayscale numpy array.
+    :param current: Grayscale numpy array of the same size.
+    :param pad_x: Pixels added on the left and right of every box.
+    :param pad_y: Pixels added above and below every box.
+    :param max_ratio: Max share of the frame the boxes may cover.
+    :return: List of (x, y, width, height), empty if nothing changed, None if the boxes cover too much of the frame.
+    """
+    mask = changed_mask(previous, current, 0).astype(np.uint8)
+    if not mask.any():
+        return []
+
+    height, width = current.shape[:2]
+    # Dilating by the padding both pads the changed areas and joins the ones closer than a needle.
+    mask = cv2.dilate(mask, np.ones((2 * pad_y + 1, 2 * pad_x + 1), np.uint8))
+    count, labels, stats, centroids = cv2.connectedComponentsWithStats(mask)
+    boxes = [tuple(int(value) for value in stats[label][:4]) for label in range(1, count)]
+
+    boxes = _merge_boxes(boxes)
+    if sum([w * h for x, y, w, h in boxes]) > max_ratio * width * height:
+        return None
+    return boxes
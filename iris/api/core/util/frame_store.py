@@ -0,0 +1,74 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import logging
+import multiprocessing
+
+import numpy as np
+
+from frame import Frame
+
+logger = logging.getLogger(__name__)
+
+
+class FrameStore(object):
+    """Full screen frames shared with worker processes through shared memory.
+
+    The capturing process publishes frames into a ring of slots, each frame with a new sequence number. Workers get
+    a numpy view of a slot, so frames are neither copied nor pickled, and check with is_current that the slot was
+    not reused for a newer frame while they read it.
+    """
+
+    def __init__(self, width, height, slots, channels=3):
+        """
+        :param width: Width of the frames in pixels.
+        :param height: Height of the frames in pixels.
+        :param slots: Number of frames kept. Should be larger than the number of frames read at the same time.
+        :param channels: Number of color channels of the frames.
+        """
+        self._shape = (height, width, channels)
+        self._slots = slots
+        self._buffers = [multiprocessing.RawArray('B', height * width * channels) for i in range(slots)]
+        self._sequences = multiprocessing.RawArray('l', [-1] * slots)
+        self._times = multiprocessing.RawArray('d', slots)
+        self._last_sequence = multiprocessing.RawValue('l', 0)
+        self._lock = multiprocessing.Lock()
+
+    def _get_view(self, slot):
+        return np.frombuffer(self._buffers[slot], np.uint8).reshape(self._shape)
+
+    def publish(self, frame):
+        """Copies a frame into the next slot.
+
+        :param Frame frame: Full screen frame.
+        :return: Sequence number of the frame, None if the frame doesn't have the size of the store.
+        """
+        if frame.array.shape != self._shape:
+            logger.debug('Frame of shape %s not published to a store of shape %s.' % (frame.array.shape,
+                                                                                        self._shape))
+            return None
+        with self._lock:
+            sequence = self._last_sequence.value + 1
+            slot = sequence % self._slots
+            self._sequences[slot] = -1
+            np.copyto(self._get_view(slot), frame.array)
+            self._times[slot] = frame.time
+            self._sequences[slot] = sequence
+            self._last_sequence.value = sequence
+        return sequence
+
+    def get_frame(self, sequence):
+        """Returns a published frame, as a view of its slot.
+
+        :param sequence: Sequence number returned by publish.
+        :return: Frame or None if the slot was already reused.
+        """
+        slot = sequence % self._slots
+        if self._sequences[slot] != sequence:
+            return None
+        return Frame(self._get_view(slot), self._times[slot])
+
+    def is_current(self, sequence):
+        """Checks that the slot of a frame still holds it."""
+        return self._sequences[sequence % self._slots] == sequence
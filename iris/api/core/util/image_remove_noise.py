@@ -3,7 +3,6 @@
 # You can obtain one at http://mozilla.org/MPL/2.0/.
 
 import platform
-import tempfile
 
 import cv2
 import numpy as np
@@ -23,24 +22,27 @@ def get_size_of_scaled_image(im):
 
 
 def process_image_for_ocr(file_path=None, image_array=None):
-    temp_filename = set_image_dpi(file_path=file_path, image_array=image_array)
-    im_new = remove_noise_and_smooth(temp_filename)
-    return im_new
+    """Scales an image up and removes its noise in memory before OCR.
 
+    :param file_path: Path of the image file, if image_array isn't given.
+    :param image_array: PIL Image.
+    :return: Binary grayscale numpy array.
+    """
+    gray_array = scale_image_for_ocr(file_path=file_path, image_array=image_array)
+    return remove_noise_and_smooth(gray_array)
 
-def set_image_dpi(file_path=None, image_array=None):
+
+def scale_image_for_ocr(file_path=None, image_array=None):
     if image_array is None:
         im = Image.open(file_path)
     elif file_path is None:
         im = image_array
 
-    no_alpha_image = im.convert('RGB')
-    input_size = get_size_of_scaled_image(no_alpha_image)
-    im_resized = no_alpha_image.resize(input_size, Image.ANTIALIAS)
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.jpg')
-    temp_filename = temp_file.name
-    im_resized.save(temp_filename, dpi=(300, 300))
-    return temp_filename
+    # Resampling is linear, so converting to grayscale first gives practically the same pixels for a third of the
+    # work.
+    gray_image = im.convert('RGB').convert('L')
+    input_size = get_size_of_scaled_image(gray_image)
+    return np.array(gray_image.resize(input_size, Image.ANTIALIAS))
 
 
 def image_smoothing(img):
@@ -51,8 +53,7 @@ def image_smoothing(img):
     return th3
 
 
-def remove_noise_and_smooth(file_name):
-    img = cv2.imread(file_name, 0)
+def remove_noise_and_smooth(img):
     filtered = cv2.adaptiveThreshold(img.astype(np.uint8), 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY, 41, 3)
     kernel = np.ones((1, 1), np.uint8)
     opening = cv2.morphologyEx(filtered, cv2.MORPH_OPEN, kernel)
@@ -2,7 +2,7 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this file,
 # You can obtain one at http://mozilla.org/MPL/2.0/.
 
-import Queue
+import math
 import time
 
 import cv2
@@ -14,15 +14,24 @@ except ImportError:
     from PIL import Image
 
 from core_helper import *
-from iris.api.core.pattern import Pattern
+from frame_diff import MAX_CHANGED_RATIO, _merge_boxes, get_changed_boxes
+from damage_monitor import get_change_waiter, get_damage_getter
+from iris.api.core.pattern import Pattern, PatternSet
 from iris.api.core.settings import Settings
 from iris.api.core.location import Location
+from poll_scheduler import PollScheduler
+from prefetch import get_prefetched
 from save_debug_image import save_debug_image
+from search_pool import SearchArea, get_search_pool
 
 logger = logging.getLogger(__name__)
 
 FIND_METHOD = cv2.TM_CCOEFF_NORMED
 
+# Last screen Location of each Pattern, keyed by image path and similarity. Every process has its own, so the
+# results of the search pool are recorded again in the process that submitted the search.
+_last_matches = {}
+
 
 def get_image_size(of_what):
     """Get image size of asset image.
@@ -47,16 +56,6 @@ def get_image_size(of_what):
     return int(width / scale_factor), int(height / scale_factor)
 
 
-def _calculate_interval_max_attempts(timeout=None):
-    if timeout is None:
-        timeout = Settings.auto_wait_timeout
-
-    wait_scan_rate = float(Settings.wait_scan_rate)
-    interval = 1 / wait_scan_rate
-    max_attempts = int(timeout * wait_scan_rate)
-    return interval, max_attempts
-
-
 def iris_image_match_template(needle, haystack, precision, threshold=None):
     """Finds a match or a list of matches.
 
@@ -138,16 +137,22 @@ def image_search_multiple(pattern, region=None):
     :param Region region: Region object.
     :return: List[Location].
     """
+    screen_area = IrisCore.get_screen_area() if region is None else None
+    if screen_area is None:
+        stack_image = IrisCore.get_region(region=region)
+        return _match_template_multiple(pattern, stack_image)
 
-    stack_image = IrisCore.get_region(region=region)
-    return _match_template_multiple(pattern, stack_image)
+    stack_image = IrisCore.get_region(region=screen_area)
+    return [Location(location.x + screen_area.x, location.y + screen_area.y)
+            for location in _match_template_multiple(pattern, stack_image)]
 
 
-def _match_template(needle, haystack):
+def _match_template(needle, haystack, gray_haystack=None):
     """Search for needle in stack (single match).
 
     :param Pattern needle: Image details (needle).
     :param Image.Image haystack: Region as Image (haystack).
+    :param gray_haystack: Grayscale haystack as numpy array, if already available.
     :return: Location.
     """
 
@@ -155,7 +160,7 @@ def _match_template(needle, haystack):
 
     if precision < 0.99:
         needle = needle.get_gray_image()
-        haystack = haystack.convert('L')
+        haystack = haystack.convert('L') if gray_haystack is None else gray_haystack
     elif precision == 0.99:
         needle = needle.get_color_image()
 
@@ -169,68 +174,320 @@ def _match_template(needle, haystack):
     return position
 
 
-def image_search(pattern, region=None):
+class SearchState(object):
+    """Result of the last attempt of a polling search, with the frame it searched.
+
+    Attempts on a frame with the same fingerprint reuse the result instead of matching again. After a miss,
+    the next attempt only needs to search where the frame changed: the areas reported by get_changed_areas, or
+    else the areas whose pixels differ from the last frame.
+    """
+
+    def __init__(self, get_changed_areas=None):
+        """
+        :param get_changed_areas: Function returning the screen areas changed since a given time, or None if it
+        can't tell, such as the one returned by damage_monitor.get_damage_getter.
+        """
+        self.fingerprint = None
+        self.result = None
+        self.frame = None
+        self._get_changed_areas = get_changed_areas
+
+    def get_changed_areas(self):
+        """Returns the screen areas changed since the frame of the last attempt, None if they are not known."""
+        if self._get_changed_areas is None or self.frame is None:
+            return None
+        return self._get_changed_areas(self.frame.time)
+
+    def get_result(self, frame):
+        """Returns the result of the last attempt if the frame did not change since, None otherwise."""
+        if self.fingerprint is not None and frame.fingerprint == self.fingerprint:
+            return self.result
+        return None
+
+    def set_result(self, frame, result):
+        self.fingerprint = frame.fingerprint
+        self.result = result
+        self.frame = frame
+
+
+def _get_match_key(pattern):
+    return pattern.get_file_path(), pattern.similarity
+
+
+def _remember_match(pattern, location):
+    _last_matches[_get_match_key(pattern)] = location
+
+
+def _forget_match(pattern):
+    _last_matches.pop(_get_match_key(pattern), None)
+
+
+def _verify_last_match(pattern, region=None, screen_frame=None):
+    """Checks if a Pattern is still where it was last found, by matching it against a needle-sized capture.
+
+    :param Pattern pattern: Image details (needle).
+    :param Region region: Region object. The last match must be inside it.
+    :param Frame screen_frame: Full screen Frame to crop instead of capturing.
+    :return: Location or None if the pattern was not found before or moved.
+    """
+    location = _last_matches.get(_get_match_key(pattern))
+    if location is None:
+        return None
+
+    width, height = pattern.get_gray_image().size
+    if region is not None and (location.x < region.x or location.y < region.y or
+                               location.x + width > region.x + region.width or
+                               location.y + height > region.y + region.height):
+        return None
+
+    area = SearchArea(location.x, location.y, width, height)
+    if screen_frame is not None:
+        patch = IrisCore.crop_screen_frame(screen_frame, area)
+    else:
+        patch = IrisCore.get_frame(region=area)
+    result = _score_pattern(pattern, patch.gray, patch.array)
+    if result is None or result[0] < pattern.similarity:
+        _forget_match(pattern)
+        return None
+
+    logger.debug('Pattern %s is still at its last location, score: %s' % (pattern.get_filename(), result[0]))
+    return location
+
+
+def _get_area_boxes(areas, region, frame, pad_x, pad_y):
+    """Boxes of a frame covering changed screen areas, padded and merged like the ones of get_changed_boxes.
+
+    :param areas: List of screen areas with x, y, width and height.
+    :param Region region: Region the frame was captured from, None for the full screen.
+    :param Frame frame: Captured frame.
+    :param pad_x: Pixels added on the left and right of every box.
+    :param pad_y: Pixels added above and below every box.
+    :return: List of (x, y, width, height), None if the boxes cover too much of the frame.
+    """
+    offset_x, offset_y = (0, 0) if region is None else (region.x, region.y)
+    boxes = []
+    for area in areas:
+        left = max(0, int(area.x) - offset_x - pad_x)
+        top = max(0, int(area.y) - offset_y - pad_y)
+        right = min(frame.width, int(math.ceil(area.x + area.width)) - offset_x + pad_x)
+        bottom = min(frame.height, int(math.ceil(area.y + area.height)) - offset_y + pad_y)
+        if right > left and bottom > top:
+            boxes.append((left, top, right - left, bottom - top))
+
+    boxes = _merge_boxes(boxes)
+    if sum([w * h for x, y, w, h in boxes]) > MAX_CHANGED_RATIO * frame.width * frame.height:
+        return None
+    return boxes
+
+
+def _match_changed_areas(pattern, state, current, region=None):
+    """Search a Pattern only where the frame changed since a frame where it was not found.
+
+    The areas reported by the search state are used when available, else the pixels of both frames are compared.
+
+    :param Pattern pattern: Image details (needle).
+    :param SearchState state: State of the polling search, with the frame of the last failed attempt.
+    :param Frame current: New frame of the same region.
+    :param Region region: Region the frames were captured from, None for the full screen.
+    :return: Location relative to the frame, or None if the whole frame needs to be searched.
+    """
+    previous = state.frame
+    if pattern.similarity >= 0.99 or previous.gray.shape != current.gray.shape:
+        return None
+
+    needle = np.array(pattern.get_gray_image())
+    height, width = needle.shape[:2]
+    changed_areas = state.get_changed_areas()
+    if changed_areas is not None:
+        boxes = _get_area_boxes(changed_areas, region, current, width, height)
+    else:
+        boxes = get_changed_boxes(previous.gray, current.gray, width, height)
+    if boxes is None:
+        return None
+
+    logger.debug('Searching for pattern %s in %s changed area(s)' % (pattern.get_filename(), len(boxes)))
+    best_score, best_location = -1, None
+    for x, y, w, h in boxes:
+        if w < width or h < height:
+            continue
+        res = cv2.matchTemplate(current.gray[y:y + h, x:x + w], needle, FIND_METHOD)
+        min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(res)
+        if max_val > best_score:
+            best_score, best_location = max_val, Location(x + max_loc[0], y + max_loc[1])
+
+    logger.debug('Match score: %s. Desired precision: %s' % (best_score, pattern.similarity))
+    if best_score < pattern.similarity:
+        return Location(-1, -1)
+    save_debug_image(pattern.get_gray_image(), current.gray, best_location)
+    return best_location
+
+
+def image_search(pattern, region=None, state=None, screen_frame=None):
     """ Wrapper over _match_template. Search image in a Region or full screen
 
+    The last Location of each Pattern is verified first, so a search repeated right after a match only needs a
+    needle-sized capture.
+
     :param Pattern pattern: Image details (needle).
     :param Region region: Region object.
+    :param SearchState state: State of a polling search. Unchanged frames are not searched again, changed frames
+    are only searched where they changed.
+    :param Frame screen_frame: Full screen Frame at native resolution to search instead of a new capture.
     :return: Location.
     """
-    logger.debug('Searching for pattern: %s' % pattern.get_filename())
-    stack_image = IrisCore.get_region(region=region)
-    location = _match_template(pattern, stack_image)
+    if region is None:
+        region = IrisCore.get_screen_area()
+
+    location = _verify_last_match(pattern, region, screen_frame)
+    if location is not None:
+        return location
+
+    if screen_frame is not None:
+        frame = IrisCore.crop_screen_frame(screen_frame, region)
+    else:
+        frame = IrisCore.get_frame(region=region)
+    if state is not None:
+        location = state.get_result(frame)
+        if location is not None:
+            logger.debug('Screen unchanged, skipping search for pattern: %s' % pattern.get_filename())
+            return location
+
+    location = None
+    if state is not None and state.frame is not None:
+        location = _match_changed_areas(pattern, state, frame, region)
+    if location is None:
+        logger.debug('Searching for pattern: %s' % pattern.get_filename())
+        location = _match_template(pattern, frame.get_image(), frame.gray)
 
     if location.x == -1 or location.y == -1:
+        _forget_match(pattern)
+        if state is not None:
+            state.set_result(frame, location)
         return location
     elif region is not None:
-        return Location(location.x + region.x, location.y + region.y)
+        location = Location(location.x + region.x, location.y + region.y)
+    _remember_match(pattern, location)
+    return location
+
+
+def _score_pattern(pattern, gray_haystack, color_haystack):
+    """Match a single Pattern against an already converted haystack.
+
+    :param Pattern pattern: Image details (needle).
+    :param gray_haystack: Grayscale haystack as numpy array.
+    :param color_haystack: Color haystack as numpy array.
+    :return: Pair of best score and Location, or None if the needle can't be matched.
+    """
+    if pattern.similarity < 0.99:
+        needle, stack = np.array(pattern.get_gray_image()), gray_haystack
     else:
-        return location
+        needle, stack = np.array(pattern.get_color_image()), color_haystack
+    try:
+        res = cv2.matchTemplate(stack, needle, FIND_METHOD)
+    except Exception:
+        return None
+    min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(res)
+    return max_val, Location(max_loc[0], max_loc[1])
+
+
+def match_pattern_in_image(pattern, haystack):
+    """Search for a Pattern in an already captured image, without saving debug images.
+
+    :param Pattern pattern: Image details (needle).
+    :param Image.Image haystack: Captured image (haystack).
+    :return: Location relative to the image, Location(-1, -1) if not found.
+    """
+    result = _score_pattern(pattern, np.array(haystack.convert('L')), np.array(haystack))
+    if result is None or result[0] < pattern.similarity:
+        return Location(-1, -1)
+    return result[1]
+
+
+def _match_pattern_set(pattern_set, haystack):
+    """Search all variants of a PatternSet in the same haystack.
+
+    :param PatternSet pattern_set: Pattern variants (needles).
+    :param Image.Image haystack: Region as Image (haystack).
+    :return: Tuple of score, variant name and Location for the best variant found, or None.
+    """
+    gray_haystack = np.array(haystack.convert('L'))
+    color_haystack = np.array(haystack)
+    best = None
 
+    for name, pattern in pattern_set.get_variants():
+        result = _score_pattern(pattern, gray_haystack, color_haystack)
+        if result is None:
+            continue
+        score, location = result
+        logger.debug('Variant %s match score: %s. Desired precision: %s' % (name, score, pattern.similarity))
+        if score >= pattern.similarity and (best is None or score > best[0]):
+            best = (score, name, location)
+    return best
 
-def _add_positive_image_search_result_in_queue(queue, pattern, region=None):
-    """Puts result in a queue if image is found.
 
-    :param Queue.Queue queue: Queue where the result of the search is added.
-    :param Pattern pattern: name of the searched image.
+def image_search_set(pattern_set, region=None, state=None):
+    """Search all variants of a PatternSet in a single capture of a Region or full screen.
+
+    :param PatternSet pattern_set: Pattern variants (needles).
     :param Region region: Region object.
+    :param SearchState state: State of a polling search. Unchanged frames are not searched again.
+    :return: Pair of variant name and Location. The name is None if no variant was found.
     """
-    result = image_search(pattern, region)
-    if result.x != -1:
-        queue.put(result)
+    if region is None:
+        region = IrisCore.get_screen_area()
 
+    frame = IrisCore.get_frame(region=region)
+    if state is not None and state.get_result(frame) is not None:
+        logger.debug('Screen unchanged, skipping search for pattern set: %s' % pattern_set.get_filename())
+        return state.result
 
-def _positive_image_search_multiprocess(pattern, timeout=None, region=None):
-    """Checks if image is found using multiprocessing.
+    logger.debug('Searching for pattern set: %s' % pattern_set.get_filename())
+    stack_image = frame.get_image()
+    best = _match_pattern_set(pattern_set, stack_image)
 
-    :param Pattern pattern: Name of the searched image.
+    if best is None:
+        if state is not None:
+            state.set_result(frame, (None, Location(-1, -1)))
+        return None, Location(-1, -1)
+
+    score, name, location = best
+    save_debug_image(pattern_set.get_pattern(name).get_gray_image(), stack_image, location)
+    if region is not None:
+        location = Location(location.x + region.x, location.y + region.y)
+    return name, location
+
+
+def positive_image_set_search(pattern_set, timeout=None, region=None):
+    """Search (in loop) until one of the variants of a PatternSet is found.
+
+    :param PatternSet pattern_set: Pattern variants (needles).
     :param timeout: Number as maximum waiting time in seconds.
     :param Region region: Region object.
-    :return: Found image from queue.
+    :return: Pair of variant name and Location, or None.
     """
+    state = SearchState()
+    scheduler = PollScheduler(timeout, wait_for_change=get_change_waiter(region))
+    while scheduler.next_attempt():
+        name, location = image_search_set(pattern_set, region, state)
+        if name is not None:
+            return name, location
+    return None
+
+
+def negative_image_set_search(pattern_set, timeout=None, region=None):
+    """Search (in loop) until none of the variants of a PatternSet is found.
 
-    out_q = multiprocessing.Queue()
-
-    interval, max_attempts = _calculate_interval_max_attempts(timeout)
-
-    process_list = []
-    for i in range(max_attempts):
-        p = multiprocessing.Process(target=_add_positive_image_search_result_in_queue,
-                                    args=(out_q, pattern, region))
-        process_list.append(p)
-        p.start()
-        try:
-            return out_q.get(False)
-        except Queue.Empty:
-            pass
-        time.sleep(interval)
-        p.join()
-
-        try:
-            for process in process_list:
-                process.terminate()
-        except Exception:
-            pass
+    :param PatternSet pattern_set: Pattern variants (needles).
+    :param timeout: Number as maximum waiting time in seconds.
+    :param Region region: Region object.
+    :return: True if all variants vanished, None otherwise.
+    """
+    state = SearchState()
+    scheduler = PollScheduler(timeout, wait_for_change=get_change_waiter(region))
+    while scheduler.next_attempt():
+        name, location = image_search_set(pattern_set, region, state)
+        if name is None:
+            return True
     return None
 
 
@@ -242,74 +499,56 @@ def _positive_image_search_loop(pattern, timeout=None, region=None):
     :param Region region: Region object.
     :return: Location.
     """
-
-    if timeout is None:
-        timeout = Settings.auto_wait_timeout
-
-    start_time = datetime.datetime.now()
-    end_time = start_time + datetime.timedelta(seconds=timeout)
-
-    while start_time < end_time:
-        time_remaining = end_time - start_time
-        logger.debug("Searching for image %s - %s seconds remaining" % (pattern.get_filename(), time_remaining))
-        pos = image_search(pattern, region)
-        start_time = datetime.datetime.now()
+    state = SearchState(get_damage_getter(region))
+    scheduler = PollScheduler(timeout, wait_for_change=get_change_waiter(region))
+    while scheduler.next_attempt():
+        logger.debug('Searching for image %s - %.2f seconds remaining' % (pattern.get_filename(),
+                                                                          scheduler.remaining()))
+        pos = image_search(pattern, region, state)
         if pos.x != -1:
             return pos
     return None
 
 
-def positive_image_search(pattern, timeout=None, region=None):
-    if is_multiprocessing_enabled():
-        return _positive_image_search_multiprocess(pattern, timeout, region)
-    else:
-        return _positive_image_search_loop(pattern, timeout, region)
-
+def _pool_image_search(pool, pattern, timeout=None, region=None, negative=False):
+    """Polls for an image using the workers of the search pool.
 
-def _add_negative_image_search_result_in_queue(queue, pattern, region=None):
-    """Puts result in a queue if image is NOT found.
+    Positive searches verify the last Location of the pattern before submitting any attempt. The outcome is
+    recorded in the last matches of this process, since process workers only update their own.
 
-    :param Queue.Queue queue: Queue where the result of the search is added.
+    :param SearchPool pool: Started search pool.
     :param Pattern pattern: Name of the searched image.
-    :param Region region: Region object
+    :param timeout: Number as maximum waiting time in seconds.
+    :param Region region: Region object.
+    :param bool negative: Wait for the image to vanish instead of appearing.
+    :return: Location for positive searches, True for negative ones, None on timeout.
     """
+    if region is None:
+        region = IrisCore.get_screen_area()
 
-    result = image_search(pattern, region)
-    if result.x == -1:
-        queue.put(result)
+    if not negative:
+        location = _verify_last_match(pattern, region)
+        if location is not None:
+            return location
 
+    result = pool.search(pattern, region, negative, timeout)
+    if result is None or negative:
+        _forget_match(pattern)
+        return None if result is None else True
+    _remember_match(pattern, result)
+    return result
 
-def _negative_image_search_multiprocess(pattern, timeout=None, region=None):
-    """Checks if image is NOT found or it vanished using multiprocessing.
 
-    :param Pattern pattern: Name of the searched image.
-    :param timeout: Number as maximum waiting time in seconds.
-    :param Region region: Region object.
-    :return: Found image from queue.
-    """
-    out_q = multiprocessing.Queue()
-
-    interval, max_attempts = _calculate_interval_max_attempts(timeout)
-
-    process_list = []
-    for i in range(max_attempts):
-        p = multiprocessing.Process(target=_add_negative_image_search_result_in_queue,
-                                    args=(out_q, pattern, region))
-        process_list.append(p)
-        p.start()
-        try:
-            return out_q.get(False)
-        except Queue.Empty:
-            pass
-        time.sleep(interval)
-        p.join()
-
-        try:
-            for process in process_list:
-                process.terminate()
-        except Exception:
-            pass
-    return None
+def positive_image_search(pattern, timeout=None, region=None):
+    prefetched = get_prefetched(pattern, region)
+    if prefetched is not None:
+        return prefetched
+
+    pool = get_search_pool()
+    if pool is not None:
+        return _pool_image_search(pool, pattern, timeout, region)
+    else:
+        return _positive_image_search_loop(pattern, timeout, region)
 
 
 def _negative_image_search_loop(pattern, timeout=None, region=None):
@@ -318,27 +557,19 @@ def _negative_image_search_loop(pattern, timeout=None, region=None):
     :param Pattern pattern: Name of the searched image.
     :param timeout: Number as maximum waiting time in seconds.
     :param Region region: Region object.
-    :return: Location.
+    :return: True if the image is not found, None otherwise.
     """
-
-    pattern_found = True
-
-    start_time = datetime.datetime.now()
-    end_time = start_time + datetime.timedelta(seconds=timeout)
-
-    while pattern_found is True and start_time < end_time:
+    scheduler = PollScheduler(timeout, wait_for_change=get_change_waiter(region))
+    while scheduler.next_attempt():
         image_found = image_search(pattern, region)
-        if (image_found.x != -1) & (image_found.y != -1):
-            pattern_found = True
-        else:
-            pattern_found = False
-        start_time = datetime.datetime.now()
-
-    return None if pattern_found else True
+        if image_found.x == -1:
+            return True
+    return None
 
 
 def negative_image_search(pattern, timeout=None, region=None):
-    if is_multiprocessing_enabled():
-        return _negative_image_search_multiprocess(pattern, timeout, region)
+    pool = get_search_pool()
+    if pool is not None:
+        return _pool_image_search(pool, pattern, timeout, region, negative=True)
     else:
         return _negative_image_search_loop(pattern, timeout, region)
@@ -0,0 +1,35 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+_last_input = [0]
+_listeners = []
+
+
+def notify_input():
+    """Records that mouse or keyboard input was sent. Called by the mouse and keyboard functions once it is sent.
+
+    :return: None.
+    """
+    _last_input[0] = time.time()
+    for listener in list(_listeners):
+        listener()
+
+
+def get_last_input_time():
+    """Returns the time the last input was sent, as returned by time.time(), 0 if there was none."""
+    return _last_input[0]
+
+
+def add_input_listener(listener):
+    """Registers a function called without arguments after every input, e.g. to drop results of older captures.
+
+    :param listener: Function.
+    :return: None.
+    """
+    _listeners.append(listener)
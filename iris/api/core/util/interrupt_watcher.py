@@ -0,0 +1,178 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import logging
+import threading
+import time
+
+from capture_service import get_newest_frame
+from core_helper import IrisCore
+
+logger = logging.getLogger(__name__)
+
+WATCHER_CHECK_INTERVAL = 0.5
+WATCHER_IDLE_TIME = 2
+
+_watchers = []
+_lock = threading.Lock()
+_thread = None
+_stopped = threading.Event()
+_last_wait = [0]
+_context = threading.local()
+
+
+class InterruptWatcher(object):
+    """Pairs a pattern, such as an unexpected popup, with the handler that dismisses it."""
+
+    def __init__(self, pattern, handler, once=False, expires=None):
+        """
+        :param Pattern pattern: Pattern of the interruption.
+        :param handler: Function called with the Location of the pattern once it shows up.
+        :param bool once: Unregister the watcher after its handler ran.
+        :param expires: Number of seconds after which the watcher is unregistered, None to keep it.
+        """
+        self.pattern = pattern
+        self.handler = handler
+        self.once = once
+        self.expiry = None if expires is None else time.time() + expires
+        self.location = None
+        self.handled_time = 0
+
+    def is_expired(self, now):
+        return self.expiry is not None and now > self.expiry
+
+
+def register_watcher(pattern, handler, once=False, expires=None):
+    """Registers a watcher checked in the background while waits are running.
+
+    Checks use the newest frame of the capture service when it runs. Without it, every check grabs the screen.
+
+    :param Pattern pattern: Pattern of the interruption.
+    :param handler: Function called with the Location of the pattern once it shows up.
+    :param bool once: Unregister the watcher after its handler ran.
+    :param expires: Number of seconds after which the watcher is unregistered, None to keep it.
+    :return: InterruptWatcher object.
+    """
+    watcher = InterruptWatcher(pattern, handler, once, expires)
+    with _lock:
+        _watchers.append(watcher)
+    logger.debug('Watching for %s.' % pattern.get_filename())
+    return watcher
+
+
+def unregister_watcher(watcher):
+    with _lock:
+        if watcher in _watchers:
+            _watchers.remove(watcher)
+
+
+def _get_watchers():
+    now = time.time()
+    with _lock:
+        _watchers[:] = [watcher for watcher in _watchers if not watcher.is_expired(now)]
+        return list(_watchers)
+
+
+def _get_screen_frame():
+    """Newest frame of the capture service when it runs, so checks don't grab the screen again, else a new capture."""
+    frame = get_newest_frame()
+    if frame is not None:
+        return IrisCore.crop_screen_frame(frame)
+    return IrisCore.get_frame()
+
+
+def check_watchers(frame=None):
+    """Matches the registered watchers against a single capture of the screen.
+
+    :param Frame frame: Full screen Frame. By default the newest frame of the capture service or a new capture.
+    :return: List of InterruptWatcher that were seen.
+    """
+    # Imported here since image_search depends on the poll scheduler, which depends on this module.
+    from image_search import _score_pattern
+
+    watchers = _get_watchers()
+    if len(watchers) == 0:
+        return []
+    if frame is None:
+        frame = _get_screen_frame()
+
+    seen = []
+    for watcher in watchers:
+        if frame.time <= watcher.handled_time:
+            # Captured before the handler dismissed the interruption.
+            continue
+        result = _score_pattern(watcher.pattern, frame.gray, frame.array)
+        if result is not None and result[0] >= watcher.pattern.similarity:
+            watcher.location = result[1]
+            seen.append(watcher)
+    return seen
+
+
+def handle_interrupts(check=False):
+    """Runs the handlers of the watchers whose pattern was seen.
+
+    Called by every polling wait, which keeps the background checks running. Handlers only run on the main thread,
+    and waits made by a handler don't run other handlers.
+
+    :param bool check: Check the screen right away instead of relying on the background checks.
+    :return: Number of handlers that ran.
+    """
+    if threading.current_thread().name != 'MainThread' or getattr(_context, 'handling', False):
+        return 0
+
+    _last_wait[0] = time.time()
+    if check:
+        check_watchers()
+    else:
+        _start_watcher_thread()
+
+    handled = 0
+    for watcher in _get_watchers():
+        location = watcher.location
+        if location is None:
+            continue
+        watcher.location = None
+        if watcher.once:
+            unregister_watcher(watcher)
+
+        logger.debug('Interruption found: %s.' % watcher.pattern.get_filename())
+        _context.handling = True
+        try:
+            watcher.handler(location)
+            handled += 1
+        except Exception as e:
+            logger.error('Handler for %s failed: %s' % (watcher.pattern.get_filename(), e))
+        finally:
+            _context.handling = False
+            watcher.handled_time = time.time()
+    return handled
+
+
+def _run():
+    while not _stopped.wait(WATCHER_CHECK_INTERVAL):
+        # Only look for interruptions while a wait is polling, so idle time doesn't cost screen captures.
+        if time.time() - _last_wait[0] > WATCHER_IDLE_TIME:
+            continue
+        try:
+            check_watchers()
+        except Exception as e:
+            logger.debug('Interrupt check failed: %s' % e)
+
+
+def _start_watcher_thread():
+    global _thread
+    if _thread is not None and _thread.is_alive() or len(_watchers) == 0:
+        return
+    _stopped.clear()
+    _thread = threading.Thread(target=_run)
+    _thread.daemon = True
+    _thread.start()
+
+
+def stop_interrupt_watchers():
+    global _thread
+    _stopped.set()
+    if _thread is not None:
+        _thread.join()
+        _thread = None
@@ -0,0 +1,68 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import collections
+import hashlib
+import logging
+import threading
+
+from input_events import add_input_listener
+
+logger = logging.getLogger(__name__)
+
+OCR_CACHE_SIZE = 8
+
+_results = collections.OrderedDict()
+_lock = threading.Lock()
+
+
+def get_ocr_key(image, with_image_processing, region):
+    """Key of an OCR result: the captured pixels, the preprocessing and the region the coordinates are offset by.
+
+    :param image: PIL Image given to OCR.
+    :param with_image_processing: With extra dpi and contrast image processing.
+    :param region: Region object the image was captured from, None if the coordinates aren't offset.
+    :return: Tuple.
+    """
+    area = None if region is None else (region.x, region.y, region.width, region.height)
+    digest = hashlib.sha1(image.tobytes()).hexdigest()
+    return digest, image.size, image.mode, with_image_processing, area
+
+
+def _copy_result(words, debug_img, debug_words):
+    # Callers update the values of the words after zoom search, and draw the matches on the debug image.
+    return [dict(word) for word in words], debug_img.copy(), [dict(word) for word in debug_words]
+
+
+def get_ocr_result(key):
+    """Returns a copy of the cached result of text_search_all for a key, None if there is none.
+
+    :param key: Key returned by get_ocr_key.
+    :return: Tuple of the words, the debug image and the debug words, or None.
+    """
+    with _lock:
+        entry = _results.pop(key, None)
+        if entry is None:
+            return None
+        _results[key] = entry
+    logger.debug('Using cached OCR result.')
+    return _copy_result(*entry)
+
+
+def store_ocr_result(key, words, debug_img, debug_words):
+    """Caches a result of text_search_all, dropping the least recently used one beyond OCR_CACHE_SIZE."""
+    with _lock:
+        _results.pop(key, None)
+        _results[key] = _copy_result(words, debug_img, debug_words)
+        while len(_results) > OCR_CACHE_SIZE:
+            _results.popitem(last=False)
+
+
+def clear_ocr_cache():
+    with _lock:
+        _results.clear()
+
+
+# Input usually changes what is on screen, so cached results are dropped instead of accumulating.
+add_input_listener(clear_ocr_cache)
@@ -0,0 +1,107 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import logging
+import threading
+
+import numpy as np
+import pytesseract
+
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LANGUAGE = 'eng'
+TSV_HEADER = 'level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext'
+
+_engines = threading.local()
+_failed_languages = set()
+
+
+def _get_engine(lang):
+    """Tesseract engine of the current thread for a language, loaded on first use.
+
+    Engines keep their state between calls, so they can't be shared by threads.
+
+    :param str lang: Tesseract language.
+    :return: tesserocr.PyTessBaseAPI object, or None if tesserocr can't be used.
+    """
+    if tesserocr is None or lang in _failed_languages:
+        return None
+    engines = getattr(_engines, 'engines', None)
+    if engines is None:
+        engines = _engines.engines = {}
+    if lang not in engines:
+        try:
+            engines[lang] = tesserocr.PyTessBaseAPI(lang=lang)
+            logger.debug('Loaded the %s Tesseract engine.' % lang)
+        except RuntimeError as e:
+            logger.warning('Unable to load the %s Tesseract engine, falling back to the tesseract command: %s' %
+                           (lang, e))
+            _failed_languages.add(lang)
+            return None
+    return engines[lang]
+
+
+def _to_array(image):
+    if not isinstance(image, np.ndarray):
+        if image.mode not in ('L', 'RGB'):
+            image = image.convert('RGB')
+        image = np.array(image)
+    return np.ascontiguousarray(image, np.uint8)
+
+
+def image_to_data(image, lang=DEFAULT_LANGUAGE):
+    """Recognizes the words of an image, in the TSV format of pytesseract.image_to_data.
+
+    With tesserocr installed, the image is handed in memory to an engine that stays loaded, instead of starting a
+    tesseract process that reloads the language data and reads the image from a file.
+
+    :param image: PIL Image, or grayscale or RGB numpy array.
+    :param str lang: Tesseract language.
+    :return: TSV string with one line per page, block, paragraph, line and word.
+    """
+    engine = _get_engine(lang)
+    if engine is None:
+        return pytesseract.image_to_data(image, lang=lang)
+
+    array = _to_array(image)
+    height, width = array.shape[:2]
+    bytes_per_pixel = 1 if array.ndim == 2 else array.shape[2]
+    engine.SetImageBytes(array.tobytes(), width, height, bytes_per_pixel, width * bytes_per_pixel)
+    engine.Recognize()
+    return TSV_HEADER + '\n' + engine.GetTSVText(0)
+
+
+def parse_ocr_data(data):
+    """Parses the words out of the TSV returned by image_to_data.
+
+    :param str data: TSV string.
+    :return: List of match dicts, in pixels of the OCRed image.
+    """
+    match_min_len = 12
+    words = []
+    for line in data.split('\n'):
+        try:
+            values = line.encode('ascii').split()
+            if len(values) is match_min_len:
+                precision = int(values[10]) / float(100)
+                words.append({'x': int(values[6]),
+                              'y': int(values[7]),
+                              'width': int(values[8]),
+                              'height': int(values[9]),
+                              'precision': float(precision),
+                              'value': str(values[11])
+                              })
+        except Exception:
+            continue
+    return words
+
+
+def reset_ocr_engines():
+    """Forgets the engines of the current thread, e.g. ones copied into a forked process."""
+    _engines.engines = {}
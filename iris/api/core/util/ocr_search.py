@@ -6,20 +6,25 @@ import copy
 
 import cv2
 import numpy as np
-import pytesseract
 
 try:
     import Image
 except ImportError:
     from PIL import Image
 
-from pyautogui import screenshot
 from core_helper import *
 from image_remove_noise import process_image_for_ocr, OCR_IMAGE_SIZE
+from ocr_cache import get_ocr_key, get_ocr_result, store_ocr_result
+from ocr_engine import image_to_data, parse_ocr_data
+from ocr_tiles import get_band_count, tiled_image_to_words
+from prefetch import get_prefetched
 from save_debug_image import save_debug_image
 
 logger = logging.getLogger(__name__)
 
+ZOOM_TEXT_HEIGHT = 40
+ZOOM_WORDS_PER_MOSAIC = 60
+
 
 def save_ocr_debug_image(on_region, matches):
     if matches is None:
@@ -65,23 +70,151 @@ def _combine_text_matches(matches, value):
         return None
 
 
+def find_text_in_matches(what, text_dict):
+    """Look for a word or phrase in the words returned by text_search_all, without zoom search.
+
+    :param str what: Word or phrase.
+    :param list text_dict: Words found by text_search_all.
+    :return: Match dict or None.
+    """
+    words = what.split()
+    values = [match['value'] for match in text_dict]
+    for index in range(len(values) - len(words) + 1):
+        if values[index:index + len(words)] == words:
+            if len(words) == 1:
+                return text_dict[index]
+            return _combine_text_matches(text_dict[index:index + len(words)], what)
+    return None
+
+
+def _crop_word(word, stack_array, offset):
+    """Crops a word with a small margin out of the capture it was found in.
+
+    :param dict word: Match dict, in screen coordinates.
+    :param stack_array: RGB numpy array of the capture, at native resolution.
+    :param offset: Screen coordinates of the top left corner of the capture.
+    :return: RGB numpy array, or None if the word lies outside of the capture.
+    """
+    is_uhd, uhd_factor = IrisCore.get_uhd_details()
+    scale = uhd_factor if is_uhd else 1
+    height, width = stack_array.shape[:2]
+    left = max(0, int((word['x'] - 3 - offset[0]) * scale))
+    top = max(0, int((word['y'] - 2 - offset[1]) * scale))
+    right = min(width, int((word['x'] + word['width'] + 3 - offset[0]) * scale))
+    bottom = min(height, int((word['y'] + word['height'] + 2 - offset[1]) * scale))
+    if right <= left or bottom <= top:
+        return None
+    return stack_array[top:bottom, left:right]
+
+
+def _build_word_mosaic(crops):
+    """Zooms word images and stacks them on a white background, one per line.
+
+    :param list crops: Pairs of word index and RGB numpy array.
+    :return: Mosaic Image and list of (word index, top, bottom) of the cell of each word in it.
+    """
+    zoomed = []
+    for index, crop in crops:
+        zoom = max(1, int(round(ZOOM_TEXT_HEIGHT / float(crop.shape[0]))))
+        zoomed.append((index, cv2.resize(crop, None, fx=zoom, fy=zoom, interpolation=cv2.INTER_LANCZOS4)))
+
+    margin = max(image.shape[0] for index, image in zoomed)
+    # Wide enough for text_search_all not to scale the mosaic up again.
+    width = max(OCR_IMAGE_SIZE // 2 + 1, max(image.shape[1] for index, image in zoomed) + 2 * margin)
+    height = sum(image.shape[0] + margin for index, image in zoomed) + margin
+    mosaic = np.full((height, width, 3), 255, np.uint8)
+
+    cells = []
+    top = margin
+    for index, image in zoomed:
+        image_height, image_width = image.shape[:2]
+        mosaic[top:top + image_height, margin:margin + image_width] = image
+        cells.append((index, top - margin // 2, top + image_height + margin // 2))
+        top += image_height + margin
+    return Image.fromarray(mosaic), cells
+
+
+def _zoom_search(what, text_dict, stack_array, offset):
+    """Reads the words found by a first OCR pass again, zoomed in and isolated from each other.
+
+    The words are cropped out of the capture of the first pass and OCRed in batches, as mosaics of up to
+    ZOOM_WORDS_PER_MOSAIC words. The first word read in the cell of a word replaces its value in text_dict. Stops after
+    the batch in which the searched word or phrase was found.
+
+    :param str what: Searched word or phrase.
+    :param list text_dict: Words found by text_search_all, updated in place.
+    :param stack_array: RGB numpy array of the capture the words were found in.
+    :param offset: Screen coordinates of the top left corner of the capture.
+    :return: None.
+    """
+    crops = []
+    for match_index, match_object in enumerate(text_dict):
+        if match_object['width'] > 0 and match_object['height'] > 0:
+            crop = _crop_word(match_object, stack_array, offset)
+            if crop is not None:
+                crops.append((match_index, crop))
+
+    for batch_start in range(0, len(crops), ZOOM_WORDS_PER_MOSAIC):
+        mosaic, cells = _build_word_mosaic(crops[batch_start:batch_start + ZOOM_WORDS_PER_MOSAIC])
+        found, debug_img_a, debug_data_a = text_search_all(True, None, mosaic)
+
+        new_values = {}
+        for found_index, found_word in enumerate(debug_data_a):
+            center_y = found_word['y'] + found_word['height'] // 2
+            for match_index, top, bottom in cells:
+                if top <= center_y < bottom:
+                    new_values.setdefault(match_index, found[found_index]['value'])
+                    break
+
+        for match_index, value in sorted(new_values.items()):
+            text_dict[match_index]['value'] = value
+            logger.debug('> (Zoom search) new match: %s' % value)
+        if what in new_values.values() or what in ocr_matches_to_string(text_dict):
+            return
+
+
+def zoom_search_text(what, text_dict, stack_image, in_region=None):
+    """Look for a word or phrase in the words of a capture read again zoomed in, like text_search_by does when the
+    first OCR pass missed it.
+
+    :param str what: Word or phrase.
+    :param list text_dict: Words found by text_search_all in the capture, updated in place.
+    :param Image.Image stack_image: Capture the words were found in.
+    :param Region in_region: Region the capture was taken from, None for the full screen.
+    :return: Match dict or None.
+    """
+    if len(text_dict) == 0:
+        return None
+    offset = (0, 0) if in_region is None else (in_region.x, in_region.y)
+    _zoom_search(what, text_dict, np.array(stack_image.convert('RGB')), offset)
+    return find_text_in_matches(what, text_dict)
+
+
 def text_search_all(with_image_processing=True, in_region=None, in_image=None):
     if in_image is None:
+        if in_region is None:
+            in_region = IrisCore.get_screen_area()
         stack_image = IrisCore.get_region(in_region, True)
     else:
         stack_image = in_image
 
-    match_min_len = 12
+    cache_key = get_ocr_key(stack_image, with_image_processing, in_region)
+    cached = get_ocr_result(cache_key)
+    if cached is not None:
+        return cached
+
     input_image = stack_image
     input_image_array = np.array(input_image)
     debug_img = input_image_array
 
-    if with_image_processing:
-        input_image = process_image_for_ocr(image_array=input_image)
-        input_image_array = np.array(input_image)
-        debug_img = cv2.cvtColor(input_image_array, cv2.COLOR_GRAY2BGR)
-
-    processed_data = pytesseract.image_to_data(input_image)
+    if with_image_processing and get_band_count(stack_image) > 1:
+        ocr_words, debug_img = tiled_image_to_words(stack_image)
+    else:
+        if with_image_processing:
+            input_image = process_image_for_ocr(image_array=input_image)
+            input_image_array = np.array(input_image)
+            debug_img = cv2.cvtColor(input_image_array, cv2.COLOR_GRAY2BGR)
+        ocr_words = parse_ocr_data(image_to_data(input_image))
 
     length_x, width_y = stack_image.size
     dpi_factor = max(1, int(OCR_IMAGE_SIZE / length_x))
@@ -89,47 +222,35 @@ def text_search_all(with_image_processing=True, in_region=None, in_image=None):
     final_data, debug_data = [], []
     is_uhd, uhd_factor = IrisCore.get_uhd_details()
 
-    for line in processed_data.split('\n'):
-        try:
-            data = line.encode('ascii').split()
-            if len(data) is match_min_len:
-                precision = int(data[10]) / float(100)
-                virtual_data = {'x': int(data[6]),
-                                'y': int(data[7]),
-                                'width': int(data[8]),
-                                'height': int(data[9]),
-                                'precision': float(precision),
-                                'value': str(data[11])
-                                }
-                debug_data.append(virtual_data)
-
-                left_offset, top_offset = 0, 0
-                scale_divider = uhd_factor if is_uhd else 1
-
-                if in_region is not None:
-                    left_offset = in_region.x
-                    top_offset = in_region.y
-
-                # Scale down coordinates since actual screen has different dpi
-                if with_image_processing:
-                    screen_data = copy.deepcopy(virtual_data)
-                    screen_data['x'] = screen_data['x'] / dpi_factor / scale_divider + left_offset
-                    screen_data['y'] = screen_data['y'] / dpi_factor / scale_divider + top_offset
-                    screen_data['width'] = screen_data['width'] / dpi_factor / scale_divider
-                    screen_data['height'] = screen_data['height'] / dpi_factor / scale_divider
-                    final_data.append(screen_data)
-                else:
-                    if scale_divider > 1:
-                        screen_data = copy.deepcopy(virtual_data)
-                        screen_data['x'] = screen_data['x'] / scale_divider
-                        screen_data['y'] = screen_data['y'] / scale_divider
-                        screen_data['width'] = screen_data['width'] / scale_divider
-                        screen_data['height'] = screen_data['height'] / scale_divider
-                        final_data.append(screen_data)
-        except Exception:
-            continue
+    for virtual_data in ocr_words:
+        debug_data.append(virtual_data)
+
+        left_offset, top_offset = 0, 0
+        scale_divider = uhd_factor if is_uhd else 1
+
+        if in_region is not None:
+            left_offset = in_region.x
+            top_offset = in_region.y
+
+        # Scale down coordinates since actual screen has different dpi
+        if with_image_processing:
+            screen_data = copy.deepcopy(virtual_data)
+            screen_data['x'] = int(screen_data['x'] / dpi_factor / scale_divider) + left_offset
+            screen_data['y'] = int(screen_data['y'] / dpi_factor / scale_divider) + top_offset
+            screen_data['width'] = int(screen_data['width'] / dpi_factor / scale_divider)
+            screen_data['height'] = int(screen_data['height'] / dpi_factor / scale_divider)
+            final_data.append(screen_data)
+        else:
+            if scale_divider > 1:
+                screen_data = copy.deepcopy(virtual_data)
+                screen_data['x'] = int(screen_data['x'] / scale_divider)
+                screen_data['y'] = int(screen_data['y'] / scale_divider)
+                screen_data['width'] = int(screen_data['width'] / scale_divider)
+                screen_data['height'] = int(screen_data['height'] / scale_divider)
+                final_data.append(screen_data)
 
     # save_ocr_debug_image(debug_img, debug_data)
+    store_ocr_result(cache_key, final_data, debug_img, debug_data)
     return final_data, debug_img, debug_data
 
 
@@ -177,7 +298,17 @@ def text_search_by(what, match_case=True, in_region=None, multiple_matches=False
     if not isinstance(what, str):
         return ValueError(INVALID_GENERIC_INPUT)
 
-    text_dict, debug_img, debug_data = text_search_all(True, in_region)
+    if not multiple_matches:
+        prefetched = get_prefetched(what, in_region, match_case)
+        if prefetched is not None:
+            return prefetched
+
+    if in_region is None:
+        in_region = IrisCore.get_screen_area()
+
+    # Keep the searched image, so debug images show exactly what OCR saw.
+    stack_image = IrisCore.get_region(in_region, True)
+    text_dict, debug_img, debug_data = text_search_all(True, in_region, stack_image)
 
     if len(text_dict) <= 0:
         return None
@@ -211,32 +342,8 @@ def text_search_by(what, match_case=True, in_region=None, multiple_matches=False
 
     logger.debug('> No match, try zoom search')
 
-    for match_index, match_object in enumerate(text_dict):
-        # Word region
-        if match_object['width'] > 0 and match_object['height'] > 0:
-            zoomed_word_image = screenshot(region=(match_object['x'] - 3, match_object['y'] - 2,
-                                                   match_object['width'] + 6, match_object['height'] + 4))
-
-            w_img_w, w_img_h = zoomed_word_image.size
-            # New white image background for zoom in search
-            word_background = Image.new('RGBA', (match_object['width'] * 10, match_object['height'] * 5),
-                                        (255, 255, 255, 255))
-
-            b_img_w, b_img_h = word_background.size
-            # Offset to paste image on center
-            offset = ((b_img_w - w_img_w) // 2, (b_img_h - w_img_h) // 2)
-
-            word_background.paste(zoomed_word_image, offset)
-
-            found, debug_img_a, debug_data_a = text_search_all(True, None, word_background)
-            if len(found) > 0:
-                text_dict[match_index]['value'] = found[0]['value']
-                # save_ocr_debug_image(debug_img_a, debug_data_a)
-                logger.debug('> (Zoom search) new match: %s' % found[0]['value'])
-                if what == found[0]['value']:
-                    break
-                if what in ocr_matches_to_string(text_dict):
-                    break
+    offset = (0, 0) if in_region is None else (in_region.x, in_region.y)
+    _zoom_search(what, text_dict, np.array(stack_image.convert('RGB')), offset)
 
     logger.debug('> (Zoom search) All words on region/screen: ' + ocr_matches_to_string(text_dict))
 
@@ -251,11 +358,11 @@ def text_search_by(what, match_case=True, in_region=None, multiple_matches=False
         if len(final_m_matches) > 0:
             return final_m_matches
         else:
-            save_debug_image(what, in_region, None, True)
+            save_debug_image(what, stack_image, None, True)
             return None
     else:
         if final_s_match is not None:
             return final_s_match
         else:
-            save_debug_image(what, in_region, None, True)
+            save_debug_image(what, stack_image, None, True)
             return None
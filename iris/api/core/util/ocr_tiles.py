@@ -0,0 +1,143 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import logging
+import multiprocessing
+import threading
+from multiprocessing.pool import ThreadPool
+
+import cv2
+import numpy as np
+
+try:
+    import Image
+except ImportError:
+    from PIL import Image
+
+from core_helper import get_os
+from image_remove_noise import process_image_for_ocr, get_size_of_scaled_image
+from iris.api.core.platform import Platform
+from iris.api.core.settings import Settings
+from ocr_engine import image_to_data, parse_ocr_data, reset_ocr_engines
+
+logger = logging.getLogger(__name__)
+
+MIN_BAND_HEIGHT = 200
+BAND_OVERLAP = 24
+CUT_SEARCH_RANGE = 40
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def get_band_count(image):
+    """Number of bands an image is OCRed in, 1 if the OCR pool isn't running or the image is too small to split.
+
+    :param image: PIL Image, at native resolution.
+    :return: Number.
+    """
+    if _pool is None or _pool_workers < 2:
+        return 1
+    return max(1, min(_pool_workers, image.size[1] // MIN_BAND_HEIGHT))
+
+
+def _find_cut(row_activity, row, low, high):
+    """Row near a cut where there is the least text, ideally a blank line between lines of text."""
+    start = max(low, row - CUT_SEARCH_RANGE)
+    end = min(high, row + CUT_SEARCH_RANGE)
+    if end <= start:
+        return row
+    return start + int(np.argmin(row_activity[start:end]))
+
+
+def split_bands(gray_array, count):
+    """Splits an image into horizontal bands, cut on line boundaries where possible.
+
+    :param gray_array: Grayscale numpy array.
+    :param count: Number of bands.
+    :return: List of (top, bottom) of each band. The bands don't overlap and cover the image.
+    """
+    height = gray_array.shape[0]
+    # Blank rows have a single color, whatever the theme.
+    row_activity = gray_array.max(axis=1).astype(np.int32) - gray_array.min(axis=1)
+    cuts = [0]
+    for index in range(1, count):
+        low = cuts[-1] + 1
+        high = height - 1
+        cuts.append(_find_cut(row_activity, index * height // count, low, high))
+    cuts.append(height)
+    return [(top, bottom) for top, bottom in zip(cuts, cuts[1:]) if bottom > top]
+
+
+def _ocr_band(band_array):
+    """OCRs a band of an image like text_search_all OCRs a whole image. Runs on the pool."""
+    processed = process_image_for_ocr(image_array=Image.fromarray(band_array))
+    return parse_ocr_data(image_to_data(processed))
+
+
+def start_ocr_pool():
+    """Starts the OCR workers of the run if Settings.ocr_workers asks for tiled OCR.
+
+    Worker processes are forked, so this has to be called before background threads start. A fork copies the locks
+    held by other threads at that moment, e.g. of logging handlers or of the X connection, and they would never be
+    released in the workers.
+
+    :return: None.
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None or Settings.ocr_workers < 2:
+            return
+        _pool_workers = Settings.ocr_workers
+        if get_os() == Platform.WINDOWS:
+            # Without fork, workers can't be started from here. OCR mostly runs outside of the interpreter lock
+            # anyway.
+            _pool = ThreadPool(_pool_workers)
+        else:
+            _pool = multiprocessing.Pool(_pool_workers, initializer=reset_ocr_engines)
+        logger.debug('Started %s OCR worker(s).' % _pool_workers)
+
+
+def tiled_image_to_words(image):
+    """OCRs an image in overlapping bands in parallel, for the words of text_search_all.
+
+    Every band is extended by BAND_OVERLAP pixels on both sides, so lines of text crossing a cut are whole in one of
+    the bands. A word is kept from the band whose own rows contain its center, so words read twice in an overlap
+    are only reported once.
+
+    :param image: PIL Image, at native resolution.
+    :return: List of match dicts in pixels of the image scaled up for OCR, and debug image of the same size.
+    """
+    array = np.array(image.convert('RGB'))
+    height, width = array.shape[:2]
+    scaled_width, scaled_height = get_size_of_scaled_image(image)
+    factor = scaled_width // width
+
+    bands = split_bands(cv2.cvtColor(array, cv2.COLOR_RGB2GRAY), get_band_count(image))
+    extended = [(max(0, top - BAND_OVERLAP), min(height, bottom + BAND_OVERLAP)) for top, bottom in bands]
+    results = _pool.map(_ocr_band, [array[top:bottom] for top, bottom in extended])
+
+    words = []
+    for (top, bottom), (extended_top, extended_bottom), band_words in zip(bands, extended, results):
+        for word in band_words:
+            word['y'] += extended_top * factor
+            center = (word['y'] + word['height'] / 2.0) / factor
+            if top <= center < bottom:
+                words.append(word)
+    logger.debug('OCRed %s bands, %s words.' % (len(bands), len(words)))
+
+    # Bands are thresholded separately, so the debug image shows the capture instead.
+    debug_img = cv2.resize(cv2.cvtColor(array, cv2.COLOR_RGB2BGR), (scaled_width, scaled_height),
+                           interpolation=cv2.INTER_NEAREST)
+    return words, debug_img
+
+
+def shutdown_ocr_pool():
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.terminate()
+            _pool = None
+            _pool_workers = 0
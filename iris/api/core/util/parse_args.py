@@ -97,6 +97,54 @@ def parse_args():
     parser.add_argument('-z', '--resize',
                         help='Convert hi-res images to normal',
                         action='store_true')
+    parser.add_argument('--optimize-patterns',
+                        help='Analyze pattern images and write an optimization report instead of running tests',
+                        action='store_true')
+    parser.add_argument('--references',
+                        help='Directory of reference screenshots used by --optimize-patterns',
+                        type=os.path.abspath,
+                        action='store',
+                        default=None)
+    parser.add_argument('--rewrite-patterns',
+                        help='Write trimmed copies of pattern images to the working directory',
+                        action='store_true')
+    parser.add_argument('--search-strategy',
+                        help='Run polling image searches inline, on worker threads or on worker processes',
+                        choices=['inline', 'thread', 'process'],
+                        action='store',
+                        default='thread')
+    parser.add_argument('--search-workers',
+                        help='Number of image search workers',
+                        type=int,
+                        action='store',
+                        default=None)
+    parser.add_argument('--ocr-workers',
+                        help='OCR large regions in this many bands on parallel worker processes (0 to disable)',
+                        type=int,
+                        action='store',
+                        default=0)
+    parser.add_argument('--capture-rate',
+                        help='Capture the screen in the background at this many frames per second (0 to disable)',
+                        type=float,
+                        action='store',
+                        default=0)
+    parser.add_argument('--capture-backend',
+                        help='Screen capture backend, auto uses mss on Linux and Windows 7 and pyautogui elsewhere',
+                        choices=['auto', 'mss', 'pyautogui'],
+                        action='store',
+                        default='auto')
+    parser.add_argument('--screen',
+                        help='Index of the monitor Firefox runs on, searches are limited to it. By default, the '
+                             'monitor where Firefox shows up',
+                        type=int,
+                        action='store',
+                        default=None)
+    parser.add_argument('--damage-events',
+                        help='Wake up waits and observers on X11 Damage notifications instead of polling (Linux)',
+                        action='store_true')
+    parser.add_argument('--adaptive-timeouts',
+                        help='Shorten probes for absent patterns based on how long patterns took to appear before',
+                        action='store_true')
     if iris_args is None:
         iris_args = parser.parse_args()
 
@@ -0,0 +1,258 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import json
+import logging
+import os
+
+import cv2
+import numpy as np
+
+from core_helper import IrisCore
+from iris.api.core.pattern import _apply_scale, _parse_name
+from iris.api.core.settings import DEFAULT_MIN_SIMILARITY
+from parse_args import parse_args
+
+logger = logging.getLogger(__name__)
+
+LARGE_NEEDLE_AREA = 150 * 150
+LARGE_NEEDLE_SIDE = 400
+MIN_CROP_SIDE = 8
+CROP_FRACTIONS = [0.25, 0.5, 0.75]
+MAX_PEAKS = 10
+REPORT_FILENAME = 'pattern_report.json'
+OPTIMIZED_DIRECTORY = 'optimized_patterns'
+
+
+def _is_uniform(pixels):
+    """Checks if a row or column of pixels has a single color."""
+    return bool(np.all(pixels == pixels[0]))
+
+
+def trim_uniform_borders(image):
+    """Removes the uniformly colored rows and columns surrounding a needle.
+
+    :param image: Needle as BGR numpy array.
+    :return: Pair of trimmed image and a dict with the number of pixels removed from each side.
+    """
+    height, width = image.shape[:2]
+    top, bottom, left, right = 0, height, 0, width
+
+    while bottom - top > MIN_CROP_SIDE and _is_uniform(image[top, left:right]):
+        top += 1
+    while bottom - top > MIN_CROP_SIDE and _is_uniform(image[bottom - 1, left:right]):
+        bottom -= 1
+    while right - left > MIN_CROP_SIDE and _is_uniform(image[top:bottom, left]):
+        left += 1
+    while right - left > MIN_CROP_SIDE and _is_uniform(image[top:bottom, right - 1]):
+        right -= 1
+
+    trim = {'top': top, 'bottom': height - bottom, 'left': left, 'right': width - right}
+    return image[top:bottom, left:right], trim
+
+
+def find_peaks(needle, haystack, precision):
+    """Finds the distinct match positions of a needle, best first.
+
+    :param needle: Grayscale needle as numpy array.
+    :param haystack: Grayscale haystack as numpy array.
+    :param float precision: Min similarity for a position to count as a match.
+    :return: Pair of (list of (score, (x, y)) above precision, best score of any non-matching position).
+    """
+    res = cv2.matchTemplate(haystack, needle, cv2.TM_CCOEFF_NORMED)
+    h, w = needle.shape[:2]
+    peaks = []
+    rival = -1.0
+    for i in range(MAX_PEAKS + 1):
+        min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(res)
+        if max_val < precision or len(peaks) == MAX_PEAKS:
+            rival = max_val
+            break
+        peaks.append((max_val, max_loc))
+        x, y = max_loc
+        res[max(0, y - h // 2):y + h // 2 + 1, max(0, x - w // 2):x + w // 2 + 1] = -1.0
+    return peaks, float(rival)
+
+
+def _load_references(directory):
+    references = []
+    if directory is None or not os.path.isdir(directory):
+        return references
+    for file_name in sorted(os.listdir(directory)):
+        if file_name.lower().endswith(('.png', '.jpg', '.bmp')):
+            image = cv2.imread(os.path.join(directory, file_name), cv2.IMREAD_GRAYSCALE)
+            if image is not None:
+                references.append((file_name, image))
+    return references
+
+
+def _list_pattern_files(root):
+    result = []
+    for path, dirs, files in os.walk(root):
+        if 'images' not in path.split(os.sep):
+            continue
+        for file_name in files:
+            if file_name.endswith('.png'):
+                result.append(os.path.join(path, file_name))
+    return sorted(result)
+
+
+def suggest_similarity(present_scores, rival_scores):
+    """Picks a similarity value halfway between the weakest true match and the strongest false one.
+
+    :param list present_scores: Best scores on references where the pattern was found.
+    :param list rival_scores: Scores of every other candidate position.
+    :return: Pair of suggested similarity (or None if the scores overlap) and margin.
+    """
+    if len(present_scores) == 0:
+        return None, None
+    weakest = min(present_scores)
+    strongest_rival = max(rival_scores) if len(rival_scores) else 0.0
+    margin = weakest - strongest_rival
+    if margin <= 0:
+        return None, round(margin, 3)
+    similarity = min(0.99, int((weakest + strongest_rival) / 2 * 100) / 100.0)
+    return similarity, round(margin, 3)
+
+
+def _crop_is_distinctive(crop, offset, hits, references, similarity):
+    for ref_index, (x, y, w, h) in hits:
+        peaks, rival = find_peaks(crop, references[ref_index][1], similarity)
+        if len(peaks) != 1:
+            return False
+        px, py = peaks[0][1]
+        if abs(px - offset[0] - x) > 1 or abs(py - offset[1] - y) > 1:
+            return False
+    return True
+
+
+def suggest_crop(needle, hits, references, similarity):
+    """Finds the smallest centered crop that is still matched once, in the same place, on every reference.
+
+    :param needle: Grayscale needle as numpy array.
+    :param hits: List of (reference index, (x, y, w, h)) where the full needle was found.
+    :param references: List of (name, grayscale image).
+    :param float similarity: Similarity the crop has to satisfy.
+    :return: Crop as [x, y, width, height] in needle coordinates, or None.
+    """
+    if len(hits) == 0:
+        return None
+    height, width = needle.shape[:2]
+    for fraction in CROP_FRACTIONS:
+        crop_w = max(MIN_CROP_SIDE, int(width * fraction))
+        crop_h = max(MIN_CROP_SIDE, int(height * fraction))
+        if crop_w >= width and crop_h >= height:
+            continue
+        crop_w, crop_h = min(crop_w, width), min(crop_h, height)
+        x, y = (width - crop_w) // 2, (height - crop_h) // 2
+        crop = needle[y:y + crop_h, x:x + crop_w]
+        if _crop_is_distinctive(crop, (x, y), hits, references, similarity):
+            return [x, y, crop_w, crop_h]
+    return None
+
+
+def analyze_pattern(path, references, precision=DEFAULT_MIN_SIMILARITY):
+    """Collects size, border, ambiguity and similarity details for a single pattern image.
+
+    :param str path: Path to the pattern image.
+    :param references: List of (name, grayscale image) screenshots.
+    :param float precision: Similarity used by Iris when searching the pattern.
+    :return: Pair of analysis dict and trimmed image, or None if the image can't be read.
+    """
+    raw = cv2.imread(path)
+    if raw is None:
+        return None
+
+    name, scale = _parse_name(os.path.basename(path))
+    trimmed, trim = trim_uniform_borders(raw)
+    needle = cv2.cvtColor(_apply_scale(scale, raw), cv2.COLOR_BGR2GRAY)
+    height, width = needle.shape[:2]
+
+    result = {'path': path, 'name': name, 'scale': scale, 'width': width, 'height': height,
+              'area': width * height, 'trim': trim, 'trimmed': any(trim.values()),
+              'large': width * height > LARGE_NEEDLE_AREA or max(width, height) > LARGE_NEEDLE_SIDE,
+              'matches': {}, 'ambiguous': False, 'similarity': None, 'margin': None, 'crop': None}
+
+    if trim['left'] != trim['right'] or trim['top'] != trim['bottom']:
+        # Clicks target the needle center, so asymmetric trimming needs a compensating target_offset.
+        result['center_shift'] = [(trim['left'] - trim['right']) / 2.0, (trim['top'] - trim['bottom']) / 2.0]
+
+    present_scores, rival_scores, hits = [], [], []
+    for index, (ref_name, ref_image) in enumerate(references):
+        if ref_image.shape[0] < height or ref_image.shape[1] < width:
+            continue
+        peaks, rival = find_peaks(needle, ref_image, precision)
+        result['matches'][ref_name] = len(peaks)
+        rival_scores.append(rival)
+        if len(peaks) > 0:
+            present_scores.append(peaks[0][0])
+            rival_scores.extend([score for score, location in peaks[1:]])
+            hits.append((index, (peaks[0][1][0], peaks[0][1][1], width, height)))
+        if len(peaks) > 1:
+            result['ambiguous'] = True
+
+    result['similarity'], result['margin'] = suggest_similarity(present_scores, rival_scores)
+    if result['similarity'] is not None and not result['ambiguous']:
+        result['crop'] = suggest_crop(needle, hits, references, result['similarity'])
+
+    return result, trimmed
+
+
+def _write_optimized_copy(path, image, root, output_dir):
+    target = os.path.join(output_dir, os.path.relpath(path, root))
+    if not os.path.exists(os.path.dirname(target)):
+        os.makedirs(os.path.dirname(target))
+    cv2.imwrite(target, image)
+    return target
+
+
+def optimize_patterns(root=None, references_dir=None, rewrite=False):
+    """Analyzes every pattern image in the project and writes a JSON report to the working directory.
+
+    :param str root: Directory scanned for pattern images. Defaults to the Iris package.
+    :param str references_dir: Directory with reference screenshots. Without it, only size and border checks run.
+    :param bool rewrite: Save trimmed copies of the images under the working directory.
+    :return: Path of the written report.
+    """
+    if root is None:
+        root = os.path.join(IrisCore.get_module_dir(), 'iris')
+    if references_dir is None:
+        references_dir = parse_args().references
+
+    references = _load_references(references_dir)
+    if len(references) == 0:
+        logger.warning('No reference screenshots found, skipping ambiguity and similarity checks.')
+
+    output_dir = os.path.join(IrisCore.get_working_dir(), OPTIMIZED_DIRECTORY)
+    patterns = []
+    pattern_files = _list_pattern_files(root)
+    logger.info('Analyzing %s pattern(s) against %s reference screenshot(s).' % (len(pattern_files),
+                                                                                 len(references)))
+    for path in pattern_files:
+        analysis = analyze_pattern(path, references)
+        if analysis is None:
+            logger.warning('Unable to read image: %s' % path)
+            continue
+        result, trimmed = analysis
+        if rewrite and result['trimmed']:
+            result['optimized_path'] = _write_optimized_copy(path, trimmed, root, output_dir)
+        patterns.append(result)
+
+    summary = {'total': len(patterns),
+               'references': [name for name, image in references],
+               'trimmable': len([p for p in patterns if p['trimmed']]),
+               'large': len([p for p in patterns if p['large']]),
+               'ambiguous': len([p for p in patterns if p['ambiguous']]),
+               'croppable': len([p for p in patterns if p['crop'] is not None]),
+               'total_area': sum([p['area'] for p in patterns])}
+
+    report_path = os.path.join(IrisCore.get_working_dir(), 'data', REPORT_FILENAME)
+    with open(report_path, 'w') as f:
+        json.dump({'summary': summary, 'patterns': patterns}, f, sort_keys=True, indent=True)
+
+    logger.info('Patterns: %s, trimmable: %s, large: %s, ambiguous: %s, croppable: %s' %
+                (summary['total'], summary['trimmable'], summary['large'], summary['ambiguous'],
+                 summary['croppable']))
+    logger.info('Pattern report saved to: %s' % report_path)
+    return report_path
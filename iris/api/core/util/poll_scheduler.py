@@ -0,0 +1,98 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import time
+
+from interrupt_watcher import handle_interrupts
+from iris.api.core.settings import Settings, DEFAULT_POLL_BACKOFF, DEFAULT_POLL_MIN_INTERVAL
+
+
+class PollScheduler(object):
+    """Paces the attempts of a polling loop until a deadline.
+
+    Attempts start close together and the pause between them grows by the backoff factor up to
+    1 / Settings.wait_scan_rate. The time an attempt took is deducted from the next pause, but there is always a
+    pause of at least min_interval so polling never takes a whole core. The last attempt is scheduled to end at
+    the deadline, so a state reached just before the timeout is still seen.
+
+    With a wait_for_change function, such as the one returned by damage_monitor.get_change_waiter, attempts are
+    skipped until the screen changes.
+
+    Before every attempt, the handlers of the interrupt watchers whose pattern showed up are run.
+
+    Usage:
+        scheduler = PollScheduler(timeout)
+        while scheduler.next_attempt():
+            ...
+    """
+
+    def __init__(self, timeout=None, min_interval=DEFAULT_POLL_MIN_INTERVAL, max_interval=None,
+                 backoff=DEFAULT_POLL_BACKOFF, sleep=time.sleep, wait_for_change=None):
+        """
+        :param timeout: Number as maximum waiting time in seconds.
+        :param min_interval: Shortest pause between two attempts, in seconds.
+        :param max_interval: Longest pause between two attempts, in seconds.
+        :param backoff: Factor applied to the pause after every attempt.
+        :param sleep: Function called with the number of seconds to pause. It may return early.
+        :param wait_for_change: Function called with the start time of the last attempt and a timeout. Returns the
+        list of areas changed since then, empty if nothing changed, or None if it can't tell.
+        """
+        if timeout is None:
+            timeout = Settings.auto_wait_timeout
+        if max_interval is None:
+            max_interval = 1 / float(Settings.wait_scan_rate)
+
+        self._min_interval = min_interval
+        self._max_interval = max(min_interval, max_interval)
+        self._backoff = backoff
+        self._sleep = sleep
+        self._wait_for_change = wait_for_change
+        self._deadline = time.time() + timeout
+        self._interval = min_interval
+        self._attempt_start = None
+        self._is_final = False
+        self.attempts = 0
+        self.last_cost = 0
+
+    def remaining(self):
+        """Returns the number of seconds left before the deadline."""
+        return max(0, self._deadline - time.time())
+
+    def next_attempt(self):
+        """Waits until the next attempt is due.
+
+        :return: True if another attempt should be made, False once the deadline has been covered.
+        """
+        now = time.time()
+        if self._attempt_start is None:
+            return self._start_attempt()
+
+        self.last_cost = now - self._attempt_start
+        remaining = self._deadline - now
+        if self._is_final or remaining <= 0:
+            return False
+
+        delay = max(self._min_interval, self._interval - self.last_cost)
+        self._interval = min(self._max_interval, self._interval * self._backoff)
+        if delay + self.last_cost + self._min_interval >= remaining:
+            # Too close to the deadline for another full pause: make the final attempt end right at it.
+            delay = max(0, remaining - self.last_cost)
+            self._is_final = True
+
+        if delay > 0:
+            self._sleep(delay)
+
+        if self._wait_for_change is not None and not self._is_final:
+            timeout = max(0, self._deadline - time.time() - self.last_cost)
+            changed_areas = self._wait_for_change(self._attempt_start, timeout)
+            if changed_areas is not None and len(changed_areas) == 0:
+                # Nothing changed until the deadline, make the final attempt.
+                self._is_final = True
+        return self._start_attempt()
+
+    def _start_attempt(self):
+        handle_interrupts()
+        self.attempts += 1
+        self._attempt_start = time.time()
+        return True
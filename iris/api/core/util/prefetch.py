@@ -0,0 +1,145 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import logging
+import threading
+import time
+
+from core_helper import IrisCore
+from damage_monitor import get_change_waiter, get_damage_getter
+from input_events import add_input_listener, get_last_input_time
+from iris.api.core.settings import Settings
+from poll_scheduler import PollScheduler
+
+logger = logging.getLogger(__name__)
+
+# Prefetched results older than this are not used, the UI may have changed without any input, e.g. a menu that
+# closes on a timer.
+RESULT_TTL = 1
+
+_results = {}
+_jobs = []
+_lock = threading.Lock()
+
+
+class _PrefetchJob(object):
+    """Targets searched by a prefetch worker. Targets whose result was asked for are no longer searched."""
+
+    def __init__(self, keys):
+        self.keys = keys
+        self.cancelled = set()
+        self.stopped = threading.Event()
+
+    def cancel(self, key):
+        if key in self.keys:
+            self.cancelled.add(key)
+            if len(self.cancelled) == len(set(self.keys)):
+                self.stopped.set()
+
+
+def _get_key(target, region, match_case=True):
+    area = None if region is None else (region.x, region.y, region.width, region.height)
+    if isinstance(target, str):
+        return 'text', target, match_case, area
+    return target.get_file_path(), target.similarity, area
+
+
+def _clear_results():
+    # Results of captures made before an input are never used.
+    with _lock:
+        _results.clear()
+
+
+add_input_listener(_clear_results)
+
+
+def get_prefetched(target, region=None, match_case=True):
+    """Returns the prefetched result of a search, if it was captured after the last input and less than RESULT_TTL
+    seconds ago.
+
+    The caller searches by itself from now on, so the target is no longer prefetched and its result is only
+    returned once.
+
+    :param target: String or Pattern.
+    :param region: Region object the search is made in.
+    :param match_case: Match case of text searches.
+    :return: Location for Pattern, match dict for text, or None.
+    """
+    with _lock:
+        if len(_results) == 0 and len(_jobs) == 0:
+            return None
+        key = _get_key(target, region, match_case)
+        for job in _jobs:
+            job.cancel(key)
+        entry = _results.pop(key, None)
+    if entry is None or entry[1] <= get_last_input_time() or time.time() - entry[1] > RESULT_TTL:
+        return None
+    logger.debug('Using prefetched result for %s.' % (target if isinstance(target, str) else target.get_filename()))
+    return entry[0]
+
+
+def _prefetch_worker(job, targets, region, timeout, test_name):
+    # Imported here since image_search and ocr_search depend on this module.
+    from image_search import SearchState, image_search
+    from ocr_search import text_search_by
+
+    IrisCore.set_test_name(test_name)
+    states = dict((index, SearchState(get_damage_getter(region))) for index in range(len(targets)))
+    scheduler = PollScheduler(timeout, sleep=job.stopped.wait, wait_for_change=get_change_waiter(region))
+    try:
+        while scheduler.next_attempt():
+            for index in list(states.keys()):
+                if job.keys[index] in job.cancelled:
+                    del states[index]
+            if len(states) == 0:
+                break
+            for index in sorted(states.keys()):
+                target = targets[index]
+                capture_time = time.time()
+                if isinstance(target, str):
+                    result = text_search_by(target, True, region)
+                else:
+                    result = image_search(target, region, states[index])
+                    if result.x == -1:
+                        result = None
+                if result is None:
+                    continue
+                with _lock:
+                    if job.keys[index] not in job.cancelled:
+                        _results[job.keys[index]] = result, capture_time
+                if capture_time > get_last_input_time():
+                    # Found in a capture made after the last input, the caller will get this result.
+                    del states[index]
+            if len(states) == 0:
+                break
+    except Exception as e:
+        logger.debug('Prefetch failed: %s' % e)
+    finally:
+        with _lock:
+            _jobs.remove(job)
+        IrisCore.set_test_name(None)
+
+
+def prefetch(targets, timeout=None, in_region=None):
+    """Start searching for Patterns or texts in the background, before they are waited for.
+
+    Typically used right before the input that makes them show up, like a click opening a menu. A later search for
+    one of the targets in the same region returns right away if it was found after the last input. Each target is
+    searched until it is found after the last input, until that search starts, or until the timeout expires.
+
+    :param targets: List of String or Pattern.
+    :param timeout: Number as maximum searching time in seconds.
+    :param in_region: Region object in order to minimize the area.
+    :return: None.
+    """
+    if timeout is None:
+        timeout = Settings.auto_wait_timeout
+    targets = list(targets)
+    job = _PrefetchJob([_get_key(target, in_region) for target in targets])
+    with _lock:
+        _jobs.append(job)
+    worker = threading.Thread(target=_prefetch_worker,
+                              args=(job, targets, in_region, timeout, IrisCore.get_test_name()))
+    worker.daemon = True
+    worker.start()
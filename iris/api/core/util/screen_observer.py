@@ -0,0 +1,168 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import logging
+import threading
+import time
+
+from core_helper import IrisCore
+from damage_monitor import get_change_waiter
+from frame_diff import count_changed_pixels
+from image_search import match_pattern_in_image
+from iris.api.core.location import Location
+from iris.api.core.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+# Longest wait for Damage notifications before checking if the observer was stopped.
+DAMAGE_CHECK_INTERVAL = 0.25
+
+
+class ObserveEvent(object):
+    """Event passed to the handlers registered on a Region observer."""
+    CHANGE = 'CHANGE'
+    APPEAR = 'APPEAR'
+    VANISH = 'VANISH'
+
+    def __init__(self, event_type, region, pattern=None, location=None, changed_pixels=0):
+        self.type = event_type
+        self.region = region
+        self.pattern = pattern
+        self.location = location
+        self.changed_pixels = changed_pixels
+        self.time = time.time()
+
+
+class _ObserveHandler(object):
+    def __init__(self, event_type, handler, pattern=None, min_changed_pixels=None):
+        self.type = event_type
+        self.handler = handler
+        self.pattern = pattern
+        self.min_changed_pixels = min_changed_pixels
+        self.visible = None
+
+
+class RegionObserver(object):
+    """Watches a Region with frame differencing and calls handlers on change, appear and vanish events.
+
+    Frames are captured at Settings.observe_scan_rate. Patterns are only matched again when at least
+    Settings.observe_min_changed_pixels pixels changed since the previous frame.
+    """
+
+    def __init__(self, region):
+        self._region = region
+        self._handlers = []
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._previous = None
+
+    def add_handler(self, event_type, handler, pattern=None, min_changed_pixels=None):
+        with self._lock:
+            self._handlers.append(_ObserveHandler(event_type, handler, pattern, min_changed_pixels))
+
+    def remove_handlers(self):
+        with self._lock:
+            self._handlers = []
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def observe(self, timeout=None):
+        """Observe the region until the timeout expires or stop() is called.
+
+        :param timeout: Number of seconds to observe. None observes until stopped.
+        :return: None.
+        """
+        self._stop_event.clear()
+        end_time = None if timeout is None else time.time() + timeout
+        self._previous = None
+
+        while not self._stop_event.is_set():
+            start = time.time()
+            if end_time is not None and start >= end_time:
+                break
+            self._check_once()
+            interval = 1.0 / float(Settings.observe_scan_rate)
+            remaining = interval - (time.time() - start)
+            if end_time is not None:
+                remaining = min(remaining, end_time - time.time())
+            if remaining > 0:
+                self._stop_event.wait(remaining)
+            self._wait_for_damage(start, end_time)
+
+    def _wait_for_damage(self, since, end_time):
+        """With X11 Damage notifications, skip captures until pixels of the region change."""
+        wait_for_change = get_change_waiter(self._region)
+        if wait_for_change is None:
+            return
+        while not self._stop_event.is_set():
+            timeout = DAMAGE_CHECK_INTERVAL
+            if end_time is not None:
+                timeout = min(timeout, end_time - time.time())
+                if timeout <= 0:
+                    return
+            changed_areas = wait_for_change(since, timeout)
+            if changed_areas is None or len(changed_areas) > 0:
+                return
+
+    def observe_in_background(self, timeout=None):
+        """Start observing in a daemon thread."""
+        if self.is_running():
+            return
+        self._thread = threading.Thread(target=self.observe, args=(timeout,))
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+
+    def _check_once(self):
+        frame = IrisCore.get_frame(self._region)
+        image = None
+        current = frame.gray
+        changed = count_changed_pixels(self._previous, current)
+        is_first_frame = self._previous is None
+        self._previous = current
+
+        with self._lock:
+            handlers = list(self._handlers)
+
+        for item in handlers:
+            threshold = item.min_changed_pixels or Settings.observe_min_changed_pixels
+            if is_first_frame:
+                should_match = item.type != ObserveEvent.CHANGE
+            else:
+                should_match = changed >= threshold
+
+            if not should_match:
+                continue
+
+            if item.type == ObserveEvent.CHANGE:
+                self._fire(item, ObserveEvent(ObserveEvent.CHANGE, self._region, changed_pixels=changed))
+                continue
+
+            if image is None:
+                image = frame.get_image()
+            location = match_pattern_in_image(item.pattern, image)
+            visible = location.x != -1
+            was_visible = item.visible
+            item.visible = visible
+
+            if visible and not was_visible and item.type == ObserveEvent.APPEAR:
+                screen_location = Location(location.x + self._region.x, location.y + self._region.y)
+                self._fire(item, ObserveEvent(ObserveEvent.APPEAR, self._region, item.pattern, screen_location,
+                                              changed))
+            elif not visible and was_visible and item.type == ObserveEvent.VANISH:
+                self._fire(item, ObserveEvent(ObserveEvent.VANISH, self._region, item.pattern, None, changed))
+
+    @staticmethod
+    def _fire(item, event):
+        try:
+            item.handler(event)
+        except Exception as e:
+            logger.error('Observer handler for %s event failed: %s' % (event.type, e))
@@ -0,0 +1,256 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import Queue
+import collections
+import logging
+import multiprocessing
+import threading
+import time
+
+from core_helper import IrisCore, get_os
+from damage_monitor import get_change_waiter, get_damage_getter
+from display_geometry import get_display_geometry
+from frame_store import FrameStore
+from iris.api.core.location import Location
+from iris.api.core.platform import Platform
+from iris.api.core.settings import Settings, INLINE_SEARCH, PROCESS_SEARCH, THREAD_SEARCH
+from poll_scheduler import PollScheduler
+
+logger = logging.getLogger(__name__)
+
+CANCEL_SLOTS = 64
+FINAL_RESULT_TIMEOUT = 2
+
+# Result of an attempt that failed with an error, which answers neither positive nor negative searches.
+WORKER_ERROR = object()
+
+SearchArea = collections.namedtuple('SearchArea', ['x', 'y', 'width', 'height'])
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _to_search_area(region):
+    if region is None:
+        return None
+    return SearchArea(region.x, region.y, region.width, region.height)
+
+
+def _to_result(x, y):
+    return WORKER_ERROR if x is None else Location(x, y)
+
+
+def _search_worker(tasks, results, cancelled, store=None):
+    """Worker loop: takes search tasks from the queue until it receives None.
+
+    Tasks of process workers carry the sequence number of the frame to search in the FrameStore. Thread workers
+    capture their region themselves.
+    """
+    # Imported here since image_search depends on this module.
+    from image_search import SearchState, image_search
+    from iris.api.core.pattern import Pattern
+
+    patterns = {}
+    states = {}
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        job_id, path, similarity, area, test_name, module, frame_ref = task
+        if cancelled[job_id % CANCEL_SLOTS] == job_id:
+            continue
+
+        if job_id not in states:
+            states = {job_id: SearchState(get_damage_getter(area))}
+
+        # Debug images are saved in the directory of the test that submitted the search.
+        IrisCore.set_test_name(test_name)
+        if module != IrisCore.get_current_module():
+            IrisCore.set_current_module(module)
+        try:
+            key = (path, similarity)
+            if key not in patterns:
+                patterns[key] = Pattern(None, from_path=path).similar(similarity)
+            screen_frame = None if frame_ref is None else store.get_frame(frame_ref)
+            location = image_search(patterns[key], area, states[job_id], screen_frame)
+            if screen_frame is not None and not store.is_current(frame_ref):
+                # The slot was reused for a newer frame while searching, search a new capture instead.
+                states[job_id] = SearchState(get_damage_getter(area))
+                location = image_search(patterns[key], area, states[job_id])
+            results.put((job_id, location.x, location.y))
+        except Exception as e:
+            logger.warning('Search worker failed: %s' % e)
+            results.put((job_id, None, None))
+        finally:
+            IrisCore.set_test_name(None)
+
+
+class SearchPool(object):
+    """Long-lived pool of image search workers, shared by all polling searches of a run.
+
+    Waiters submit one attempt per polling tick. As soon as a waiter has its answer, the remaining attempts of
+    its job are cancelled: queued ones are skipped and results of running ones are discarded.
+
+    For process workers, the screen is captured once per attempt by the waiter and published to a shared memory
+    FrameStore, so parallel attempts search the frames the waiter saw, without pickling images.
+    """
+
+    def __init__(self, strategy, workers):
+        if strategy == PROCESS_SEARCH and get_os() == Platform.WINDOWS:
+            logger.warning('Process search workers are not supported on Windows, using threads.')
+            strategy = THREAD_SEARCH
+
+        self.strategy = strategy
+        self.workers = max(1, workers)
+        self._cancelled = multiprocessing.Array('l', [-1] * CANCEL_SLOTS, lock=False)
+        self._job_counter = 0
+        self._lock = threading.Lock()
+        self._mailbox = {}
+        self._active_jobs = set()
+
+        self._store = None
+        if strategy == PROCESS_SEARCH:
+            geometry = get_display_geometry()
+            self._store = FrameStore(geometry.screenshot_width, geometry.screenshot_height, self.workers + 2)
+            self._tasks = multiprocessing.Queue()
+            self._results = multiprocessing.Queue()
+            worker_type = multiprocessing.Process
+        else:
+            self._tasks = Queue.Queue()
+            self._results = Queue.Queue()
+            worker_type = threading.Thread
+
+        self._workers = []
+        for i in range(self.workers):
+            worker = worker_type(target=_search_worker,
+                                 args=(self._tasks, self._results, self._cancelled, self._store))
+            worker.daemon = True
+            worker.start()
+            self._workers.append(worker)
+        logger.debug('Started %s %s search worker(s).' % (self.workers, strategy))
+
+    def _new_job(self):
+        with self._lock:
+            self._job_counter += 1
+            self._active_jobs.add(self._job_counter)
+            self._mailbox[self._job_counter] = []
+            return self._job_counter
+
+    def _cancel(self, job_id):
+        self._cancelled[job_id % CANCEL_SLOTS] = job_id
+        with self._lock:
+            self._active_jobs.discard(job_id)
+            self._mailbox.pop(job_id, None)
+
+    def _next_result(self, job_id, timeout):
+        """Returns the next result of a job: Location, WORKER_ERROR, or None if nothing arrived within the timeout."""
+        end_time = time.time() + timeout
+        while True:
+            with self._lock:
+                if len(self._mailbox.get(job_id, [])):
+                    return self._mailbox[job_id].pop(0)
+            remaining = end_time - time.time()
+            if remaining <= 0:
+                return None
+            try:
+                result_job, x, y = self._results.get(True, min(remaining, 0.05))
+            except Queue.Empty:
+                continue
+            if result_job == job_id:
+                return _to_result(x, y)
+            with self._lock:
+                if result_job in self._active_jobs:
+                    self._mailbox[result_job].append(_to_result(x, y))
+
+    def search(self, pattern, region, negative, timeout=None):
+        """Poll for a pattern (or its absence) using the pool workers.
+
+        :param Pattern pattern: Searched image.
+        :param Region region: Region object.
+        :param bool negative: Wait for the pattern to be absent instead of present.
+        :param timeout: Number as maximum waiting time in seconds.
+        :return: Location of the match (Location(-1, -1) for negative searches) or None on timeout.
+        """
+        job_id = self._new_job()
+        task = (job_id, pattern.get_file_path(), pattern.similarity, _to_search_area(region),
+                IrisCore.get_test_name(), IrisCore.get_current_module())
+        found = []
+
+        def submit():
+            frame_ref = None
+            if self._store is not None:
+                # Full screen at native resolution, cropped to the region by the worker.
+                frame_ref = self._store.publish(IrisCore.get_frame(for_ocr=True))
+            self._tasks.put(task + (frame_ref,))
+        pending = [0]
+
+        def collect(seconds, drain=False):
+            # Waits for results instead of sleeping, returning early only when the answer is known.
+            end_time = time.time() + seconds
+            while len(found) == 0:
+                remaining = end_time - time.time()
+                if remaining <= 0:
+                    return
+                if pending[0] == 0:
+                    if not drain:
+                        time.sleep(remaining)
+                    return
+                location = self._next_result(job_id, remaining)
+                if location is None:
+                    return
+                pending[0] -= 1
+                if location is WORKER_ERROR:
+                    continue
+                if (location.x == -1) == negative:
+                    found.append(location)
+
+        scheduler = PollScheduler(timeout, sleep=collect, wait_for_change=get_change_waiter(region))
+        try:
+            while len(found) == 0 and scheduler.next_attempt():
+                if len(found) == 0 and pending[0] < self.workers:
+                    submit()
+                    pending[0] += 1
+            # Give the attempts still running, including the one made at the deadline, a chance to report.
+            collect(FINAL_RESULT_TIMEOUT, drain=True)
+            return found[0] if len(found) else None
+        finally:
+            self._cancel(job_id)
+
+    def shutdown(self):
+        for i in range(len(self._workers)):
+            self._tasks.put(None)
+        for worker in self._workers:
+            worker.join(1)
+            if isinstance(worker, multiprocessing.Process) and worker.is_alive():
+                worker.terminate()
+        self._workers = []
+
+
+def start_search_pool():
+    """Starts the search pool of the run, unless Settings.search_strategy asks for inline searches.
+
+    The pool is kept for the whole run, later changes of the search settings don't apply to it. Process workers
+    are forked, so this has to be called before background threads start.
+
+    :return: None.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None or Settings.search_strategy == INLINE_SEARCH:
+            return
+        _pool = SearchPool(Settings.search_strategy, Settings.search_workers)
+
+
+def get_search_pool():
+    """Returns the search pool of the run, None if it wasn't started and searches run inline."""
+    return _pool
+
+
+def shutdown_search_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
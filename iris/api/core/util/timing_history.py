@@ -0,0 +1,128 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import json
+import logging
+import os
+import threading
+
+from core_helper import IrisCore
+from iris.api.core.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+HISTORY_FILENAME = 'pattern_timings.json'
+MIN_SAMPLES = 10
+MAX_SAMPLES = 200
+EXPECTED_QUANTILE = 0.999
+ADAPTIVE_FACTOR = 1.5
+ADAPTIVE_MIN_TIMEOUT = 0.5
+WARN_FACTOR = 3
+ANY_TEST = '*'
+
+_history = None
+_lock = threading.Lock()
+
+
+def _get_history_path():
+    return os.path.join(IrisCore.get_working_dir(), 'data', HISTORY_FILENAME)
+
+
+def _load_history():
+    global _history
+    if _history is None:
+        _history = {}
+        path = _get_history_path()
+        if os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    _history = json.load(f)
+            except (IOError, ValueError) as e:
+                logger.warning('Unable to read pattern timings from %s: %s' % (path, e))
+    return _history
+
+
+def _get_samples(name, test_name):
+    """Samples of a pattern for a test, or for all tests if the test doesn't have enough of them."""
+    pattern_history = _load_history().get(name, {})
+    samples = pattern_history.get(test_name, [])
+    if len(samples) < MIN_SAMPLES:
+        samples = [value for values in pattern_history.values() for value in values]
+    return samples
+
+
+def _get_quantile(samples, quantile):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(quantile * len(ordered)))]
+
+
+def get_expected_time(name, test_name=None):
+    """Longest time a pattern is expected to take to appear, based on the recorded history.
+
+    :param str name: Pattern file name.
+    :param str test_name: Test the pattern is searched in. Defaults to the running test.
+    :return: EXPECTED_QUANTILE of the recorded times in seconds, or None without enough history.
+    """
+    if test_name is None:
+        test_name = IrisCore.get_test_name() or ANY_TEST
+    with _lock:
+        samples = _get_samples(name, test_name)
+    if len(samples) < MIN_SAMPLES:
+        return None
+    return _get_quantile(samples, EXPECTED_QUANTILE)
+
+
+def get_adaptive_timeout(name, timeout):
+    """Timeout for a probe that expects a pattern to be absent.
+
+    In adaptive mode, the timeout is the expected time to appear multiplied by ADAPTIVE_FACTOR, but never longer
+    than the timeout asked for.
+
+    :param str name: Pattern file name.
+    :param timeout: Timeout asked for, in seconds.
+    :return: Timeout in seconds.
+    """
+    if not Settings.adaptive_timeouts:
+        return timeout
+    expected = get_expected_time(name)
+    if expected is None:
+        return timeout
+    adaptive_timeout = min(timeout, max(ADAPTIVE_MIN_TIMEOUT, expected * ADAPTIVE_FACTOR))
+    if adaptive_timeout < timeout:
+        logger.debug('Adaptive timeout for %s: %.2f seconds instead of %s' % (name, adaptive_timeout, timeout))
+    return adaptive_timeout
+
+
+def record_wait_time(name, seconds):
+    """Records how long a pattern took to appear, and warns if it took far longer than usual.
+
+    :param str name: Pattern file name.
+    :param seconds: Time between the start of the wait and the match.
+    :return: None.
+    """
+    test_name = IrisCore.get_test_name() or ANY_TEST
+    expected = get_expected_time(name, test_name)
+    if expected is not None and seconds > max(ADAPTIVE_MIN_TIMEOUT, expected * WARN_FACTOR):
+        logger.warning('%s took %.2f seconds to appear, %s usually takes at most %.2f seconds.' %
+                       (name, seconds, name, expected))
+
+    with _lock:
+        samples = _load_history().setdefault(name, {}).setdefault(test_name, [])
+        samples.append(round(seconds, 3))
+        del samples[:-MAX_SAMPLES]
+
+
+def save_timing_history():
+    """Writes the recorded times to the working directory."""
+    with _lock:
+        if _history is None:
+            return
+        path = _get_history_path()
+        try:
+            if not os.path.exists(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            with open(path, 'w') as f:
+                json.dump(_history, f, sort_keys=True)
+        except IOError as e:
+            logger.warning('Unable to save pattern timings to %s: %s' % (path, e))
@@ -12,10 +12,12 @@ from iris.api.core.firefox_ui.toolbars import NavBar, SearchBar
 from iris.api.core.key import *
 from iris.api.core.region import *
 from iris.api.core.screen import get_screen
+from iris.api.core.util.display_geometry import get_display_geometry
 from iris.configuration.config_parser import *
 from keyboard_shortcuts import *
 
 logger = logging.getLogger(__name__)
+PROFILE_UNLOCK_TIMEOUT = 20
 
 
 def launch_firefox(path, profile=None, url=None, args=None):
@@ -61,6 +63,28 @@ def confirm_firefox_launch(app):
         logger.error(err)
         logger.error('Can\'t launch Firefox - aborting test run.')
         app.finish(code=1)
+    _select_firefox_screen(Pattern('iris_logo.png'))
+
+
+def _select_firefox_screen(pattern):
+    """Limits the searches to the monitor Firefox opened on, unless a screen was given on the command line.
+
+    :param pattern: Pattern shown by Firefox.
+    :return: None.
+    """
+    if Settings.screen is not None:
+        return
+    monitors = get_display_geometry().monitors
+    if len(monitors) < 2:
+        return
+    location = image_search(pattern)
+    if location.x == -1:
+        return
+    for screen_id, monitor in enumerate(monitors):
+        if monitor.x <= location.x < monitor.x + monitor.width and monitor.y <= location.y < monitor.y + monitor.height:
+            logger.debug('Firefox is on screen %s, searches are limited to it.' % screen_id)
+            Settings.screen = screen_id
+            return
 
 
 def confirm_firefox_quit(app):
@@ -146,9 +170,8 @@ def restart_firefox(path, profile, url, args=None, image=None):
         check_pattern = image
     try:
         wait_vanish(home_pattern, 10)
-        # TODO: This should be made into a robust function instead of a hard coded sleep.
         # Give Firefox a chance to cleanly shutdown all of its processes.
-        time.sleep(Settings.SYSTEM_DELAY)
+        wait_for_profile_unlock(profile)
         logger.debug('Relaunching Firefox with profile name \'%s\'' % profile)
         launch_firefox(path, profile, url, args)
         logger.debug('Confirming that Firefox has been relaunched.')
@@ -160,6 +183,49 @@ def restart_firefox(path, profile, url, args=None, image=None):
         raise APIHelperError('Firefox still around - cannot restart.')
 
 
+def _is_profile_locked(profile):
+    """Checks if a Firefox process still holds the lock of a profile.
+
+    :param profile: Path of the Firefox profile.
+    :return: True if the profile is in use.
+    """
+    if Settings.get_os() == Platform.WINDOWS:
+        # Firefox deletes the lock file when it releases it.
+        return os.path.exists(os.path.join(profile, 'parent.lock'))
+
+    # Imported here since it is not available on Windows.
+    import fcntl
+
+    try:
+        lock_file = os.open(os.path.join(profile, '.parentlock'), os.O_RDWR)
+    except OSError:
+        return False
+    try:
+        fcntl.lockf(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        fcntl.lockf(lock_file, fcntl.LOCK_UN)
+        return False
+    except IOError:
+        return True
+    finally:
+        os.close(lock_file)
+
+
+def wait_for_profile_unlock(profile, timeout=PROFILE_UNLOCK_TIMEOUT):
+    """Waits for the Firefox processes using a profile to exit and release its lock.
+
+    :param profile: Path of the Firefox profile.
+    :param timeout: Number as maximum waiting time in seconds.
+    :return: True if the profile was released.
+    """
+    end_time = time.time() + timeout
+    while _is_profile_locked(profile):
+        if time.time() > end_time:
+            logger.warning('Profile %s is still locked after %s seconds.' % (profile, timeout))
+            return False
+        time.sleep(0.1)
+    return True
+
+
 def get_menu_modifier():
     """Return the menu modifier."""
     if Settings.get_os() == Platform.MAC:
@@ -199,15 +265,15 @@ def change_preference(pref_name, value):
         select_location_bar()
         paste('about:config')
         type(Key.ENTER)
-        time.sleep(Settings.UI_DELAY)
+        wait_for_stable(timeout=Settings.UI_DELAY)
 
         type(Key.SPACE)
-        time.sleep(Settings.UI_DELAY)
+        wait_for_stable(timeout=Settings.UI_DELAY)
 
         paste(pref_name)
-        time.sleep(Settings.UI_DELAY_LONG)
+        wait_for_stable(timeout=Settings.UI_DELAY_LONG)
         type(Key.TAB)
-        time.sleep(Settings.UI_DELAY_LONG)
+        wait_for_stable(timeout=Settings.UI_DELAY_LONG)
 
         try:
             retrieved_value = copy_to_clipboard().split(';'[0])[1]
@@ -274,8 +340,9 @@ def click_hamburger_menu_option(option):
     except FindError:
         raise APIHelperError('Can\'t find the "hamburger menu" in the page, aborting test.')
     else:
+        region.prefetch([option], 10)
         click(hamburger_menu_pattern)
-        time.sleep(Settings.UI_DELAY)
+        region.wait_for_stable(timeout=Settings.UI_DELAY)
         try:
             region.wait(option, 10)
             logger.debug('Option found.')
@@ -289,13 +356,11 @@ def confirm_close_multiple_tabs():
     """Click confirm 'Close all tabs' for warning popup when multiple tabs are opened."""
     close_all_tabs_button_pattern = Pattern('close_all_tabs_button.png')
 
-    try:
-        wait(close_all_tabs_button_pattern, 5)
+    if exists(close_all_tabs_button_pattern, 5, expect_absent=True):
         logger.debug('"Close all tabs" warning popup found.')
         type(Key.ENTER)
-    except FindError:
+    else:
         logger.debug('Couldn\'t find the "Close all tabs" warning popup.')
-        pass
 
 
 def click_auxiliary_window_control(button):
@@ -395,7 +460,7 @@ def address_crash_reporter():
     """Close the popped up crash reporter."""
     # TODO: Only works on Mac and Windows until we can get Linux images.
     reporter_pattern = Pattern('crash_sorry.png')
-    if exists(reporter_pattern, 2):
+    if exists(reporter_pattern, 2, expect_absent=True):
         logger.debug('Crash Reporter found!')
         # Let crash stats know this is an Iris automation crash.
         click(reporter_pattern)
@@ -556,8 +621,9 @@ def create_region_for_hamburger_menu():
     hamburger_menu_pattern = NavBar.HAMBURGER_MENU
     try:
         wait(hamburger_menu_pattern, 10)
+        menu_region = create_region_from_image(hamburger_menu_pattern)
         click(hamburger_menu_pattern)
-        time.sleep(1)
+        menu_region.wait_for_stable(timeout=Settings.UI_DELAY)
         if Settings.get_os() == Platform.LINUX:
             quit_menu_pattern = Pattern('quit.png')
             return create_region_from_patterns(None, hamburger_menu_pattern, quit_menu_pattern, None, padding_right=20)
@@ -595,8 +661,7 @@ def restore_window_from_taskbar(option=None):
         type(text=Key.TAB, modifier=KeyModifier.ALT)
         if Settings.get_os() == Platform.LINUX:
             hover(Location(0, 50))
-    time.sleep(Settings.UI_DELAY)
-
+    wait_for_stable(timeout=Settings.UI_DELAY)
 
 
 def open_library_menu(option):
@@ -616,11 +681,11 @@ def open_library_menu(option):
     except FindError:
         raise APIHelperError('Can\'t find the library menu in the page, aborting test.')
     else:
-        time.sleep(Settings.UI_DELAY_LONG)
+        wait_for_stable(timeout=Settings.UI_DELAY_LONG)
+        region.prefetch([option], 10)
         click(library_menu_pattern)
-        time.sleep(Settings.FX_DELAY)
         try:
-            time.sleep(Settings.FX_DELAY)
+            region.wait_for_stable(timeout=2 * Settings.FX_DELAY)
             region.wait(option, 10)
             logger.debug('Option found.')
             region.click(option)
@@ -678,11 +743,13 @@ def access_bookmarking_tools(option):
     """
 
     bookmarking_tools_pattern = LibraryMenu.BookmarksOption.BOOKMARKING_TOOLS
+    prefetch([bookmarking_tools_pattern], 20)
     open_library_menu(LibraryMenu.BOOKMARKS_OPTION)
 
     try:
         wait(bookmarking_tools_pattern, 10)
         logger.debug('Bookmarking Tools option has been found.')
+        prefetch([option], 15)
         click(bookmarking_tools_pattern)
     except FindError:
         raise APIHelperError('Can\'t find the Bookmarking Tools option, aborting.')
@@ -799,7 +866,7 @@ def zoom_with_mouse_wheel(nr_of_times=1, zoom_type=None):
             pyautogui.keyUp('command')
         else:
             pyautogui.keyUp('ctrl')
-        time.sleep(Settings.UI_DELAY)
+        wait_for_stable(timeout=Settings.UI_DELAY)
     pyautogui.moveTo(0, 0)
 
 
@@ -884,15 +951,15 @@ def get_pref_value(pref_name):
     select_location_bar()
     paste('about:config')
     type(Key.ENTER)
-    time.sleep(Settings.UI_DELAY)
+    wait_for_stable(timeout=Settings.UI_DELAY)
 
     type(Key.SPACE)
-    time.sleep(Settings.UI_DELAY)
+    wait_for_stable(timeout=Settings.UI_DELAY)
 
     paste(pref_name)
-    time.sleep(Settings.UI_DELAY_LONG)
+    wait_for_stable(timeout=Settings.UI_DELAY_LONG)
     type(Key.TAB)
-    time.sleep(Settings.UI_DELAY_LONG)
+    wait_for_stable(timeout=Settings.UI_DELAY_LONG)
 
     try:
         value = copy_to_clipboard().split(';'[0])[1]
@@ -912,7 +979,7 @@ def get_support_info():
     select_location_bar()
     paste('about:support')
     type(Key.ENTER)
-    time.sleep(Settings.UI_DELAY)
+    wait_for_stable(timeout=Settings.UI_DELAY)
 
     try:
         click(copy_raw_data_to_clipboard)
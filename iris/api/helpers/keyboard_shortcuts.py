@@ -10,7 +10,7 @@ from iris.api.core.firefox_ui.menus import SidebarBookmarks
 from iris.api.core.firefox_ui.toolbars import LocationBar
 from iris.api.core.key import Key, KeyModifier, key_down, key_up, type
 from iris.api.core.pattern import Pattern
-from iris.api.core.region import Region, click, wait, wait_vanish
+from iris.api.core.region import Region, click, wait, wait_vanish, wait_for_stable
 from iris.api.core.settings import *
 from iris.api.core.util.image_search import get_image_size
 
@@ -73,7 +73,7 @@ def select_location_bar():
     else:
         type(text='l', modifier=KeyModifier.CTRL)
     # Wait to allow the location bar to become responsive.
-    time.sleep(Settings.UI_DELAY)
+    wait_for_stable(timeout=Settings.UI_DELAY)
 
 
 def reload_page():
@@ -423,7 +423,7 @@ def maximize_window():
     else:
         type(text=Key.UP, modifier=KeyModifier.CTRL + KeyModifier.META)
     # Wait to allow window to be maximized.
-    time.sleep(Settings.UI_DELAY)
+    wait_for_stable(timeout=Settings.UI_DELAY)
 
 
 def minimize_window():
@@ -435,7 +435,7 @@ def minimize_window():
     else:
         type(text=Key.DOWN, modifier=KeyModifier.CTRL + KeyModifier.META)
     # Wait to allow window to be minimized.
-    time.sleep(Settings.UI_DELAY)
+    wait_for_stable(timeout=Settings.UI_DELAY)
 
 
 def new_tab():
@@ -445,7 +445,7 @@ def new_tab():
     else:
         type(text='t', modifier=KeyModifier.CTRL)
     # Wait to allow new tab to be opened.
-    time.sleep(Settings.FX_DELAY)
+    wait_for_stable(timeout=Settings.FX_DELAY)
 
 
 def new_window():
@@ -558,7 +558,7 @@ def bookmark_all_tabs():
     else:
         type(text='d', modifier=KeyModifier.CTRL + KeyModifier.SHIFT)
     # Wait for the Bookmark All Tabs dialog to be opened.
-    time.sleep(Settings.UI_DELAY_LONG)
+    wait_for_stable(timeout=Settings.UI_DELAY_LONG)
 
 
 def bookmark_page():
@@ -4,6 +4,7 @@
 
 import traceback
 
+from api.core.util.expectation_pool import submit_expectation
 from api.helpers.results import *
 
 
@@ -60,6 +61,23 @@ def assert_true(test_case, actual, message):
     assert_equal(test_case, actual, True, message)
 
 
+def expect(test_case, what, message, within=None, in_region=None):
+    """Deferred assertion: checks in the background that a Pattern or text shows up within a time window.
+
+    The test goes on right away. The result is added to the test results when the test ends, and a failed
+    expectation fails the test.
+
+    :param test_case: Instance of BaseTest class.
+    :param what: String, Pattern or PatternSet.
+    :param message: Text message.
+    :param within: Number of seconds the target has to show up in. Defaults to Settings.auto_wait_timeout.
+    :param in_region: Region object in order to minimize the area.
+    :return: None.
+    """
+    stack = format_stack(traceback.extract_stack())
+    test_case.expectations.append(submit_expectation(what, message, within, in_region, stack))
+
+
 def assert_false(test_case, actual, message):
     """Call the assert_equal() method with expected result FALSE.
 
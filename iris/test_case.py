@@ -42,6 +42,9 @@ class BaseTest(object):
         """List of test results."""
         self.results = []
 
+        """List of deferred expect() assertions that are not verified yet."""
+        self.expectations = []
+
         """Test case's start time."""
         self.start_time = 0
 
@@ -103,8 +106,29 @@ class BaseTest(object):
     def get_results(self):
         """Setter for the test outcome property."""
         for result in self.results:
+            # Deferred expectations add results after failures, which must not turn the outcome back to passed.
+            if result.outcome == 'PASSED' and self.outcome in ('FAILED', 'ERROR'):
+                continue
             self.outcome = result.outcome
 
+    def verify_expectations(self):
+        """Waits for the deferred expect() assertions and adds their results.
+
+        :return: True if all of them passed.
+        """
+        all_passed = True
+        for expectation in self.expectations:
+            if expectation.wait():
+                self.add_results('PASSED', expectation.message, True, True, None)
+            else:
+                all_passed = False
+                error = expectation.stack
+                if expectation.error is not None:
+                    error = '%s%s: %s' % (error, expectation.error.__class__.__name__, expectation.error)
+                self.add_results('FAILED', expectation.message, False, True, print_error(error))
+        self.expectations = []
+        return all_passed
+
     def create_collection_test_rail_result(self):
         """Returns the test rail object."""
         test_rail_object = TestRailTests(self.meta, self.test_suite_id, self.blocked_by, self.test_case_id,
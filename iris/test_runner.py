@@ -66,6 +66,8 @@ def run(app):
             # Run the test logic.
             try:
                 current.run()
+                if not current.verify_expectations():
+                    raise AssertionError
                 passed += 1
             except AssertionError:
                 test_failures.append(module)
@@ -79,6 +81,8 @@ def run(app):
                 errors += 1
                 current.add_results('ERROR', None, None, None, print_error(traceback.format_exc()))
 
+            # Results of expectations still running when the test stopped.
+            current.verify_expectations()
             current.set_end_time(time.time())
             print_results(module, current)
             test_case_results.append(current.create_collection_test_rail_result())
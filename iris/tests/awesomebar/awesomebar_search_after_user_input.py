@@ -62,8 +62,9 @@ class Test(BaseTest):
         next_tab()
         time.sleep(DEFAULT_UI_DELAY_LONG)
 
-        expected = region.exists(twitter_search_results_localhost.similar(0.9), 5) or region.exists(
-            twitter_search_results_localhost_2, 5)
+        twitter_search_results = PatternSet([twitter_search_results_localhost.similar(0.9),
+                                             twitter_search_results_localhost_2])
+        expected = region.exists(twitter_search_results, 5)
         assert_true(self, expected, 'A new tab with \'Twitter\' search results for the searched string is opened.')
 
         # Type a partial part of the above address and perform a search, in the same tab, using an one-off .
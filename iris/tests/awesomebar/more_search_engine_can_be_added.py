@@ -124,7 +124,7 @@ class Test(BaseTest):
             except FindError:
                 raise FindError('Unchecked search engine not removed from the one-off searches bar.')
         else:
-            expected = exists(google_one_off_button_pattern.similar(0.9), 10)
+            expected = exists(google_one_off_button_pattern.similar(0.9), 10, expect_absent=True)
             assert_false(self, expected, 'Unchecked search engine successfully removed from the one-off searches bar.')
 
         # Add a new search engine.
@@ -176,8 +176,8 @@ class Test(BaseTest):
         assert_true(self, expected, 'Newly added search engine successfully found in the one-off searches bar.')
 
         if Settings.get_os() == Platform.MAC:
-            expected = exists(google_one_off_button_pattern.similar(0.9), 10)
+            expected = exists(google_one_off_button_pattern.similar(0.9), 10, expect_absent=True)
             assert_false(self, expected, 'Unchecked search engine is still removed from the one-off searches bar.')
         else:
-            expected = exists(google_one_off_button_pattern, 10)
+            expected = exists(google_one_off_button_pattern, 10, expect_absent=True)
             assert_false(self, expected, 'Unchecked search engine is still removed from the one-off searches bar.')
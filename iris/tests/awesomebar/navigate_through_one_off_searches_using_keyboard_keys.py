@@ -67,7 +67,7 @@ class Test(BaseTest):
         for i in range(10):
             type(Key.TAB)
 
-        expected = not exists(search_with_google_one_off_string_pattern, 10)
+        expected = not exists(search_with_google_one_off_string_pattern, 10, expect_absent=True)
         assert_true(self, expected, 'Navigation through search suggestions list 10 times does not get in focus the '
                                     '\'Google\' search engine. TAB navigation works only in search suggestions list.')
 
@@ -97,5 +97,5 @@ class Test(BaseTest):
             type(Key.DOWN)
             key_up(Key.ALT)
 
-        expected = not region.exists(settings_gear_highlighted_pattern, 10)
+        expected = not region.exists(settings_gear_highlighted_pattern, 10, expect_absent=True)
         assert_true(self, expected, 'Settings gear icon is not in focus.')
@@ -106,7 +106,7 @@ class Test(BaseTest):
             except FindError:
                 raise FindError('Unchecked search engine not removed from the one-off searches bar.')
         else:
-            expected = exists(google_one_off_button_pattern.similar(0.9), 10)
+            expected = exists(google_one_off_button_pattern.similar(0.9), 10, expect_absent=True)
             assert_false(self, expected, 'Unchecked search engine successfully removed from the one-off searches bar.')
 
         # Add a new search engine.
@@ -202,7 +202,7 @@ class Test(BaseTest):
                 raise FindError('The removed search engine from the one-off searches bar in previous Firefox version '
                                 'is not removed in the latest Firefox version.')
         else:
-            expected = exists(google_one_off_button_pattern.similar(0.9), 10)
+            expected = exists(google_one_off_button_pattern.similar(0.9), 10, expect_absent=True)
             assert_false(self, expected, 'The removed search engine from the one-off searches bar in previous Firefox '
                                          'version is still removed in the latest Firefox version.')
 
@@ -65,6 +65,7 @@ class Test(BaseTest):
 
         next_tab()
 
-        expected = exists(new_tab_twitter_search_results_pattern, 10) or exists(
-            new_tab_twitter_search_results_2_pattern, 5)
+        twitter_search_results = PatternSet([new_tab_twitter_search_results_pattern,
+                                             new_tab_twitter_search_results_2_pattern])
+        expected = exists(twitter_search_results, 10)
         assert_true(self, expected, 'A new tab with the Twitter search results is opened.')
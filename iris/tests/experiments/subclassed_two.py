@@ -39,7 +39,7 @@ class Test(SubclassedOne):
         self.test_vars()
 
         # We will confirm that we do not see the Amazon logo.
-        expected = exists(self.amazon_image, 5)
+        expected = exists(self.amazon_image, 5, expect_absent=True)
         assert_false(self, expected, 'Amazon image is not present')
 
         # We can continue to write test logic thereafter.
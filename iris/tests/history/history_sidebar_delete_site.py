@@ -60,5 +60,5 @@ class Test(BaseTest):
 
         # Check that Mozilla page is not displayed in the Recent History list.
         open_library_menu('History')
-        expected_6 = exists(LocalWeb.MOZILLA_BOOKMARK_SMALL.similar(0.9), 5)
+        expected_6 = exists(LocalWeb.MOZILLA_BOOKMARK_SMALL.similar(0.9), 5, expect_absent=True)
         assert_false(self, expected_6, 'Mozilla page is not displayed in the Recent History list.')
@@ -70,7 +70,7 @@ class Test(BaseTest):
 
         # Check that Mozilla page is not displayed in the Recent History list.
         open_library_menu('History')
-        expected_7 = exists(mozilla_bookmark_small_pattern.similar(0.9), 5)
+        expected_7 = exists(mozilla_bookmark_small_pattern.similar(0.9), 5, expect_absent=True)
         assert_false(self, expected_7, 'Mozilla page is not displayed in the Recent History list.')
         type(Key.ESC)
 
@@ -45,5 +45,5 @@ class Test(BaseTest):
         # Delete a time range from the History sidebar.
         right_click(expand_button_history_sidebar_pattern)
         type(text='d')
-        expected_4 = exists(expand_button_history_sidebar_pattern, 5)
+        expected_4 = exists(expand_button_history_sidebar_pattern, 5, expect_absent=True)
         assert_false(self, expected_4, 'Time range was deleted successfully from the history sidebar.')
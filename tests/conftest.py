@@ -0,0 +1,8 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import sys
+
+# Settings parse the command line of Iris when they are imported, so the arguments of pytest are dropped.
+sys.argv = sys.argv[:1]
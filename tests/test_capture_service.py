@@ -0,0 +1,71 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import time
+
+import numpy as np
+import pytest
+
+from iris.api.core.util import capture_service
+from iris.api.core.util.capture_service import CaptureService
+
+
+@pytest.fixture
+def grabs(monkeypatch):
+    grab_times = []
+
+    def grab_screen():
+        grab_times.append(time.time())
+        return np.full((4, 4, 3), len(grab_times) % 256, np.uint8)
+
+    monkeypatch.setattr(capture_service.IrisCore, 'grab_screen', staticmethod(grab_screen))
+    monkeypatch.setattr(capture_service, 'get_last_input_time', lambda: 0)
+    return grab_times
+
+
+@pytest.fixture
+def service():
+    services = []
+
+    def start(rate, buffer_size=4):
+        started = CaptureService(rate, buffer_size)
+        services.append(started)
+        started.start()
+        return started
+
+    yield start
+    for started in services:
+        started.stop()
+
+
+def test_ring_buffer_keeps_newest_frames(grabs, service):
+    capture = service(50, buffer_size=3)
+    time.sleep(0.3)
+
+    frames = capture.get_frames()
+    assert len(frames) == 3
+    assert [frame.time for frame in frames] == sorted(frame.time for frame in frames)
+    assert len(grabs) > 3
+
+
+def test_fresh_frame_is_shared(grabs, service):
+    capture = service(0.5)
+    first = capture.get_frame()
+
+    assert capture.get_frame() is first
+    assert len(grabs) == 1
+
+
+def test_consumer_wakes_the_capture_thread(grabs, service, monkeypatch):
+    capture = service(0.5)
+    first = capture.get_frame()
+    input_time = time.time()
+    monkeypatch.setattr(capture_service, 'get_last_input_time', lambda: input_time)
+
+    start = time.time()
+    frame = capture.get_frame()
+
+    assert frame is not first
+    assert frame.time >= input_time
+    assert time.time() - start < 1
@@ -0,0 +1,22 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+from iris.api.core.util.damage_monitor import DAMAGE_HISTORY_SIZE, DamageArea, DamageMonitor
+from iris.api.core.util.search_pool import SearchArea
+
+
+def test_damage_is_filtered_by_time_and_region():
+    monitor = DamageMonitor()
+    monitor._areas.extend([DamageArea(0, 0, 10, 10, 1), DamageArea(50, 50, 10, 10, 2), DamageArea(0, 0, 5, 5, 3)])
+
+    assert monitor.get_damage(since=2) == [DamageArea(50, 50, 10, 10, 2), DamageArea(0, 0, 5, 5, 3)]
+    assert monitor.get_damage(SearchArea(40, 40, 20, 20), 0) == [DamageArea(50, 50, 10, 10, 2)]
+
+
+def test_damage_is_unknown_once_dropped_from_history():
+    monitor = DamageMonitor()
+    monitor._areas.extend([DamageArea(0, 0, 1, 1, 10 + index) for index in range(DAMAGE_HISTORY_SIZE)])
+
+    assert monitor.get_damage(since=5) is None
+    assert len(monitor.get_damage(since=10)) == DAMAGE_HISTORY_SIZE
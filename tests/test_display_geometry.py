@@ -0,0 +1,32 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+from iris.api.core.util.display_geometry import DisplayGeometry, ScreenArea
+
+
+def test_standard_display():
+    geometry = DisplayGeometry(1920, 1080, 1920, 1080)
+
+    assert geometry.uhd_factor == 1
+    assert not geometry.is_uhd
+    assert not geometry.is_high_def
+    assert geometry.monitors == [ScreenArea(0, 0, 1920, 1080)]
+
+
+def test_retina_display():
+    geometry = DisplayGeometry(1440, 900, 2880, 1800)
+
+    assert geometry.uhd_factor == 2
+    assert geometry.is_uhd
+    assert geometry.is_high_def
+    assert geometry.monitors == [ScreenArea(0, 0, 1440, 900)]
+
+
+def test_fractional_scaling():
+    geometry = DisplayGeometry(1280, 800, 1920, 1200, [(0, 0, 1920, 1200), (1920, 0, 1500, 1200)])
+
+    assert geometry.uhd_factor == 1.5
+    assert geometry.is_uhd
+    assert geometry.is_high_def
+    assert geometry.monitors == [ScreenArea(0, 0, 1280, 800), ScreenArea(1280, 0, 1000, 800)]
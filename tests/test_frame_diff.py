@@ -0,0 +1,52 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import numpy as np
+
+from iris.api.core.util.frame_diff import count_changed_pixels, get_changed_boxes
+
+
+def _frames():
+    previous = np.zeros((100, 100), np.uint8)
+    return previous, previous.copy()
+
+
+def test_unchanged_frames_have_no_boxes():
+    previous, current = _frames()
+
+    assert get_changed_boxes(previous, current, 3, 3) == []
+    assert count_changed_pixels(previous, current) == 0
+
+
+def test_changed_area_is_padded():
+    previous, current = _frames()
+    current[40:45, 40:45] = 255
+
+    assert get_changed_boxes(previous, current, 3, 2) == [(37, 38, 11, 9)]
+    assert count_changed_pixels(previous, current) == 25
+
+
+def test_close_changes_are_merged():
+    previous, current = _frames()
+    current[10:12, 10:12] = 255
+    current[10:12, 16:18] = 255
+    current[80:82, 80:82] = 255
+
+    boxes = sorted(get_changed_boxes(previous, current, 2, 2))
+
+    assert boxes == [(8, 8, 12, 6), (78, 78, 6, 6)]
+
+
+def test_large_changes_search_the_whole_frame():
+    previous, current = _frames()
+    current[:, :60] = 255
+
+    assert get_changed_boxes(previous, current, 1, 1) is None
+
+
+def test_frames_of_different_sizes_are_entirely_changed():
+    previous, current = _frames()
+
+    assert count_changed_pixels(previous[:50], current) == current.size
+    assert count_changed_pixels(None, current) == current.size
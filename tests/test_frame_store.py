@@ -0,0 +1,40 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import numpy as np
+
+from iris.api.core.util.frame import Frame
+from iris.api.core.util.frame_store import FrameStore
+
+
+def _frame(value, capture_time):
+    return Frame(np.full((3, 4, 3), value, np.uint8), capture_time)
+
+
+def test_published_frames_are_shared():
+    store = FrameStore(4, 3, 2)
+
+    sequence = store.publish(_frame(7, 12.5))
+    frame = store.get_frame(sequence)
+
+    assert store.is_current(sequence)
+    assert frame.time == 12.5
+    assert (frame.array == 7).all()
+
+
+def test_reused_slots_are_detected():
+    store = FrameStore(4, 3, 2)
+    first = store.publish(_frame(1, 1))
+    store.publish(_frame(2, 2))
+    third = store.publish(_frame(3, 3))
+
+    assert not store.is_current(first)
+    assert store.get_frame(first) is None
+    assert (store.get_frame(third).array == 3).all()
+
+
+def test_frames_of_another_size_are_not_published():
+    store = FrameStore(4, 3, 2)
+
+    assert store.publish(Frame(np.zeros((4, 4, 3), np.uint8), 1)) is None
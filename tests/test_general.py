@@ -0,0 +1,43 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import multiprocessing
+import os
+import sys
+
+import pytest
+
+from iris.api.helpers.general import _is_profile_locked, wait_for_profile_unlock
+
+
+def _hold_profile_lock(path, locked, release):
+    # Imported here since it is not available on Windows.
+    import fcntl
+
+    lock_file = os.open(path, os.O_RDWR | os.O_CREAT)
+    fcntl.lockf(lock_file, fcntl.LOCK_EX)
+    locked.set()
+    release.wait()
+    os.close(lock_file)
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason='Firefox locks profiles with a lock file on Windows')
+def test_profile_lock_held_by_another_process(tmpdir):
+    profile = str(tmpdir)
+    assert not _is_profile_locked(profile)
+
+    locked = multiprocessing.Event()
+    release = multiprocessing.Event()
+    holder = multiprocessing.Process(target=_hold_profile_lock,
+                                     args=(os.path.join(profile, '.parentlock'), locked, release))
+    holder.start()
+    try:
+        assert locked.wait(5)
+        assert _is_profile_locked(profile)
+        assert not wait_for_profile_unlock(profile, timeout=0.3)
+    finally:
+        release.set()
+        holder.join()
+
+    assert wait_for_profile_unlock(profile, timeout=1)
@@ -0,0 +1,140 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import cv2
+import numpy as np
+import pytest
+
+from iris.api.core.location import Location
+from iris.api.core.pattern import Pattern
+from iris.api.core.util import image_search
+from iris.api.core.util.damage_monitor import DamageArea
+from iris.api.core.util.frame import Frame
+from iris.api.core.util.image_search import SearchArea, SearchState, _get_area_boxes, _match_changed_areas, \
+    _pool_image_search, _remember_match, _verify_last_match
+
+NEEDLE = np.random.RandomState(0).randint(0, 255, (10, 10, 3)).astype(np.uint8)
+
+
+@pytest.fixture
+def pattern(tmpdir):
+    path = str(tmpdir.join('needle.png'))
+    cv2.imwrite(path, NEEDLE)
+    return Pattern('needle.png', from_path=path)
+
+
+def _frames():
+    previous = Frame(np.zeros((100, 100, 3), np.uint8), 1)
+    array = previous.array.copy()
+    array[60:70, 60:70] = NEEDLE
+    return previous, Frame(array, 2)
+
+
+@pytest.fixture
+def screen(monkeypatch):
+    """Replaces captures with crops of a fake screen, records the captured areas."""
+    array = np.zeros((100, 100, 3), np.uint8)
+    captures = []
+
+    def get_frame(region=None, for_ocr=False):
+        captures.append(region)
+        if region is None:
+            return Frame(array.copy())
+        return Frame(array[region.y:region.y + region.height, region.x:region.x + region.width].copy())
+
+    monkeypatch.setattr(image_search.IrisCore, 'get_frame', staticmethod(get_frame))
+    monkeypatch.setattr(image_search, '_last_matches', {})
+    return array, captures
+
+
+class FakePool(object):
+    def __init__(self, result):
+        self.result = result
+        self.searches = 0
+
+    def search(self, pattern, region, negative, timeout=None):
+        self.searches += 1
+        return self.result
+
+
+def _state(previous, areas):
+    state = SearchState(lambda since: areas)
+    state.set_result(previous, None)
+    return state
+
+
+def test_area_boxes_are_padded_and_clipped():
+    frame = Frame(np.zeros((100, 100, 3), np.uint8))
+    areas = [DamageArea(15, 12, 4.5, 3, 0), DamageArea(108, 108, 4, 4, 0)]
+
+    assert _get_area_boxes(areas, SearchArea(10, 10, 100, 100), frame, 2, 3) == [(3, 0, 9, 8), (96, 95, 4, 5)]
+    assert _get_area_boxes([DamageArea(0, 0, 80, 80, 0)], None, frame, 2, 2) is None
+
+
+def test_changed_areas_are_searched(pattern):
+    previous, current = _frames()
+
+    location = _match_changed_areas(pattern, _state(previous, [DamageArea(62, 64, 3, 3, 2)]), current)
+
+    assert (location.x, location.y) == (60, 60)
+
+
+def test_only_changed_areas_are_searched(pattern):
+    previous, current = _frames()
+
+    location = _match_changed_areas(pattern, _state(previous, [DamageArea(5, 5, 3, 3, 2)]), current)
+
+    assert location.x == -1
+
+
+def test_frames_are_compared_without_changed_areas(pattern):
+    previous, current = _frames()
+
+    location = _match_changed_areas(pattern, _state(previous, None), current)
+
+    assert (location.x, location.y) == (60, 60)
+
+
+def test_last_match_is_verified_with_needle_sized_capture(pattern, screen):
+    array, captures = screen
+    array[20:30, 40:50] = NEEDLE
+    _remember_match(pattern, Location(40, 20))
+
+    location = _verify_last_match(pattern)
+
+    assert (location.x, location.y) == (40, 20)
+    assert captures == [SearchArea(40, 20, 10, 10)]
+
+
+def test_moved_match_is_forgotten(pattern, screen):
+    array, captures = screen
+    array[60:70, 60:70] = NEEDLE
+    _remember_match(pattern, Location(40, 20))
+
+    assert _verify_last_match(pattern) is None
+    assert image_search._last_matches == {}
+
+
+def test_pool_results_are_remembered(pattern, screen):
+    array, captures = screen
+    array[20:30, 40:50] = NEEDLE
+    pool = FakePool(Location(40, 20))
+
+    assert _pool_image_search(pool, pattern, 1) == pool.result
+    location = _pool_image_search(pool, pattern, 1)
+
+    # The second search was answered by the verified last match, without the pool.
+    assert (location.x, location.y) == (40, 20)
+    assert pool.searches == 1
+
+
+def test_pool_failures_forget_match(pattern, screen):
+    _remember_match(pattern, Location(40, 20))
+
+    assert _pool_image_search(FakePool(None), pattern, 1) is None
+    assert image_search._last_matches == {}
+
+    _remember_match(pattern, Location(40, 20))
+    assert _pool_image_search(FakePool(Location(-1, -1)), pattern, 1, negative=True)
+    assert image_search._last_matches == {}
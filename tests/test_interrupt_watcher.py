@@ -0,0 +1,80 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import threading
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from iris.api.core.location import Location
+from iris.api.core.pattern import Pattern
+from iris.api.core.util import interrupt_watcher
+from iris.api.core.util.frame import Frame
+
+POPUP = np.random.RandomState(0).randint(0, 255, (10, 10, 3)).astype(np.uint8)
+
+
+@pytest.fixture(autouse=True)
+def registry(monkeypatch):
+    monkeypatch.setattr(interrupt_watcher, '_watchers', [])
+    # Watchers are marked as seen by the tests, not by the background thread.
+    monkeypatch.setattr(interrupt_watcher, '_start_watcher_thread', lambda: None)
+
+
+@pytest.fixture
+def popup(tmpdir):
+    path = str(tmpdir.join('popup.png'))
+    cv2.imwrite(path, POPUP)
+    return Pattern('popup.png', from_path=path)
+
+
+def test_once_watcher_runs_a_single_time(popup):
+    handled = []
+    watcher = interrupt_watcher.register_watcher(popup, handled.append, once=True)
+
+    watcher.location = Location(1, 2)
+    assert interrupt_watcher.handle_interrupts() == 1
+    watcher.location = Location(1, 2)
+    assert interrupt_watcher.handle_interrupts() == 0
+
+    assert [(location.x, location.y) for location in handled] == [(1, 2)]
+
+
+def test_expired_watchers_are_dropped(popup):
+    interrupt_watcher.register_watcher(popup, None, expires=0.01)
+    kept = interrupt_watcher.register_watcher(popup, None)
+    time.sleep(0.05)
+
+    assert interrupt_watcher._get_watchers() == [kept]
+
+
+def test_handlers_only_run_on_the_main_thread(popup):
+    handled = []
+    watcher = interrupt_watcher.register_watcher(popup, handled.append)
+    watcher.location = Location(1, 2)
+
+    results = []
+    thread = threading.Thread(target=lambda: results.append(interrupt_watcher.handle_interrupts()))
+    thread.start()
+    thread.join()
+
+    assert results == [0]
+    assert handled == []
+    assert interrupt_watcher.handle_interrupts() == 1
+    assert len(handled) == 1
+
+
+def test_check_skips_frames_older_than_the_handler(popup):
+    array = np.zeros((50, 50, 3), np.uint8)
+    array[20:30, 10:20] = POPUP
+    watcher = interrupt_watcher.register_watcher(popup, None)
+
+    assert interrupt_watcher.check_watchers(Frame(array, 10)) == [watcher]
+    assert (watcher.location.x, watcher.location.y) == (10, 20)
+
+    watcher.location = None
+    watcher.handled_time = 11
+    assert interrupt_watcher.check_watchers(Frame(array, 10)) == []
@@ -0,0 +1,69 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import numpy as np
+import pytest
+
+try:
+    import Image
+except ImportError:
+    from PIL import Image
+
+from iris.api.core.util import ocr_cache
+from iris.api.core.util.input_events import notify_input
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    ocr_cache.clear_ocr_cache()
+    yield
+    ocr_cache.clear_ocr_cache()
+
+
+def _store(key, value='word'):
+    ocr_cache.store_ocr_result(key, [{'value': value}], np.zeros((2, 2, 3), np.uint8), [{'value': value}])
+
+
+def test_key_depends_on_pixels_and_parameters():
+    image = Image.new('RGB', (10, 10), (255, 255, 255))
+    changed = image.copy()
+    changed.putpixel((5, 5), (0, 0, 0))
+
+    key = ocr_cache.get_ocr_key(image, True, None)
+
+    assert key == ocr_cache.get_ocr_key(image.copy(), True, None)
+    assert key != ocr_cache.get_ocr_key(changed, True, None)
+    assert key != ocr_cache.get_ocr_key(image, False, None)
+
+
+def test_results_are_copies():
+    _store('key')
+
+    words, debug_img, debug_words = ocr_cache.get_ocr_result('key')
+    words[0]['value'] = 'changed'
+    debug_img[:] = 255
+
+    words, debug_img, debug_words = ocr_cache.get_ocr_result('key')
+    assert words[0]['value'] == 'word'
+    assert not debug_img.any()
+
+
+def test_least_recently_used_result_is_dropped():
+    for index in range(ocr_cache.OCR_CACHE_SIZE):
+        _store(index)
+    ocr_cache.get_ocr_result(0)
+
+    _store('new')
+
+    assert ocr_cache.get_ocr_result(0) is not None
+    assert ocr_cache.get_ocr_result(1) is None
+    assert ocr_cache.get_ocr_result('new') is not None
+
+
+def test_input_clears_results():
+    _store('key')
+
+    notify_input()
+
+    assert ocr_cache.get_ocr_result('key') is None
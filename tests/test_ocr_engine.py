@@ -0,0 +1,101 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import numpy as np
+import pytest
+
+from iris.api.core.util import ocr_engine
+from iris.api.core.util.ocr_engine import TSV_HEADER, image_to_data, parse_ocr_data, reset_ocr_engines
+
+WORDS_TSV = '\n'.join([
+    '1\t1\t0\t0\t0\t0\t0\t0\t200\t40\t-1\t',
+    '4\t1\t1\t1\t1\t0\t10\t5\t90\t20\t-1\t',
+    '5\t1\t1\t1\t1\t1\t10\t5\t40\t20\t96\tOpen',
+    '5\t1\t1\t1\t1\t2\t60\t6\t40\t19\t91\tfile',
+])
+
+
+class FakeEngine(object):
+    def __init__(self, lang):
+        self.lang = lang
+        self.images = []
+
+    def SetImageBytes(self, data, width, height, bytes_per_pixel, bytes_per_line):
+        self.images.append((width, height, bytes_per_pixel, bytes_per_line))
+
+    def Recognize(self):
+        pass
+
+    def GetTSVText(self, page):
+        return WORDS_TSV
+
+
+class FakeTesserocr(object):
+    def __init__(self, error=None):
+        self.error = error
+        self.engines = []
+
+    def PyTessBaseAPI(self, lang):
+        if self.error is not None:
+            raise self.error
+        self.engines.append(FakeEngine(lang))
+        return self.engines[-1]
+
+
+@pytest.fixture
+def pytesseract_calls(monkeypatch):
+    """Replaces the tesseract command, records the languages it is run with."""
+    calls = []
+
+    def image_to_data_command(image, lang):
+        calls.append(lang)
+        return TSV_HEADER + '\n' + WORDS_TSV
+
+    monkeypatch.setattr(ocr_engine.pytesseract, 'image_to_data', image_to_data_command)
+    monkeypatch.setattr(ocr_engine, '_failed_languages', set())
+    reset_ocr_engines()
+    yield calls
+    reset_ocr_engines()
+
+
+def test_words_are_parsed_from_tsv():
+    words = parse_ocr_data(TSV_HEADER + '\n' + WORDS_TSV)
+
+    assert [word['value'] for word in words] == ['Open', 'file']
+    assert words[1] == {'x': 60, 'y': 6, 'width': 40, 'height': 19, 'precision': 0.91, 'value': 'file'}
+
+
+def test_command_is_used_without_tesserocr(pytesseract_calls, monkeypatch):
+    monkeypatch.setattr(ocr_engine, 'tesserocr', None)
+
+    words = parse_ocr_data(image_to_data(np.zeros((20, 30), np.uint8), 'deu'))
+
+    assert pytesseract_calls == ['deu']
+    assert len(words) == 2
+
+
+def test_engine_is_loaded_once_per_language(pytesseract_calls, monkeypatch):
+    fake = FakeTesserocr()
+    monkeypatch.setattr(ocr_engine, 'tesserocr', fake)
+
+    image_to_data(np.zeros((20, 30, 3), np.uint8))
+    data = image_to_data(np.zeros((20, 30), np.uint8))
+
+    assert [engine.lang for engine in fake.engines] == ['eng']
+    assert fake.engines[0].images == [(30, 20, 3, 90), (30, 20, 1, 30)]
+    assert parse_ocr_data(data) == parse_ocr_data(TSV_HEADER + '\n' + WORDS_TSV)
+    assert pytesseract_calls == []
+
+
+def test_command_is_used_when_engine_fails_to_load(pytesseract_calls, monkeypatch):
+    fake = FakeTesserocr(RuntimeError('Failed to init API, possibly an invalid tessdata path'))
+    monkeypatch.setattr(ocr_engine, 'tesserocr', fake)
+
+    image_to_data(np.zeros((20, 30), np.uint8), 'fra')
+    fake.error = None
+    image_to_data(np.zeros((20, 30), np.uint8), 'fra')
+
+    # The language that failed isn't loaded again.
+    assert pytesseract_calls == ['fra', 'fra']
+    assert fake.engines == []
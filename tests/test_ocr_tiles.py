@@ -0,0 +1,71 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import numpy as np
+
+try:
+    import Image
+except ImportError:
+    from PIL import Image
+
+from iris.api.core.util import ocr_tiles
+
+LINE_TOPS = range(10, 1000, 37)
+LINE_HEIGHT = 14
+
+
+class InlinePool(object):
+
+    @staticmethod
+    def map(function, items):
+        return [function(item) for item in items]
+
+
+def _make_text_image():
+    array = np.full((1000, 600, 3), 255, np.uint8)
+    for top in LINE_TOPS:
+        array[top:top + LINE_HEIGHT, 20:300] = 0
+    return array
+
+
+def _read_lines(band_array):
+    """Reports every dark line of a band as a word, in pixels scaled up like OCR images."""
+    factor = ocr_tiles.get_size_of_scaled_image(Image.fromarray(band_array))[0] // band_array.shape[1]
+    rows = np.where((band_array.min(axis=2) < 128).any(axis=1))[0]
+    if len(rows) == 0:
+        return []
+    lines = np.split(rows, np.where(np.diff(rows) > 1)[0] + 1)
+    return [{'x': 20 * factor, 'y': int(line[0]) * factor, 'width': 280 * factor, 'height': len(line) * factor,
+             'precision': 1.0, 'value': 'line'} for line in lines]
+
+
+def test_split_bands_cuts_between_lines():
+    gray = _make_text_image()[:, :, 0]
+    bands = ocr_tiles.split_bands(gray, 4)
+
+    assert len(bands) == 4
+    assert bands[0][0] == 0 and bands[-1][1] == 1000
+    for (top, bottom), (next_top, next_bottom) in zip(bands, bands[1:]):
+        assert bottom == next_top
+        assert not gray[bottom].min() < 128
+
+
+def test_tiled_words_are_reported_once(monkeypatch):
+    monkeypatch.setattr(ocr_tiles, '_pool', InlinePool())
+    monkeypatch.setattr(ocr_tiles, '_pool_workers', 4)
+    monkeypatch.setattr(ocr_tiles, '_ocr_band', _read_lines)
+    image = Image.fromarray(_make_text_image())
+
+    assert ocr_tiles.get_band_count(image) == 4
+    words, debug_img = ocr_tiles.tiled_image_to_words(image)
+
+    factor = 1800 // 600
+    assert sorted(word['y'] // factor for word in words) == list(LINE_TOPS)
+    assert debug_img.shape == (1000 * factor, 600 * factor, 3)
+
+
+def test_no_tiling_without_pool(monkeypatch):
+    monkeypatch.setattr(ocr_tiles, '_pool', None)
+
+    assert ocr_tiles.get_band_count(Image.fromarray(_make_text_image())) == 1
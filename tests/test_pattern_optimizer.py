@@ -0,0 +1,24 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import numpy as np
+
+from iris.api.core.util.pattern_optimizer import MIN_CROP_SIDE, trim_uniform_borders
+
+
+def test_uniform_borders_are_trimmed():
+    content = np.random.RandomState(0).randint(0, 255, (12, 10, 3)).astype(np.uint8)
+    image = np.full((30, 30, 3), 255, np.uint8)
+    image[7:19, 5:15] = content
+
+    trimmed, trim = trim_uniform_borders(image)
+
+    assert trim == {'top': 7, 'bottom': 11, 'left': 5, 'right': 15}
+    assert (trimmed == content).all()
+
+
+def test_uniform_image_keeps_min_side():
+    trimmed, trim = trim_uniform_borders(np.zeros((20, 20, 3), np.uint8))
+
+    assert trimmed.shape[:2] == (MIN_CROP_SIDE, MIN_CROP_SIDE)
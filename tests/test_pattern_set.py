@@ -0,0 +1,83 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import cv2
+import numpy as np
+import pytest
+
+from iris.api.core import region
+from iris.api.core.pattern import Pattern, PatternSet
+from iris.api.core.util import image_search
+from iris.api.core.util.frame import Frame
+
+LIGHT = np.random.RandomState(1).randint(0, 255, (10, 10, 3)).astype(np.uint8)
+DARK = np.random.RandomState(2).randint(0, 255, (10, 10, 3)).astype(np.uint8)
+
+
+@pytest.fixture
+def pattern_set(tmpdir):
+    variants = {}
+    for name, needle in [('light', LIGHT), ('dark', DARK)]:
+        path = str(tmpdir.join('%s.png' % name))
+        cv2.imwrite(path, needle)
+        variants[name] = Pattern('%s.png' % name, from_path=path)
+    return PatternSet(variants)
+
+
+@pytest.fixture
+def screen(monkeypatch):
+    """Replaces captures with a fake screen, counts the captures."""
+    array = np.zeros((100, 100, 3), np.uint8)
+    captures = []
+
+    def get_frame(region=None, for_ocr=False):
+        captures.append(region)
+        return Frame(array.copy())
+
+    monkeypatch.setattr(image_search.IrisCore, 'get_frame', staticmethod(get_frame))
+    monkeypatch.setattr(image_search.IrisCore, 'get_screen_area', staticmethod(lambda: None))
+    return array, captures
+
+
+def test_variants_are_named(pattern_set):
+    assert [name for name, pattern in pattern_set.get_variants()] == ['dark', 'light']
+    assert pattern_set.get_pattern('dark').get_filename() == 'dark.png'
+    assert pattern_set.get_pattern('missing') is None
+
+    listed = PatternSet([pattern_set.get_pattern('light')])
+    assert [name for name, pattern in listed.get_variants()] == ['light.png']
+
+    with pytest.raises(ValueError):
+        PatternSet([])
+
+
+def test_which_returns_visible_variant(pattern_set, screen):
+    array, captures = screen
+    array[30:40, 50:60] = DARK
+
+    assert region.which(pattern_set, 1) == 'dark'
+
+
+def test_which_prefers_best_of_many_visible_variants(pattern_set, screen):
+    array, captures = screen
+    array[30:40, 50:60] = DARK
+    array[70:80, 10:20] = LIGHT
+    # The dark variant is partly covered, so the light one matches best.
+    array[30:32, 50:60] = 0
+
+    assert region.which(pattern_set, 1) == 'light'
+
+
+def test_variants_are_searched_in_one_capture(pattern_set, screen):
+    array, captures = screen
+    array[70:80, 10:20] = LIGHT
+
+    name, location = image_search.image_search_set(pattern_set)
+
+    assert (name, location.x, location.y) == ('light', 10, 70)
+    assert len(captures) == 1
+
+
+def test_which_returns_none_without_visible_variant(pattern_set, screen):
+    assert region.which(pattern_set, 0.2) is None
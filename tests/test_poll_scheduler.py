@@ -0,0 +1,73 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import pytest
+
+from iris.api.core.util import poll_scheduler
+from iris.api.core.util.poll_scheduler import PollScheduler
+
+
+class FakeClock(object):
+    """Clock that only moves when the scheduler sleeps or an attempt spends time."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake_clock = FakeClock()
+    monkeypatch.setattr(poll_scheduler, 'time', fake_clock)
+    return fake_clock
+
+
+def _run(scheduler, clock, cost=0):
+    starts = []
+    while scheduler.next_attempt():
+        starts.append(clock.now - 1000)
+        clock.sleep(cost)
+    return starts
+
+
+def test_pauses_back_off_and_last_attempt_ends_at_deadline(clock):
+    scheduler = PollScheduler(1, min_interval=0.1, max_interval=0.5, backoff=2, sleep=clock.sleep)
+
+    starts = _run(scheduler, clock)
+
+    assert starts == pytest.approx([0, 0.1, 0.3, 0.7, 1.0])
+    assert scheduler.attempts == 5
+    assert scheduler.remaining() == 0
+
+
+def test_attempt_cost_is_deducted_but_min_interval_kept(clock):
+    scheduler = PollScheduler(5, min_interval=0.1, max_interval=0.5, backoff=2, sleep=clock.sleep)
+
+    starts = _run(scheduler, clock, cost=0.3)
+
+    gaps = [next_start - start for start, next_start in zip(starts, starts[1:])]
+    assert all(gap >= 0.4 - 1e-9 for gap in gaps[:-1])
+    assert all(gap <= 0.5 + 1e-9 for gap in gaps[:-1])
+    assert starts[-1] + 0.3 == pytest.approx(5)
+
+
+def test_unchanged_screen_skips_to_final_attempt(clock):
+    calls = []
+
+    def wait_for_change(since, timeout):
+        calls.append(timeout)
+        clock.sleep(timeout)
+        return []
+
+    scheduler = PollScheduler(2, min_interval=0.1, max_interval=0.5, sleep=clock.sleep, wait_for_change=wait_for_change)
+
+    starts = _run(scheduler, clock)
+
+    assert len(calls) == 1
+    assert starts == pytest.approx([0, 2])
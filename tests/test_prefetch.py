@@ -0,0 +1,70 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import time
+
+import pytest
+
+from iris.api.core.location import Location
+from iris.api.core.util import image_search, prefetch
+
+
+class FakePattern(object):
+    similarity = 0.8
+
+    @staticmethod
+    def get_file_path():
+        return '/patterns/menu.png'
+
+    @staticmethod
+    def get_filename():
+        return 'menu.png'
+
+
+@pytest.fixture(autouse=True)
+def no_results(monkeypatch):
+    monkeypatch.setattr(prefetch, '_results', {})
+    monkeypatch.setattr(prefetch, 'get_last_input_time', lambda: 100)
+
+
+def _wait_for_workers(timeout=2):
+    end_time = time.time() + timeout
+    while len(prefetch._jobs) > 0 and time.time() < end_time:
+        time.sleep(0.01)
+    return len(prefetch._jobs) == 0
+
+
+def test_result_is_only_returned_once():
+    prefetch._results[prefetch._get_key(FakePattern, None)] = Location(5, 6), time.time()
+
+    assert prefetch.get_prefetched(FakePattern).x == 5
+    assert prefetch.get_prefetched(FakePattern) is None
+
+
+def test_old_results_are_not_used():
+    key = prefetch._get_key(FakePattern, None)
+
+    prefetch._results[key] = Location(5, 6), time.time() - prefetch.RESULT_TTL - 1
+    assert prefetch.get_prefetched(FakePattern) is None
+
+    prefetch._results[key] = Location(5, 6), 99
+    assert prefetch.get_prefetched(FakePattern) is None
+
+
+def test_worker_stops_once_the_target_is_asked_for(monkeypatch):
+    searches = []
+
+    def search(pattern, region=None, state=None, screen_frame=None):
+        searches.append(time.time())
+        return Location(-1, -1)
+
+    monkeypatch.setattr(image_search, 'image_search', search)
+    prefetch.prefetch([FakePattern], 10)
+    time.sleep(0.2)
+
+    assert prefetch.get_prefetched(FakePattern) is None
+    assert _wait_for_workers()
+    searched = len(searches)
+    time.sleep(0.2)
+    assert len(searches) == searched > 0
@@ -0,0 +1,122 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import cv2
+import numpy as np
+import pytest
+
+from iris.api.core import region
+from iris.api.core.location import Location
+from iris.api.core.pattern import Pattern
+from iris.api.core.util import poll_scheduler
+from iris.api.core.util.frame import Frame
+from iris.api.core.util.poll_scheduler import PollScheduler
+
+
+@pytest.fixture
+def pattern(tmpdir):
+    path = str(tmpdir.join('home.png'))
+    cv2.imwrite(path, np.zeros((4, 4, 3), np.uint8))
+    return Pattern('home.png', from_path=path)
+
+
+@pytest.fixture
+def searches(monkeypatch):
+    """Replaces the polling search, records the timeouts it gets and the wait times recorded."""
+    calls = {'timeouts': [], 'recorded': [], 'found': True}
+
+    def positive_image_search(pattern, timeout, in_region):
+        calls['timeouts'].append(timeout)
+        return Location(1, 2) if calls['found'] else None
+
+    monkeypatch.setattr(region, 'positive_image_search', positive_image_search)
+    monkeypatch.setattr(region, 'record_wait_time', lambda name, seconds: calls['recorded'].append(name))
+    monkeypatch.setattr(region, 'get_adaptive_timeout', lambda name, timeout: 0.5)
+    return calls
+
+
+def test_exists_records_wait_time(pattern, searches):
+    assert region.exists(pattern, 4)
+
+    assert searches['timeouts'] == [4]
+    assert searches['recorded'] == ['home.png']
+
+
+def test_exists_doesnt_record_misses(pattern, searches):
+    searches['found'] = False
+
+    assert not region.exists(pattern, 4)
+    assert searches['recorded'] == []
+
+
+def test_expect_absent_shortens_timeout(pattern, searches):
+    searches['found'] = False
+
+    assert not region.exists(pattern, 4, expect_absent=True)
+    assert not region.Region(0, 0, 10, 10).exists(pattern, 4, expect_absent=True)
+    assert searches['timeouts'] == [0.5, 0.5]
+
+
+class FakeClock(object):
+    """Clock that only moves when the poll scheduler sleeps."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def frames(monkeypatch):
+    """Replaces screen captures with frames that change on the given capture numbers."""
+    clock = FakeClock()
+    captures = {'count': 0, 'changes': [], 'regions': []}
+
+    def get_frame(in_region=None):
+        captures['count'] += 1
+        captures['regions'].append(in_region)
+        value = len([n for n in captures['changes'] if n <= captures['count']])
+        return Frame(np.full((4, 4, 3), value % 2 * 50, np.uint8), clock.time())
+
+    monkeypatch.setattr(region, 'time', clock)
+    monkeypatch.setattr(poll_scheduler, 'time', clock)
+    monkeypatch.setattr(region, 'PollScheduler',
+                        lambda *args, **kwargs: PollScheduler(*args, sleep=clock.sleep, **kwargs))
+    monkeypatch.setattr(region.IrisCore, 'get_frame', staticmethod(get_frame))
+    monkeypatch.setattr(region.IrisCore, 'get_screen_area', staticmethod(lambda: None))
+    captures['clock'] = clock
+    return captures
+
+
+def test_wait_for_stable_waits_for_quiet_after_change(frames):
+    start = frames['clock'].now
+    frames['changes'] = [10]
+
+    assert region.wait_for_stable(quiet_ms=300, timeout=5, settle_ms=1000)
+    # The quiet period before the change didn't count, 300 ms after it did.
+    assert 0.75 <= frames['clock'].now - start < 1
+
+
+def test_wait_for_stable_settles_without_change(frames):
+    start = frames['clock'].now
+
+    assert region.wait_for_stable(quiet_ms=300, timeout=5, settle_ms=1000)
+    assert 1 <= frames['clock'].now - start < 1.1
+
+
+def test_wait_for_stable_times_out_while_changing(frames):
+    frames['changes'] = range(2, 200)
+
+    assert not region.wait_for_stable(quiet_ms=300, timeout=1, settle_ms=500)
+
+
+def test_wait_for_stable_captures_region(frames):
+    area = region.Region(0, 0, 10, 10)
+
+    assert area.wait_for_stable(timeout=1)
+    assert set(frames['regions']) == {area}
@@ -0,0 +1,102 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import cv2
+import numpy as np
+import pytest
+
+from iris.api.core.pattern import Pattern
+from iris.api.core.util import screen_observer
+from iris.api.core.util.frame import Frame
+from iris.api.core.util.screen_observer import ObserveEvent, RegionObserver
+from iris.api.core.util.search_pool import SearchArea
+
+NEEDLE = np.random.RandomState(0).randint(0, 255, (10, 10, 3)).astype(np.uint8)
+AREA = SearchArea(100, 200, 50, 50)
+
+
+@pytest.fixture
+def pattern(tmpdir):
+    path = str(tmpdir.join('needle.png'))
+    cv2.imwrite(path, NEEDLE)
+    return Pattern('needle.png', from_path=path)
+
+
+@pytest.fixture
+def screen(monkeypatch):
+    """Replaces captures of the observed region with a fake screen the test draws on."""
+    array = np.zeros((50, 50, 3), np.uint8)
+    monkeypatch.setattr(screen_observer.IrisCore, 'get_frame', staticmethod(lambda region=None: Frame(array.copy())))
+    monkeypatch.setattr(screen_observer, 'get_change_waiter', lambda region: None)
+    monkeypatch.setattr(screen_observer.Settings, 'observe_min_changed_pixels', 20)
+    return array
+
+
+def _observer(event_type, pattern=None, min_changed_pixels=None):
+    events = []
+    observer = RegionObserver(AREA)
+    observer.add_handler(event_type, events.append, pattern, min_changed_pixels)
+    return observer, events
+
+
+def test_change_ignores_first_frame_and_small_changes(screen):
+    observer, events = _observer(ObserveEvent.CHANGE)
+
+    observer._check_once()
+    screen[0:2, 0:5] = 255
+    observer._check_once()
+    screen[10:20, 10:20] = 255
+    observer._check_once()
+
+    assert [event.changed_pixels for event in events] == [100]
+
+
+def test_appear_and_vanish_fire_once(screen, pattern):
+    appear, appeared = _observer(ObserveEvent.APPEAR, pattern)
+    vanish, vanished = _observer(ObserveEvent.VANISH, pattern)
+
+    for step in range(4):
+        if step == 1:
+            screen[5:15, 20:30] = NEEDLE
+        elif step == 3:
+            screen[5:15, 20:30] = 0
+        appear._check_once()
+        vanish._check_once()
+
+    assert [(event.location.x, event.location.y) for event in appeared] == [(120, 205)]
+    assert [event.type for event in vanished] == [ObserveEvent.VANISH]
+
+
+def test_pattern_visible_in_first_frame_appears(screen, pattern):
+    screen[5:15, 20:30] = NEEDLE
+    observer, events = _observer(ObserveEvent.APPEAR, pattern)
+
+    observer._check_once()
+
+    assert len(events) == 1
+
+
+def test_failing_handler_doesnt_stop_others(screen):
+    def fail(event):
+        raise RuntimeError('handler failed')
+
+    observer, events = _observer(ObserveEvent.CHANGE, min_changed_pixels=1)
+    observer._handlers.insert(0, screen_observer._ObserveHandler(ObserveEvent.CHANGE, fail, min_changed_pixels=1))
+
+    observer._check_once()
+    screen[0:1, 0:1] = 255
+    observer._check_once()
+
+    assert len(events) == 1
+
+
+def test_background_observer_stops(screen, monkeypatch):
+    monkeypatch.setattr(screen_observer.Settings, 'observe_scan_rate', 100)
+    observer, events = _observer(ObserveEvent.CHANGE)
+
+    observer.observe_in_background()
+    assert observer.is_running()
+    observer.stop()
+
+    assert not observer.is_running()
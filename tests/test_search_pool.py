@@ -0,0 +1,65 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import Queue
+
+from iris.api.core.settings import INLINE_SEARCH, PROCESS_SEARCH, THREAD_SEARCH, Settings
+from iris.api.core.util import search_pool
+from iris.api.core.util.search_pool import CANCEL_SLOTS, SearchPool, _search_worker
+
+
+class MissingPattern(object):
+    """Pattern whose image can't be loaded, so every search attempt fails in the worker."""
+
+    similarity = 0.8
+
+    @staticmethod
+    def get_file_path():
+        return '/nonexistent/missing.png'
+
+
+def test_worker_reports_errors_apart_from_misses():
+    tasks = Queue.Queue()
+    results = Queue.Queue()
+    tasks.put((1, MissingPattern.get_file_path(), 0.8, None, None, None, None))
+    tasks.put(None)
+
+    _search_worker(tasks, results, [-1] * CANCEL_SLOTS)
+
+    assert results.get_nowait() == (1, None, None)
+
+
+def test_worker_errors_dont_answer_negative_searches():
+    pool = SearchPool(THREAD_SEARCH, 2)
+    try:
+        assert pool.search(MissingPattern(), None, True, 0.5) is None
+        assert pool.search(MissingPattern(), None, False, 0.5) is None
+    finally:
+        pool.shutdown()
+
+
+def test_pool_is_kept_for_the_run(monkeypatch):
+    monkeypatch.setattr(search_pool, '_pool', None)
+    monkeypatch.setattr(Settings, 'search_strategy', THREAD_SEARCH)
+    monkeypatch.setattr(Settings, 'search_workers', 1)
+    search_pool.start_search_pool()
+    try:
+        pool = search_pool.get_search_pool()
+        Settings.search_strategy = PROCESS_SEARCH
+        Settings.search_workers = 3
+        search_pool.start_search_pool()
+
+        assert search_pool.get_search_pool() is pool
+        assert (pool.strategy, pool.workers) == (THREAD_SEARCH, 1)
+    finally:
+        search_pool.shutdown_search_pool()
+
+
+def test_inline_searches_dont_start_a_pool(monkeypatch):
+    monkeypatch.setattr(search_pool, '_pool', None)
+    monkeypatch.setattr(Settings, 'search_strategy', INLINE_SEARCH)
+
+    search_pool.start_search_pool()
+
+    assert search_pool.get_search_pool() is None
@@ -0,0 +1,44 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+from iris.test_case import BaseTest
+
+
+class FakeExpectation(object):
+
+    def __init__(self, found, error=None):
+        self.found = found
+        self.error = error
+        self.message = 'expectation'
+        self.stack = ''
+
+    def wait(self, timeout=None):
+        return self.found
+
+
+def test_failed_expectation_keeps_outcome_failed():
+    test = BaseTest(None)
+    test.expectations = [FakeExpectation(False), FakeExpectation(True)]
+
+    assert not test.verify_expectations()
+    assert test.outcome == 'FAILED'
+    assert [result.outcome for result in test.get_test_results()] == ['FAILED', 'PASSED']
+
+
+def test_expectation_error_is_reported_by_class_name():
+    test = BaseTest(None)
+    test.expectations = [FakeExpectation(False, ValueError('bad frame'))]
+
+    assert not test.verify_expectations()
+    assert test.outcome == 'FAILED'
+    assert 'ValueError: bad frame' in str(test.get_test_results()[0].error)
+
+
+def test_passing_expectations_pass():
+    test = BaseTest(None)
+    test.expectations = [FakeExpectation(True), FakeExpectation(True)]
+
+    assert test.verify_expectations()
+    assert test.outcome == 'PASSED'
+    assert test.expectations == []
@@ -0,0 +1,52 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+from iris.api.core.util import timing_history
+
+
+def test_quantile():
+    samples = [float(value) for value in range(1, 101)]
+
+    assert timing_history._get_quantile(samples, 0.5) == 51
+    assert timing_history._get_quantile(samples, 0.999) == 100
+    assert timing_history._get_quantile([3.0, 1.0, 2.0], 0) == 1
+
+
+def test_expected_time_needs_enough_samples(monkeypatch):
+    monkeypatch.setattr(timing_history, '_history', {'a.png': {'test': [0.1] * (timing_history.MIN_SAMPLES - 1)}})
+
+    assert timing_history.get_expected_time('a.png', 'test') is None
+    assert timing_history.get_expected_time('missing.png', 'test') is None
+
+
+def test_expected_time_falls_back_to_all_tests(monkeypatch):
+    history = {'a.png': {'test': [0.2] * 2, 'other': [0.1] * timing_history.MIN_SAMPLES + [0.9]}}
+    monkeypatch.setattr(timing_history, '_history', history)
+
+    assert timing_history.get_expected_time('a.png', 'test') == 0.9
+    assert timing_history.get_expected_time('a.png', 'other') == 0.9
+
+
+def test_record_keeps_latest_samples(monkeypatch):
+    monkeypatch.setattr(timing_history, '_history', {})
+
+    for index in range(timing_history.MAX_SAMPLES + 5):
+        timing_history.record_wait_time('a.png', index)
+
+    samples = timing_history._history['a.png'][timing_history.ANY_TEST]
+    assert len(samples) == timing_history.MAX_SAMPLES
+    assert samples[0] == 5
+
+
+def test_adaptive_timeout_is_opt_in(monkeypatch):
+    monkeypatch.setattr(timing_history, '_history', {'a.png': {'test': [0.4] * timing_history.MIN_SAMPLES}})
+    monkeypatch.setattr(timing_history.IrisCore, 'get_test_name', staticmethod(lambda: 'test'))
+
+    monkeypatch.setattr(timing_history.Settings, 'adaptive_timeouts', False)
+    assert timing_history.get_adaptive_timeout('a.png', 10) == 10
+
+    monkeypatch.setattr(timing_history.Settings, 'adaptive_timeouts', True)
+    assert timing_history.get_adaptive_timeout('a.png', 10) == 0.4 * timing_history.ADAPTIVE_FACTOR
+    assert timing_history.get_adaptive_timeout('a.png', 0.3) == 0.3
+    assert timing_history.get_adaptive_timeout('missing.png', 10) == 10
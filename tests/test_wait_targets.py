@@ -0,0 +1,110 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+
+from iris.api.core import region
+from iris.api.core.errors import FindError
+from iris.api.core.pattern import Pattern, PatternSet
+from iris.api.core.util import ocr_search
+
+HOME = np.random.RandomState(1).randint(0, 255, (10, 10, 3)).astype(np.uint8)
+BACK = np.random.RandomState(2).randint(0, 255, (10, 10, 3)).astype(np.uint8)
+
+
+def _word(value, x):
+    return {'x': x, 'y': 5, 'width': 20, 'height': 10, 'precision': 90.0, 'value': value}
+
+
+@pytest.fixture
+def patterns(tmpdir):
+    found = []
+    for name, needle in [('home', HOME), ('back', BACK)]:
+        path = str(tmpdir.join('%s.png' % name))
+        cv2.imwrite(path, needle)
+        found.append(Pattern('%s.png' % name, from_path=path))
+    return found
+
+
+@pytest.fixture
+def screen(monkeypatch):
+    """Replaces captures with a fake screen and OCR with a list of words, counts the captures."""
+    state = {'array': np.zeros((100, 100, 3), np.uint8), 'words': [], 'captures': 0}
+
+    def get_region(in_region=None, for_ocr=False):
+        state['captures'] += 1
+        return Image.fromarray(state['array'])
+
+    monkeypatch.setattr(region.IrisCore, 'get_region', staticmethod(get_region))
+    monkeypatch.setattr(region.IrisCore, 'get_screen_area', staticmethod(lambda: None))
+    monkeypatch.setattr(region.IrisCore, 'get_uhd_details', staticmethod(lambda: (False, 1)))
+    monkeypatch.setattr(region, 'text_search_all', lambda processing, in_region, image: (state['words'], None, None))
+    return state
+
+
+def test_wait_any_returns_first_listed_of_many(patterns, screen):
+    home, back = patterns
+    screen['array'][10:20, 10:20] = HOME
+    screen['array'][50:60, 50:60] = BACK
+
+    target, match = region.wait_any([back, home], 1)
+
+    assert target is back
+    assert (match.x, match.y) == (50, 50)
+    assert screen['captures'] == 1
+
+
+def test_wait_any_finds_pattern_set_and_text(patterns, screen):
+    home, back = patterns
+    screen['words'] = [_word('Home', 30)]
+
+    target, match = region.wait_any([PatternSet([back]), 'Home'], 1)
+
+    assert target == 'Home'
+    assert match.x == 30
+
+
+def test_wait_any_raises_when_nothing_appears(patterns, screen):
+    with pytest.raises(FindError):
+        region.wait_any(patterns, 0.2)
+
+
+def test_wait_all_searches_targets_in_one_capture(patterns, screen):
+    home, back = patterns
+    screen['array'][10:20, 10:20] = HOME
+    screen['array'][50:60, 50:60] = BACK
+    screen['words'] = [_word('Open', 0), _word('file', 25)]
+
+    found = list(region.wait_all([home, back, 'Open file'], 1))
+
+    assert [target for target, match in found] == [home, back, 'Open file']
+    assert [(match.x, match.y) for target, match in found] == [(10, 10), (50, 50), (0, 5)]
+    assert screen['captures'] == 1
+
+
+def test_wait_all_names_missing_targets(patterns, screen):
+    home, back = patterns
+    screen['array'][10:20, 10:20] = HOME
+
+    with pytest.raises(FindError) as error:
+        region.wait_all([home, back], 0.2)
+    assert 'back.png' in str(error.value)
+    assert 'home.png' not in str(error.value)
+
+
+def test_text_targets_fall_back_to_zoom_search(screen, monkeypatch):
+    screen['words'] = [_word('Hel1o', 0)]
+
+    def zoom_search(what, text_dict, stack_array, offset):
+        text_dict[0]['value'] = 'Hello'
+    monkeypatch.setattr(ocr_search, '_zoom_search', zoom_search)
+
+    target, match = region.wait_any(['Hello'], 1)
+
+    assert target == 'Hello'
+    # The zoom search read a copy, the OCR result stays as it was read.
+    assert screen['words'][0]['value'] == 'Hel1o'